@@ -0,0 +1,48 @@
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.api.schemas.api_key import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
+from backend.app.core.config import settings
+from backend.app.core.security import current_active_user
+from backend.app.db.session import get_async_session
+from backend.app.services.api_keys import count_active_api_keys, create_api_key, list_api_keys, revoke_api_key
+
+router = APIRouter(prefix="/users/me/api-keys", tags=["users"])
+
+
+@router.post("", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED, summary="Create an API key")
+async def create_user_api_key(
+        payload: ApiKeyCreate,
+        db: AsyncSession = Depends(get_async_session),
+        current_user = Depends(current_active_user),
+):
+    if await count_active_api_keys(db, current_user.id) >= settings.API_KEYS_MAX_PER_USER:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many API keys. The limit is {settings.API_KEYS_MAX_PER_USER} active keys per user."
+        )
+    api_key, key = await create_api_key(db, current_user.id, payload.name)
+    return ApiKeyCreated(**ApiKeyRead.model_validate(api_key).model_dump(), key=key)
+
+
+@router.get("", response_model=List[ApiKeyRead], summary="List the API keys of the current user")
+async def list_user_api_keys(
+        db: AsyncSession = Depends(get_async_session),
+        current_user = Depends(current_active_user),
+):
+    return await list_api_keys(db, current_user.id)
+
+
+@router.delete("/{key_id}", response_model=ApiKeyRead, summary="Revoke an API key")
+async def revoke_user_api_key(
+        key_id: uuid.UUID,
+        db: AsyncSession = Depends(get_async_session),
+        current_user = Depends(current_active_user),
+):
+    api_key = await revoke_api_key(db, current_user.id, key_id)
+    if api_key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
+    return api_key
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from backend.app.core.security import auth_backend, fastapi_users
+from backend.app.services.rate_limit import rate_limit
 from backend.app.api.schemas.user import UserCreate, UserRead, UserUpdate
 
 router = APIRouter()
@@ -8,12 +9,14 @@ router.include_router(
     fastapi_users.get_auth_router(auth_backend),
     prefix="/auth/jwt",
     tags=["auth"],
+    dependencies=[Depends(rate_limit("auth"))],
 )
 
 router.include_router(
     fastapi_users.get_register_router(UserRead, UserCreate),
     prefix="/auth",
     tags=["auth"],
+    dependencies=[Depends(rate_limit("auth"))],
 )
 
 router.include_router(
@@ -1,161 +1,515 @@
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Header, Response
 from backend.app.core.security import current_active_user, current_optional_active_user
 from backend.app.models.user import User
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, StreamingResponse
+from redis.exceptions import RedisError
 
 from backend.app.core.config import settings
-from backend.app.db.session import get_async_session
+from backend.app.core.logging_config import logger
+from backend.app.db.queries import Link, get_link
+from backend.app.db.session import async_session_maker, get_async_session, get_read_session
 from backend.app.models.url import URL, ExpiredURL
-from backend.app.api.schemas.url import URLCreate, URLResponse, URLCustomCreate, URLUpdateRequest, URLListResponse
+from backend.app.api.schemas.url import (
+    URLCreate,
+    URLResponse,
+    URLCustomCreate,
+    URLUpdateRequest,
+    URLListResponse,
+    URLBatchCreate,
+    URLBatchResponse,
+    URLImportReport,
+    URLSummaryResponse,
+    URLResolveRequest,
+    URLResolveResponse,
+    URLStats,
+    URLStatsBatchResponse,
+    ClickTimeseries,
+    UniqueVisitors,
+    HotLink,
+    HotLinksResponse,
+)
 from backend.app.services.shortener import generate_unique_short_code
-from backend.app.services.cache import get_cache, store_short_code, delete_cache
-from backend.app.services.url_helpers import update_url_background
+from backend.app.services.cache import (
+    store_short_code,
+    delete_cache,
+    mark_fixed_expiration,
+    resolve_and_count,
+    drop_cached_stats,
+    get_cache,
+    get_hot_links,
+    HOT_LINKS_WINDOWS,
+)
+from backend.app.services.url_helpers import take_pending_clicks
+from backend.app.services.url_batch import create_urls_batch
+from backend.app.services.idempotency import run_idempotent
+from backend.app.services.url_summary import get_url_summary
+from backend.app.services.url_search import search_urls
+from backend.app.services.click_events import click_event_fields, spool_click_event
+from backend.app.services.unique_visitors import (
+    UNIQUE_VISITORS_ERROR,
+    count_unique_visitors,
+    visitor_fingerprint,
+)
+from backend.app.services.url_resolve import resolve_short_codes
+from backend.app.services.url_stats import etag_response, get_urls_stats
+from backend.app.services.breakdowns import get_link_breakdowns
+from backend.app.services.live_hits import live_hit_events
+from backend.app.services.rate_limit import rate_limit
+from backend.app.services.click_timeseries import (
+    DEFAULT_SPANS,
+    GRANULARITY_SECONDS,
+    bucket_starts,
+    get_click_timeseries,
+)
+from backend.app.services.url_export import (
+    EXPORT_FORMATS,
+    MEDIA_TYPES,
+    export_user_urls,
+    gzip_stream,
+)
+from backend.app.services.url_import import (
+    IMPORT_FORMATS,
+    URLImporter,
+    get_import_progress,
+    store_import_progress,
+)
 from backend.app.services.url_utils import (
+    URL_RESPONSE_COLUMNS,
     create_url_response,
-    get_url_by_shortcode,
-    create_url_list_response
+    create_url_list_response,
+    insert_url,
+    is_short_code,
+    update_url_fields,
+    url_list_columns,
+    apply_keyset_page,
+    split_keyset_page,
 )
 from backend.app.services.url_dependencies import get_user_owned_url
 
 router = APIRouter(tags=["urls"])
 
 
-@router.post("/url", response_model=URLResponse, summary="Create a new shortened URL")
+@router.post(
+    "/url",
+    response_model=URLResponse,
+    dependencies=[Depends(rate_limit("create"))],
+    summary="Create a new shortened URL",
+)
 async def create_url(
         url_data: URLCreate,
+        response: Response,
         db: AsyncSession = Depends(get_async_session),
-        current_user: Optional[User] = Depends(current_optional_active_user)
+        current_user: Optional[User] = Depends(current_optional_active_user),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
+    async def handler():
+        if current_user:
+            result = await db.execute(
+                select(*URL_RESPONSE_COLUMNS).where(
+                    URL.original_url == url_data.original_url,
+                    URL.created_by == current_user.id
+                ).limit(1)
+            )
+            existing_url = result.one_or_none()
+            if existing_url:
+                return create_url_response(existing_url)
 
-    if current_user:
-        result = await db.execute(
-            select(URL).where(
-                URL.original_url == url_data.original_url,
-                URL.created_by == current_user.id
-            ).limit(1)
+        short_code = await generate_unique_short_code(url_data.original_url)
+        new_url = await insert_url(db, {
+            "short_code": short_code,
+            "original_url": url_data.original_url,
+            "created_at": datetime.now(timezone.utc),
+            "expires_at": (
+                datetime.now(timezone.utc) + timedelta(minutes=settings.URL_EXPIRE_MINUTES)
+                if settings.URL_EXPIRE_MINUTES > 0 else None
+            ),
+            "created_by": (current_user.id if current_user else None),
+        })
+        await db.commit()
+        return create_url_response(new_url)
+
+    return await run_idempotent(idempotency_key, "url", current_user, url_data, response, handler)
+
+
+@router.post(
+    "/url/batch",
+    response_model=URLBatchResponse,
+    dependencies=[Depends(rate_limit("create"))],
+    summary="Create many shortened URLs at once",
+)
+async def create_url_batch(
+        batch_data: URLBatchCreate,
+        db: AsyncSession = Depends(get_async_session),
+        current_user: Optional[User] = Depends(current_optional_active_user)
+):
+    if len(batch_data.urls) > settings.URL_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many URLs in one batch. The limit is {settings.URL_BATCH_MAX_ITEMS}."
         )
-        existing_url = result.scalar_one_or_none()
-        if existing_url:
-            return create_url_response(existing_url)
+    original_urls = [item.original_url for item in batch_data.urls]
+    results = await create_urls_batch(db, original_urls, current_user)
+    return URLBatchResponse(results=results)
 
-    short_code = await generate_unique_short_code(url_data.original_url)
-    new_url = URL(
-        short_code=short_code,
-        original_url=url_data.original_url,
-        created_at=datetime.now(timezone.utc),
-        expires_at=(datetime.now(timezone.utc) + timedelta(minutes=settings.URL_EXPIRE_MINUTES)
-                    if settings.URL_EXPIRE_MINUTES > 0 else None),
-        created_by=(current_user.id if current_user else None)
-    )
-    db.add(new_url)
-    await db.commit()
-    await db.refresh(new_url)
-    return create_url_response(new_url)
+
+@router.post(
+    "/resolve",
+    response_model=URLResolveResponse,
+    summary="Resolve many short codes at once",
+)
+async def resolve_urls(
+        resolve_data: URLResolveRequest,
+        db: AsyncSession = Depends(get_async_session)
+):
+    if len(resolve_data.codes) > settings.RESOLVE_MAX_CODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Too many short codes in one request. "
+                f"The limit is {settings.RESOLVE_MAX_CODES}."
+            )
+        )
+    urls = await resolve_short_codes(db, resolve_data.codes, resolve_data.count_clicks)
+    return URLResolveResponse(urls=urls)
 
 
-@router.get("/my_urls", summary="Get URLs created by the authenticated user", response_model=List[URLListResponse])
+@router.get(
+    "/my_urls",
+    summary="Get URLs created by the authenticated user",
+    response_model=List[URLListResponse],
+)
 async def get_my_urls(
+    response: Response,
     url_type: str = Query("active", description="Type of URLs to fetch: 'active' or 'expired'"),
+    limit: int = Query(
+        settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="Page size"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Value of the X-Next-Cursor header of the previous page"
+    ),
     db: AsyncSession = Depends(get_async_session),
     current_user = Depends(current_active_user)
 ):
     if url_type.lower() == "expired":
-        result = await db.execute(select(ExpiredURL).where(ExpiredURL.created_by == current_user.id))
-        urls = result.scalars().all()
+        model = ExpiredURL
     elif url_type.lower() == "active":
-        result = await db.execute(select(URL).where(URL.created_by == current_user.id))
-        urls = result.scalars().all()
+        model = URL
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid URL type specified. Use 'active' or 'expired'."
         )
 
-    urls.sort(key=lambda url: url.created_at, reverse=True)
+    stmt = select(*url_list_columns(model)).where(model.created_by == current_user.id)
+    try:
+        stmt = apply_keyset_page(stmt, model, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    result = await db.execute(stmt)
+    urls, next_cursor = split_keyset_page(result.all(), limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [create_url_list_response(url) for url in urls]
 
 
-@router.post("/shorten", response_model=URLResponse, summary="Create a custom shortened URL")
+@router.get(
+    "/my_urls/summary",
+    response_model=URLSummaryResponse,
+    summary="Dashboard summary of the authenticated user's links",
+)
+async def get_my_urls_summary(
+    limit: int = Query(
+        settings.PAGE_SIZE,
+        ge=1,
+        le=settings.MAX_PAGE_SIZE,
+        description="Page size of each section",
+    ),
+    top_n: int = Query(5, ge=1, le=100, description="Number of top and expiring links"),
+    expiring_within: int = Query(
+        60, ge=1, description="Minutes ahead that count as expiring soon"
+    ),
+    db: AsyncSession = Depends(get_async_session),
+    current_user = Depends(current_active_user)
+):
+    return await get_url_summary(
+        db, current_user.id, limit, top_n, timedelta(minutes=expiring_within)
+    )
+
+
+@router.get("/my_urls/export", summary="Download the full link history of the authenticated user")
+async def export_my_urls(
+    format: str = Query("ndjson", description="Export format: 'ndjson' or 'csv'"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    current_user = Depends(current_active_user)
+):
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid export format specified. Use 'ndjson' or 'csv'."
+        )
+    filename = f"fast-link-urls.{fmt}"
+    body = export_user_urls(current_user.id, fmt)
+    media_type = MEDIA_TYPES[fmt]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    "/shorten",
+    response_model=URLResponse,
+    dependencies=[Depends(rate_limit("create"))],
+    summary="Create a custom shortened URL",
+)
 async def create_custom_url(
         custom_data: URLCustomCreate,
+        response: Response,
+        db: AsyncSession = Depends(get_async_session),
+        current_user = Depends(current_active_user),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    async def handler():
+        if custom_data.expiration <= datetime.now(timezone.utc):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expiration time must be in the future."
+            )
+
+        new_url = await insert_url(db, {
+            "short_code": custom_data.short_code,
+            "original_url": custom_data.original_url,
+            "created_at": datetime.now(timezone.utc),
+            "expires_at": custom_data.expiration,
+            "created_by": current_user.id,
+            "fixed_expiration": custom_data.fixed_expiration,
+        }, skip_existing_code=True)
+        if not new_url:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Short code already exists. Please choose another one."
+            )
+        await db.commit()
+        return create_url_response(new_url)
+
+    return await run_idempotent(
+        idempotency_key, "shorten", current_user, custom_data, response, handler
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=URLStatsBatchResponse,
+    summary="Get statistics for many short links",
+)
+async def get_many_url_stats(
+        request: Request,
+        codes: str = Query(..., min_length=1, description="Comma-separated short codes"),
         db: AsyncSession = Depends(get_async_session),
-        current_user = Depends(current_active_user)
 ):
-    if custom_data.expiration <= datetime.now(timezone.utc):
+    short_codes = [code.strip() for code in codes.split(",") if code.strip()]
+    if not short_codes:
+        raise HTTPException(status_code=422, detail="Provide at least one short code.")
+    if len(short_codes) > settings.STATS_MAX_CODES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Expiration time must be in the future."
+            detail=f"Too many short codes in one request. The limit is {settings.STATS_MAX_CODES}."
         )
+    stats = await get_urls_stats(db, short_codes)
+    return etag_response(request, URLStatsBatchResponse(stats=stats))
+
 
-    result = await db.execute(select(URL).where(URL.short_code == custom_data.short_code))
-    if result.scalar_one_or_none():
+@router.get(
+    "/stats/top",
+    response_model=HotLinksResponse,
+    summary="Get the most clicked links of a recent time window",
+)
+async def get_top_links(
+        window: str = Query("1h", description="Time window: '5m', '1h' or '24h'"),
+        n: int = Query(10, ge=1, le=settings.HOT_LINKS_MAX_N),
+):
+    if window not in HOT_LINKS_WINDOWS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Short code already exists. Please choose another one."
+            detail="Invalid window specified. Use '5m', '1h' or '24h'."
         )
-
-    new_url = URL(
-        short_code=custom_data.short_code,
-        original_url=custom_data.original_url,
-        created_at=datetime.now(timezone.utc),
-        expires_at=custom_data.expiration,
-        created_by=current_user.id,
+    links = await get_hot_links(window, n)
+    return HotLinksResponse(
+        window=window,
+        links=[HotLink(short_code=code, hits=int(hits)) for code, hits in links],
     )
-    db.add(new_url)
-    await db.commit()
-    await db.refresh(new_url)
-    return create_url_response(new_url)
 
 
-@router.get("/search", summary="Search for short links by original URL", response_model=List[URLResponse])
+@router.get(
+    "/search",
+    response_model=List[URLResponse],
+    dependencies=[Depends(rate_limit("search"))],
+    summary="Search for short links by original URL, host or URL prefix",
+)
 async def search_url(
-        original_url: str,
-        db: AsyncSession = Depends(get_async_session)
+        response: Response,
+        original_url: Optional[str] = Query(None, description="Exact original URL"),
+        host: Optional[str] = Query(
+            None, description="Host of the original URL, e.g. 'example.com'"
+        ),
+        prefix: Optional[str] = Query(
+            None, min_length=1, description="Leading part of the original URL"
+        ),
+        include_expired: bool = Query(False, description="Also search expired links"),
+        limit: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(
+            None, description="Value of X-Next-Cursor from the previous page"
+        ),
+        db: AsyncSession = Depends(get_read_session)
 ):
-    result = await db.execute(select(URL).where(URL.original_url == original_url))
-    urls = result.scalars().all()
-    if not urls:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching URLs found.")
-    return [create_url_response(url) for url in urls]
+    if original_url is None and host is None and prefix is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Provide at least one of 'original_url', 'host' or 'prefix'."
+        )
+    try:
+        rows, next_cursor = await search_urls(
+            db, original_url, host, prefix, include_expired, cursor, limit
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No matching URLs found."
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [create_url_response(row) for row in rows]
+
+
+@router.post(
+    "/import",
+    response_model=URLImportReport,
+    dependencies=[Depends(rate_limit("create"))],
+    summary="Import custom short links from NDJSON or CSV",
+)
+async def import_urls(
+        request: Request,
+        format: Optional[str] = Query(
+            None, description="Upload format: 'ndjson' or 'csv'. Defaults to the content type."
+        ),
+        job_id: Optional[str] = Query(
+            None, description="Job id to poll progress with while the upload runs."
+        ),
+        db: AsyncSession = Depends(get_async_session),
+        current_user = Depends(current_active_user)
+):
+    content_type = request.headers.get("content-type", "")
+    fmt = (format or ("csv" if "csv" in content_type else "ndjson")).lower()
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid import format specified. Use 'ndjson' or 'csv'."
+        )
+    importer = URLImporter(
+        db,
+        current_user.id,
+        job_id=job_id,
+        on_progress=partial(store_import_progress, current_user.id),
+    )
+    return await importer.run(request.stream(), fmt)
+
+
+@router.get(
+    "/import/{job_id}",
+    response_model=URLImportReport,
+    summary="Get the progress of an import job",
+)
+async def get_import_status(
+        job_id: str,
+        current_user = Depends(current_active_user)
+):
+    report = await get_import_progress(current_user.id, job_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return report
 
 
 @router.get("/{short_code}", summary="Redirect to the original URL")
 async def get_url(
         short_code: str,
-        background_tasks: BackgroundTasks,
-        db: AsyncSession = Depends(get_async_session),
+        request: Request,
+        db: AsyncSession = Depends(get_read_session),
         no_redirect: bool = False
 ):
-    cached_original_url = await get_cache(short_code)
+    require_short_code(short_code)
+    ttl = settings.URL_EXPIRE_MINUTES * 60
+    event = click_event_fields(request)
+    try:
+        visitor = await visitor_fingerprint(request)
+        cached_original_url = await resolve_and_count(short_code, ttl, visitor, event)
+    except RedisError as e:
+        # Keep redirecting from Postgres and keep the click event in the local spool.
+        logger.warning(f"Redis unavailable, resolving {short_code} from the database: {e}")
+        url_entry = await get_active_url_or_404(db, short_code)
+        await spool_click_event(short_code, event)
+        return redirect_response(url_entry.original_url, no_redirect)
     if cached_original_url:
-        background_tasks.add_task(update_url_background, short_code)
-        if no_redirect:
-            return {"redirect_url": cached_original_url}
-        return RedirectResponse(url=cached_original_url)
+        return redirect_response(cached_original_url, no_redirect)
+
+    # The cache is filled from the primary only: a lagging replica could still
+    # return a deleted or re-pointed link, which would then be cached for hours.
+    async with async_session_maker() as primary:
+        url_entry = await get_active_url_or_404(primary, short_code)
+    await store_short_code(short_code, url_entry.original_url)
+    if url_entry.fixed_expiration:
+        await mark_fixed_expiration(short_code)
+    await resolve_and_count(short_code, ttl, visitor, event)
+    return redirect_response(url_entry.original_url, no_redirect)
+
 
-    url_entry = await get_url_by_shortcode(db, short_code)
+def require_short_code(short_code: str) -> None:
+    """404 for path segments that cannot be short codes, before any Redis key is touched."""
+    if not is_short_code(short_code):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+
+
+async def get_active_url_or_404(db: AsyncSession, short_code: str) -> Link:
+    url_entry = await get_link(db, short_code)
+    if not url_entry and db.info.get("replica"):
+        # The link may be newer than the replica's last replayed transaction.
+        async with async_session_maker() as primary:
+            url_entry = await get_link(primary, short_code)
     if not url_entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
     if url_entry.expires_at and datetime.now(timezone.utc) > url_entry.expires_at:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL expired")
+    return url_entry
 
-    await store_short_code(short_code, url_entry.original_url)
-    background_tasks.add_task(update_url_background, short_code)
+
+def redirect_response(original_url: str, no_redirect: bool):
     if no_redirect:
-        return {"redirect_url": url_entry.original_url}
-    return RedirectResponse(url=url_entry.original_url)
+        return {"redirect_url": original_url}
+    return RedirectResponse(url=original_url)
 
 
-@router.delete("/{short_code}", summary="Move a short link to expired history for the current user")
+@router.delete(
+    "/{short_code}",
+    summary="Move a short link to expired history for the current user",
+)
 async def delete_url(
         url_entry: URL = Depends(get_user_owned_url),
         db: AsyncSession = Depends(get_async_session)
 ):
+    pending_hits, last_used_at = await take_pending_clicks(url_entry.short_code)
     expired_url = ExpiredURL(
         id=url_entry.id,
         short_code=url_entry.short_code,
@@ -163,8 +517,8 @@ async def delete_url(
         created_at=url_entry.created_at,
         expires_at=url_entry.expires_at,
         created_by=url_entry.created_by,
-        hit_count=url_entry.hit_count,
-        last_used_at=url_entry.last_used_at,
+        hit_count=url_entry.hit_count + pending_hits,
+        last_used_at=last_used_at or url_entry.last_used_at,
         fixed_expiration=url_entry.fixed_expiration,
         moved_at=datetime.now(timezone.utc)
     )
@@ -176,7 +530,11 @@ async def delete_url(
     await db.commit()
     return {"detail": "URL moved to expired history successfully"}
 
-@router.put("/{short_code}", response_model=URLResponse, summary="Update short link for the current user")
+@router.put(
+    "/{short_code}",
+    response_model=URLResponse,
+    summary="Update short link for the current user",
+)
 async def update_url(
     update_data: URLUpdateRequest,
     url_entry: URL = Depends(get_user_owned_url),
@@ -184,35 +542,157 @@ async def update_url(
 ):
     new_original_url = update_data.original_url or url_entry.original_url
     old_short_code = url_entry.short_code
+    values = {"original_url": new_original_url}
 
     if update_data.regenerate:
         new_short_code = await generate_unique_short_code(new_original_url)
-        url_entry.short_code = new_short_code
+        values["short_code"] = new_short_code
         await delete_cache(old_short_code)
+        pending_hits, last_used_at = await take_pending_clicks(old_short_code)
+        if pending_hits:
+            values["hit_count"] = URL.hit_count + pending_hits
+            values["last_used_at"] = last_used_at
         await store_short_code(new_short_code, new_original_url)
+        if url_entry.fixed_expiration:
+            await mark_fixed_expiration(new_short_code)
     else:
         await store_short_code(old_short_code, new_original_url)
+        await drop_cached_stats(old_short_code)
 
-    url_entry.original_url = new_original_url
-
+    updated_url = await update_url_fields(db, url_entry.id, values)
     await db.commit()
-    await db.refresh(url_entry)
-    return create_url_response(url_entry)
+    return create_url_response(updated_url)
 
 
-@router.get("/{short_code}/stats", summary="Get statistics for a short link")
+@router.get(
+    "/{short_code}/stats",
+    response_model=URLStats,
+    summary="Get statistics for a short link",
+)
 async def get_url_stats(
         short_code: str,
+        request: Request,
         db: AsyncSession = Depends(get_async_session),
 ):
-    url_entry = await get_url_by_shortcode(db, short_code)
-    if not url_entry:
+    require_short_code(short_code)
+    stats = (await get_urls_stats(db, [short_code]))[short_code]
+    if stats is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+    breakdowns = await get_link_breakdowns(db, short_code)
+    # Left null until the link has recorded clicks.
+    stats = stats.model_copy(update={
+        "top_referrers": breakdowns["referrer"] or None,
+        "top_browsers": breakdowns["browser"] or None,
+    })
+    return etag_response(request, stats)
 
-    stats = {
-        "original_url": url_entry.original_url,
-        "created_at": url_entry.created_at,
-        "hit_count": url_entry.hit_count,
-        "last_used_at": url_entry.last_used_at
-    }
-    return stats
\ No newline at end of file
+
+@router.get(
+    "/{short_code}/stats/stream",
+    summary="Stream live hit counts of a short link as Server-Sent Events",
+)
+async def stream_url_stats(short_code: str, request: Request):
+    require_short_code(short_code)
+    # The session is closed before streaming starts, so open streams hold no
+    # database connection.
+    session_gen = get_async_session()
+    db = await session_gen.__anext__()
+    try:
+        stats = (await get_urls_stats(db, [short_code]))[short_code]
+    finally:
+        await db.close()
+    if stats is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+    return StreamingResponse(
+        live_hit_events(short_code, stats.hit_count, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/{short_code}/stats/timeseries",
+    response_model=ClickTimeseries,
+    summary="Get clicks per time bucket for a short link",
+)
+async def get_url_timeseries(
+        short_code: str,
+        granularity: str = Query("hour", description="Bucket size: 'minute', 'hour' or 'day'"),
+        start: Optional[datetime] = Query(
+            None, alias="from", description="Start of the range (ISO format)"
+        ),
+        end: Optional[datetime] = Query(
+            None, alias="to", description="End of the range (ISO format), defaults to now"
+        ),
+        db: AsyncSession = Depends(get_read_session),
+):
+    require_short_code(short_code)
+    if granularity not in GRANULARITY_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid granularity specified. Use 'minute', 'hour' or 'day'."
+        )
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(seconds=DEFAULT_SPANS[granularity])
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'."
+        )
+    if len(bucket_starts(granularity, start, end)) > settings.TIMESERIES_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Range too large for this granularity. "
+                f"The limit is {settings.TIMESERIES_MAX_POINTS} buckets."
+            )
+        )
+    if not await get_cache(short_code) and not await get_link(db, short_code):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+    return await get_click_timeseries(short_code, granularity, start, end)
+
+
+@router.get(
+    "/{short_code}/stats/visitors",
+    response_model=UniqueVisitors,
+    summary="Get approximate unique visitors of a short link",
+)
+async def get_url_unique_visitors(
+        short_code: str,
+        start: Optional[date] = Query(
+            None, alias="from", description="First UTC day (YYYY-MM-DD), defaults to 'to'"
+        ),
+        end: Optional[date] = Query(
+            None, alias="to", description="Last UTC day (YYYY-MM-DD), defaults to today"
+        ),
+        db: AsyncSession = Depends(get_read_session),
+):
+    require_short_code(short_code)
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'."
+        )
+    if (end - start).days >= settings.UNIQUE_VISITORS_RETENTION_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Range too large. "
+                f"Visitors are kept for {settings.UNIQUE_VISITORS_RETENTION_DAYS} days."
+            )
+        )
+    if not await get_cache(short_code) and not await get_link(db, short_code):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+    return UniqueVisitors(
+        short_code=short_code,
+        start=start,
+        end=end,
+        unique_visitors=await count_unique_visitors(short_code, start, end),
+        standard_error=UNIQUE_VISITORS_ERROR,
+    )
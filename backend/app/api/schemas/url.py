@@ -1,8 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime
 import re
 from pydantic import BaseModel, field_validator, Field
 from typing import Optional
 
+# Generated and custom short codes are letters and digits only. Anything else
+# could name an internal Redis key, so it is never looked up.
+SHORT_CODE_PATTERN = re.compile(r"[A-Za-z0-9]+")
 
 class URLCreate(BaseModel):
     original_url: str
@@ -36,7 +39,7 @@ class URLCustomCreate(BaseModel):
 
     @field_validator("short_code")
     def validate_short_code(cls, value):
-        if not re.match("^[A-Za-z0-9]+$", value):
+        if not SHORT_CODE_PATTERN.fullmatch(value):
             raise ValueError("short_code must contain only letters and numbers")
         return value
 
@@ -49,3 +52,94 @@ class URLListResponse(URLResponse):
     last_used_at: Optional[datetime] = None
     fixed_expiration: bool
     moved_at: Optional[datetime] = None
+
+class URLBatchCreate(BaseModel):
+    urls: list[URLCreate] = Field(..., min_length=1)
+
+class URLBatchItemResult(BaseModel):
+    index: int
+    url: URLResponse | None = None
+    error: str | None = None
+
+class URLBatchResponse(BaseModel):
+    results: list[URLBatchItemResult]
+
+class URLResolveRequest(BaseModel):
+    codes: list[str] = Field(..., min_length=1)
+    count_clicks: bool = True
+
+class URLResolveResponse(BaseModel):
+    urls: dict[str, str | None]
+
+class BreakdownItem(BaseModel):
+    value: str
+    count: int
+
+class URLStats(BaseModel):
+    original_url: str
+    created_at: datetime
+    hit_count: int
+    last_used_at: Optional[datetime] = None
+    top_referrers: Optional[list[BreakdownItem]] = None
+    top_browsers: Optional[list[BreakdownItem]] = None
+
+class URLStatsBatchResponse(BaseModel):
+    stats: dict[str, URLStats | None]
+
+class ClickTimeseriesPoint(BaseModel):
+    start: datetime
+    hits: int
+
+class ClickTimeseries(BaseModel):
+    short_code: str
+    granularity: str
+    points: list[ClickTimeseriesPoint]
+
+class UniqueVisitors(BaseModel):
+    short_code: str
+    start: date
+    end: date
+    unique_visitors: int
+    standard_error: float
+
+class HotLink(BaseModel):
+    short_code: str
+    hits: int
+
+class HotLinksResponse(BaseModel):
+    window: str
+    links: list[HotLink]
+
+class URLImportError(BaseModel):
+    line: int
+    short_code: str | None = None
+    error: str
+
+class URLImportReport(BaseModel):
+    job_id: str
+    status: str
+    rows_read: int = 0
+    imported: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+    errors: list[URLImportError] = []
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+
+class URLSummarySection(BaseModel):
+    items: list[URLListResponse]
+    next_cursor: str | None = None
+
+class URLSummaryTotals(BaseModel):
+    active_count: int
+    expired_count: int
+    active_hits: int
+    expired_hits: int
+    expiring_soon_count: int
+
+class URLSummaryResponse(BaseModel):
+    active: URLSummarySection
+    expired: URLSummarySection
+    totals: URLSummaryTotals
+    top_links: list[URLListResponse]
+    expiring_soon: list[URLListResponse]
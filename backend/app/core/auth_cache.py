@@ -0,0 +1,89 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from backend.app.core.config import settings
+from backend.app.models.user import User
+
+
+class TTLCache:
+    """Process-local LRU cache whose entries expire after a per-entry deadline."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl: float) -> None:
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+# sha256 of a token -> (user id, exp claim); decoding does not depend on the user.
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES)
+# user id -> column values of the user row.
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES)
+# API key hash -> user id of active keys, in front of the Redis cache.
+api_key_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_claims(token: str) -> Optional[tuple[str, Optional[float]]]:
+    claims = token_cache.get(token_hash(token))
+    if claims is None:
+        return None
+    user_id, exp = claims
+    if exp is not None and exp <= time.time():
+        token_cache.pop(token_hash(token))
+        return None
+    return claims
+
+
+def cache_claims(token: str, user_id: str, exp: Optional[float]) -> None:
+    ttl = settings.AUTH_CACHE_TTL
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        token_cache.put(token_hash(token), (user_id, exp), ttl)
+
+
+def get_cached_user(user_id) -> Optional[User]:
+    """
+    A fresh detached User built from the cached row, so requests never share an
+    instance and a session can still attach it for an update.
+    """
+    snapshot = user_cache.get(str(user_id))
+    if snapshot is None:
+        return None
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def cache_user(user: User) -> None:
+    snapshot = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+    user_cache.put(str(user.id), snapshot, settings.AUTH_CACHE_TTL)
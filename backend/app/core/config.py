@@ -35,6 +35,99 @@ class Settings(BaseSettings):
     URL_EXPIRE_MINUTES: int
     APP_URL: str
     EXPIRATION_CHECK_INTERVAL: int
+    CLICK_SYNC_INTERVAL: int = 10
+    URL_BATCH_MAX_ITEMS: int = 1000
+    RESOLVE_MAX_CODES: int = 1000
+    STATS_MAX_CODES: int = 100
+    STATS_CACHE_TTL: int = 300
+
+    # Click time series buckets (retention in seconds)
+    TIMESERIES_COMPACT_INTERVAL: int = 60
+    TIMESERIES_MINUTE_RETENTION: int = 24 * 60 * 60
+    TIMESERIES_HOUR_RETENTION: int = 30 * 24 * 60 * 60
+    TIMESERIES_DAY_RETENTION: int = 365 * 24 * 60 * 60
+    TIMESERIES_MAX_POINTS: int = 1500
+
+    # Unique visitors (per-link, per-day HyperLogLogs)
+    UNIQUE_VISITORS_RETENTION_DAYS: int = 90
+
+    # Hot links leaderboards
+    HOT_LINKS_ROTATE_INTERVAL: int = 60
+    HOT_LINKS_PIN_COUNT: int = 100
+    HOT_LINKS_MAX_N: int = 100
+
+    # Click event stream and its ingestion into click_events. The stream is
+    # never trimmed, a backlog above CLICK_EVENTS_BACKLOG_ALERT is logged as an error.
+    CLICK_EVENTS_BACKLOG_ALERT: int = 1_000_000
+    CLICK_EVENTS_BATCH_SIZE: int = 5000
+    CLICK_EVENTS_BLOCK_MS: int = 1000
+    CLICK_EVENTS_SPOOL_DIR: str = "/tmp/fast-link/click-spool"
+
+    # Referrer and browser breakdowns (Count-Min Sketch + top-k per link)
+    SKETCH_WIDTH: int = 256
+    SKETCH_DEPTH: int = 4
+    SKETCH_TOP_K: int = 10
+    BREAKDOWN_SNAPSHOT_INTERVAL: int = 300
+    BREAKDOWN_MAX_ROWS: int = 50
+
+    # Live hit counts over Server-Sent Events
+    LIVE_HITS_INTERVAL: float = 1.0
+    LIVE_HITS_KEEPALIVE: float = 15.0
+
+    # Process-local cache of decoded tokens and authenticated users
+    AUTH_CACHE_TTL: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # API keys
+    API_KEYS_MAX_PER_USER: int = 20
+    API_KEY_CACHE_TTL: int = 300
+    # Unknown keys are remembered only in a small per-process cache.
+    API_KEY_UNKNOWN_CACHE_TTL: int = 5
+    API_KEY_UNKNOWN_CACHE_MAX_ENTRIES: int = 1000
+
+    # Token bucket rate limits per user or client IP, as "<requests>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CREATE: str = "60/minute"
+    RATE_LIMIT_SEARCH: str = "120/minute"
+    RATE_LIMIT_AUTH: str = "20/minute"
+    RATE_LIMIT_MAX_LEASES: int = 10000
+
+    # Database engine
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_SLOW_QUERY_MS: float = 500.0
+
+    # Read replicas: comma-separated postgresql+asyncpg:// URLs, empty for none
+    POSTGRES_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL: int = 5
+
+    # Adaptive concurrency limit per worker; reads and writes may use a share of it
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHEDDING_INITIAL_LIMIT: int = 200
+    LOAD_SHEDDING_MIN_LIMIT: int = 20
+    LOAD_SHEDDING_MAX_LIMIT: int = 2000
+    LOAD_SHEDDING_READ_SHARE: float = 0.8
+    LOAD_SHEDDING_WRITE_SHARE: float = 0.5
+
+    # Password hashing pool (0 workers hashes on the event loop). One core is
+    # left to the event loop, hashing threads would otherwise starve it.
+    PASSWORD_HASH_WORKERS: int = max(1, min(4, (os.cpu_count() or 1) - 1))
+    PASSWORD_HASH_MAX_WAIT: float = 10.0
+    PASSWORD_HASH_WAIT_WARNING: float = 0.5
+    URL_IMPORT_CHUNK_SIZE: int = 5000
+    PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+
+    # Idempotency-Key handling for create endpoints
+    IDEMPOTENCY_TTL: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 30
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
 
 
 settings = Settings()
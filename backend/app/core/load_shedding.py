@@ -0,0 +1,167 @@
+import math
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+
+PRIORITY_REDIRECT = "redirect"
+PRIORITY_READ = "read"
+PRIORITY_WRITE = "write"
+PRIORITIES = (PRIORITY_REDIRECT, PRIORITY_READ, PRIORITY_WRITE)
+READ_METHODS = ("GET", "HEAD")
+# GET paths that cost a search rather than a read.
+SEARCH_PATHS = ("/search", "/my_urls/export")
+
+# Weights of the short and long term latency averages.
+SHORT_SMOOTHING = 0.2
+LONG_SMOOTHING = 0.01
+# Short term latency may reach this multiple of the long term one before the
+# limit is reduced.
+LATENCY_TOLERANCE = 2.0
+# Share of a new limit estimate applied per sample.
+LIMIT_SMOOTHING = 0.2
+
+# Set by the middleware while a redirect or read request is served. Statements
+# of background tasks and of write class requests (writes, searches, imports,
+# exports) leave it unset, so batch work does not shed interactive traffic.
+observe_db_latency: ContextVar[bool] = ContextVar("observe_db_latency", default=False)
+
+
+class LatencySignal:
+    """Short and long term averages of one latency source (DB queries, Redis calls)."""
+
+    def __init__(self):
+        self.short: Optional[float] = None
+        self.long: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        if self.short is None:
+            self.short = self.long = seconds
+            return
+        self.short += SHORT_SMOOTHING * (seconds - self.short)
+        self.long += LONG_SMOOTHING * (seconds - self.long)
+        # Under sustained overload the baseline would drift up to the degraded
+        # latency; keep it within reach of the short term value instead.
+        if self.long > self.short * LATENCY_TOLERANCE:
+            self.long = self.short * LATENCY_TOLERANCE
+
+    def gradient(self) -> float:
+        """1.0 while latency is at its baseline, down to 0.5 as it degrades."""
+        if not self.short:
+            return 1.0
+        return max(0.5, min(1.0, LATENCY_TOLERANCE * self.long / self.short))
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit of one worker, adapted to latency in the style of a
+    gradient limiter: the limit shrinks in proportion to how far short term
+    latency exceeds its baseline, and grows by about sqrt(limit) per sample
+    while latency is healthy and the limit is actually used.
+
+    Priority classes share the limit: redirects may use all of it, reads
+    LOAD_SHEDDING_READ_SHARE and writes and searches LOAD_SHEDDING_WRITE_SHARE,
+    so lower classes are shed first.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inflight = 0
+        self.signals = {"db": LatencySignal(), "redis": LatencySignal()}
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        self.rejected = dict.fromkeys(PRIORITIES, 0)
+
+    def capacity(self, priority: str) -> int:
+        share = {
+            PRIORITY_REDIRECT: 1.0,
+            PRIORITY_READ: settings.LOAD_SHEDDING_READ_SHARE,
+            PRIORITY_WRITE: settings.LOAD_SHEDDING_WRITE_SHARE,
+        }[priority]
+        return max(1, int(self.limit * share))
+
+    def try_acquire(self, priority: str) -> bool:
+        if self.inflight >= self.capacity(priority):
+            self.rejected[priority] += 1
+            return False
+        self.inflight += 1
+        self.admitted[priority] += 1
+        return True
+
+    def release(self) -> None:
+        self.inflight -= 1
+
+    def observe(self, signal: str, seconds: float) -> None:
+        self.signals[signal].observe(seconds)
+        gradient = min(s.gradient() for s in self.signals.values())
+        estimate = self.limit * gradient + math.sqrt(self.limit)
+        if estimate > self.limit and self.inflight < self.limit / 2:
+            # Latency is fine but the limit is not the bottleneck, do not grow it.
+            return
+        limit = self.limit + LIMIT_SMOOTHING * (estimate - self.limit)
+        self.limit = max(self.minimum, min(self.maximum, limit))
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 1),
+            "inflight": self.inflight,
+            "capacity": {priority: self.capacity(priority) for priority in PRIORITIES},
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "latency_ms": {
+                name: {
+                    "short": round(s.short * 1000, 2) if s.short is not None else None,
+                    "long": round(s.long * 1000, 2) if s.long is not None else None,
+                }
+                for name, s in self.signals.items()
+            },
+        }
+
+
+limiter = AdaptiveLimiter(
+    settings.LOAD_SHEDDING_INITIAL_LIMIT,
+    settings.LOAD_SHEDDING_MIN_LIMIT,
+    settings.LOAD_SHEDDING_MAX_LIMIT,
+)
+
+
+# Paths without parameters served by the app; any other single-segment GET is a redirect.
+fixed_paths: set[str] = set()
+
+
+def register_fixed_paths(routes) -> None:
+    fixed_paths.update(route.path for route in routes if "{" not in getattr(route, "path", "{"))
+
+
+def request_priority(request: Request) -> str:
+    """Single-segment GETs that are no fixed route are redirects."""
+    path = request.url.path
+    if request.method not in READ_METHODS or path in SEARCH_PATHS:
+        return PRIORITY_WRITE
+    if path.count("/") == 1 and path not in fixed_paths:
+        return PRIORITY_REDIRECT
+    return PRIORITY_READ
+
+
+async def load_shedding(request: Request, call_next):
+    if not settings.LOAD_SHEDDING_ENABLED:
+        return await call_next(request)
+    priority = request_priority(request)
+    if not limiter.try_acquire(priority):
+        logger.warning(f"Shedding {priority} request {request.method} {request.url.path} (limit {limiter.limit:.1f})")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Server is overloaded, try again later."},
+            headers={"Retry-After": "1"},
+        )
+    token = observe_db_latency.set(priority != PRIORITY_WRITE)
+    try:
+        return await call_next(request)
+    finally:
+        observe_db_latency.reset(token)
+        limiter.release()
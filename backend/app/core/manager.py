@@ -1,18 +1,53 @@
 import uuid
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import exceptions, schemas
 from fastapi_users.db import SQLAlchemyUserDatabase
 from fastapi_users.manager import BaseUserManager, UUIDIDMixin
 
 from backend.app.core.config import settings
 from backend.app.core.logging_config import logger
+from backend.app.core.passwords import PooledPasswordHelper
 from backend.app.db.session import get_user_db
 from backend.app.models.user import User
+from backend.app.services.auth_invalidation import broadcast_invalidation
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = settings.SECRET_KEY
     verification_token_secret = settings.SECRET_KEY
+    password_helper: PooledPasswordHelper
+
+    async def create(
+        self, user_create: schemas.UC, safe: bool = False, request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+        await self.password_helper.prepare_hash(user_create.password)
+        return await super().create(user_create, safe, request)
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        if update_dict.get("password") is not None:
+            await self.password_helper.prepare_hash(update_dict["password"])
+        return await super()._update(user, update_dict)
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        """Same as BaseUserManager.authenticate, with hashing done in the password pool."""
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Run the hasher anyway to mitigate timing attacks.
+            await self.password_helper.prepare_hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await self.password_helper.verify_and_update_async(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         logger.info(f"User {user.id} has registered.")
@@ -27,5 +62,19 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     ):
         logger.info(f"Verification requested for user {user.id}. Verification token: {token}")
 
+    async def on_after_update(
+        self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ):
+        await broadcast_invalidation("user", user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        await broadcast_invalidation("user", user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        await broadcast_invalidation("user", user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        await broadcast_invalidation("user", user.id)
+
 async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db)):
-    yield UserManager(user_db)
+    yield UserManager(user_db, PooledPasswordHelper())
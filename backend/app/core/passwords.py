@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.db.metrics import LatencyStats
+
+T = TypeVar("T")
+
+password_hash = PasswordHash((Argon2Hasher(), BcryptHasher()))
+
+# Argon2 and bcrypt release the GIL while hashing, so threads run in parallel
+# with the event loop. PASSWORD_HASH_WORKERS = 0 hashes inline on the loop.
+password_executor: Optional[ThreadPoolExecutor] = (
+    ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    if settings.PASSWORD_HASH_WORKERS > 0 else None
+)
+password_slots = asyncio.Semaphore(max(settings.PASSWORD_HASH_WORKERS, 1))
+
+# Time password operations spent waiting for a free worker.
+password_wait_stats = LatencyStats()
+
+
+def password_pool_status() -> dict:
+    return {"workers": settings.PASSWORD_HASH_WORKERS, "wait": password_wait_stats.snapshot()}
+
+
+def record_wait(wait: float) -> None:
+    password_wait_stats.record(wait)
+    if wait > settings.PASSWORD_HASH_WAIT_WARNING:
+        logger.warning(f"Password hashing waited {wait:.3f} seconds for a worker")
+
+
+async def run_password_task(func: Callable[..., T], *args) -> T:
+    """
+    Run a hashing or verification call in the password pool. At most
+    PASSWORD_HASH_WORKERS calls run at once; a call that cannot get a worker
+    within PASSWORD_HASH_MAX_WAIT seconds is rejected with a 503.
+    """
+    if password_executor is None:
+        return func(*args)
+    queued_at = time.monotonic()
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=settings.PASSWORD_HASH_MAX_WAIT)
+    except asyncio.TimeoutError:
+        record_wait(time.monotonic() - queued_at)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, try again later.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        record_wait(time.monotonic() - queued_at)
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        password_slots.release()
+
+
+class PooledPasswordHelper(PasswordHelper):
+    """
+    Password helper for one UserManager. BaseUserManager calls hash() inline,
+    so the manager computes hashes in the pool first with prepare_hash() and
+    hash() hands out the prepared result.
+    """
+
+    def __init__(self):
+        super().__init__(password_hash)
+        self.prepared: dict[str, str] = {}
+
+    async def prepare_hash(self, password: str) -> None:
+        self.prepared[password] = await run_password_task(self.password_hash.hash, password)
+
+    def hash(self, password: str) -> str:
+        prepared = self.prepared.pop(password, None)
+        return prepared if prepared is not None else super().hash(password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await run_password_task(self.password_hash.verify_and_update, plain_password, hashed_password)
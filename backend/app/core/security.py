@@ -1,25 +1,86 @@
 import uuid
-from fastapi_users import FastAPIUsers, models
+from typing import Optional
+
+import jwt
+from fastapi import HTTPException, Response, status
+from fastapi.security import APIKeyHeader
+from fastapi_users import BaseUserManager, FastAPIUsers, exceptions, models
 from fastapi_users.authentication import (
     AuthenticationBackend,
     BearerTransport,
     JWTStrategy,
+    Strategy,
 )
+from fastapi_users.authentication.strategy import StrategyDestroyNotSupportedError
+from fastapi_users.authentication.transport import TransportLogoutNotSupportedError
+from fastapi_users.jwt import decode_jwt
+from fastapi_users.openapi import OpenAPIResponseType
 
 from backend.app.models.user import User
+from backend.app.core.auth_cache import cache_claims, cache_user, get_cached_claims, get_cached_user
 from backend.app.core.config import settings
 from backend.app.core.manager import get_user_manager
+from backend.app.services.api_keys import resolve_api_key
+
+
+async def load_user(user_id: str, user_manager: BaseUserManager[models.UP, models.ID]) -> Optional[models.UP]:
+    """The user of a verified credential, from the user cache or the database."""
+    user = get_cached_user(user_id)
+    if user is not None:
+        return user
+    try:
+        user = await user_manager.get(user_manager.parse_id(user_id))
+    except (exceptions.UserNotExists, exceptions.InvalidID):
+        return None
+    cache_user(user)
+    return user
+
+
+class CachedJWTStrategy(JWTStrategy[models.UP, models.ID]):
+    """
+    JWT strategy that keeps decoded tokens and user rows in process-local caches
+    for AUTH_CACHE_TTL seconds, so an authenticated request usually costs no
+    signature check and no user query. User updates and deletes drop the cached
+    row (see UserManager).
+    """
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+        user_id = self.read_subject(token)
+        if user_id is None:
+            return None
+        return await load_user(user_id, user_manager)
 
+    def read_subject(self, token: str) -> Optional[str]:
+        """User id of a valid token, without loading the user."""
+        claims = get_cached_claims(token)
+        if claims is None:
+            try:
+                data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            except jwt.PyJWTError:
+                return None
+            if data.get("sub") is None:
+                return None
+            claims = (data["sub"], data.get("exp"))
+            cache_claims(token, *claims)
+        return claims[0]
+
+
+jwt_strategy = CachedJWTStrategy(
+    secret=settings.SECRET_KEY,
+    lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
 
 def get_jwt_strategy() -> JWTStrategy[models.UP, models.ID]:
     """
-    Return a JWT strategy for creating and verifying tokens.
+    Return the JWT strategy for creating and verifying tokens. It is stateless
+    apart from its caches, so one instance is shared by all requests.
     """
-    return JWTStrategy(
-        secret=settings.SECRET_KEY,
-        lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-    )
+    return jwt_strategy
 
 # Define the token transport using Bearer scheme.
 bearer_transport = BearerTransport(tokenUrl="/auth/jwt/login")
@@ -31,10 +92,65 @@ auth_backend = AuthenticationBackend(
     get_strategy=get_jwt_strategy,
 )
 
+
+
+def api_key_login_not_supported() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+        detail="API keys are not issued by a login, create them with POST /users/me/api-keys.",
+    )
+
+
+class APIKeyTransport:
+    """Reads an API key from the X-API-Key header. Keys are issued by the API key routes, not by a login."""
+    scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+    async def get_login_response(self, token: str) -> Response:
+        raise api_key_login_not_supported()
+
+    async def get_logout_response(self) -> Response:
+        raise TransportLogoutNotSupportedError()
+
+    @staticmethod
+    def get_openapi_login_responses_success() -> OpenAPIResponseType:
+        return {}
+
+    @staticmethod
+    def get_openapi_logout_responses_success() -> OpenAPIResponseType:
+        return {}
+
+
+class APIKeyStrategy(Strategy[models.UP, models.ID]):
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> Optional[models.UP]:
+        if token is None:
+            return None
+        user_id = await resolve_api_key(user_manager.user_db.session, token)
+        if user_id is None:
+            return None
+        return await load_user(user_id, user_manager)
+
+    async def write_token(self, user: models.UP) -> str:
+        raise api_key_login_not_supported()
+
+    async def destroy_token(self, token: str, user: models.UP) -> None:
+        raise StrategyDestroyNotSupportedError()
+
+
+api_key_strategy = APIKeyStrategy()
+
+api_key_backend = AuthenticationBackend(
+    name="api_key",
+    transport=APIKeyTransport(),
+    get_strategy=lambda: api_key_strategy,
+)
+
 fastapi_users = FastAPIUsers[User, uuid.UUID](
     get_user_manager,
-    [auth_backend],
+    [auth_backend, api_key_backend],
 )
 
 current_active_user = fastapi_users.current_user(active=True)
 current_optional_active_user = fastapi_users.current_user(active=True, optional=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
@@ -0,0 +1,111 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.app.core.config import settings
+from backend.app.core.load_shedding import limiter, observe_db_latency
+from backend.app.core.logging_config import logger
+
+
+class LatencyStats:
+    """Count, total and maximum of a latency, in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+checkout_wait = LatencyStats()
+statement_latency = LatencyStats()
+pool_timeouts = 0
+slow_statements = 0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long a checkout waited for a connection. Timed
+    around the public connect(), which every engine checkout goes through, so the
+    wait includes opening an overflow connection and the pre-ping, if enabled.
+    """
+
+    def connect(self):
+        global pool_timeouts
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_timeouts += 1
+            raise
+        finally:
+            checkout_wait.record(time.perf_counter() - start)
+        return connection
+
+
+def record_statement(statement: str, seconds: float) -> None:
+    global slow_statements
+    statement_latency.record(seconds)
+    if observe_db_latency.get():
+        limiter.observe("db", seconds)
+    if seconds * 1000 > settings.DB_SLOW_QUERY_MS:
+        slow_statements += 1
+        logger.warning(f"Slow statement ({seconds * 1000:.1f} ms): {statement[:200]}")
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement of the engine; the timings also drive load shedding."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_statement(statement, time.perf_counter() - context.query_start)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
+def db_metrics(engine: AsyncEngine, replicas: list = ()) -> dict:
+    """Pool state per engine; waits, timeouts and statement latency across all engines."""
+    return {
+        "pool": {
+            **pool_status(engine),
+            "timeouts": pool_timeouts,
+            "checkout_wait": checkout_wait.snapshot(),
+        },
+        "replicas": [
+            {
+                "host": replica.engine.url.host,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag,
+                "pool": pool_status(replica.engine),
+            }
+            for replica in replicas
+        ],
+        "statements": {**statement_latency.snapshot(), "slow": slow_statements},
+    }
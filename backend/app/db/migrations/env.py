@@ -9,7 +9,7 @@ from backend.app.core.config import settings
 
 # Import the Base from our project and ensure models are registered
 from backend.app.db.base_class import Base
-from backend.app.models import url, user
+from backend.app.models import url, user, click_event, link_breakdown, api_key
 
 
 # this is the Alembic Config object, which provides
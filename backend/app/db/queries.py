@@ -0,0 +1,106 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.db.metrics import record_statement
+
+# Hand-written SQL for the hottest statements, run directly on the asyncpg
+# connection of a session. asyncpg prepares each statement once per pooled
+# connection (its statement cache, sized by DB_STATEMENT_CACHE_SIZE) and rows
+# come back as tuples or __slots__ records, skipping ORM compilation and
+# hydration. Everything else keeps using the ORM.
+
+GET_LINK_SQL = """
+    SELECT short_code, original_url, expires_at, fixed_expiration
+    FROM urls
+    WHERE short_code = $1
+"""
+
+# One statement for a whole batch of drained counters. Fixed links keep their
+# expiration, all others slide it from the time of their last click.
+UPDATE_CLICKS_SQL = """
+    UPDATE urls AS u
+    SET hit_count = u.hit_count + c.hits,
+        last_used_at = c.last_used_at,
+        expires_at = CASE WHEN u.fixed_expiration THEN u.expires_at ELSE c.expires_at END
+    FROM unnest($1::varchar[], $2::int[], $3::timestamptz[], $4::timestamptz[])
+        AS c(short_code, hits, last_used_at, expires_at)
+    WHERE u.short_code = c.short_code
+"""
+
+MOVE_EXPIRED_SQL = """
+    WITH moved AS (
+        DELETE FROM urls
+        WHERE expires_at IS NOT NULL AND expires_at < $1
+        RETURNING id, short_code, original_url, created_at, expires_at, hit_count,
+                  created_by, last_used_at, fixed_expiration
+    )
+    INSERT INTO expired_urls (id, short_code, original_url, created_at, expires_at, hit_count,
+                              moved_at, created_by, last_used_at, fixed_expiration)
+    SELECT id, short_code, original_url, created_at, expires_at, hit_count,
+           $1, created_by, last_used_at, fixed_expiration
+    FROM moved
+    RETURNING short_code
+"""
+
+# Clicks still pending in Redis when a sweep moved their links, matched to the
+# rows of that sweep by its moved_at.
+ADD_EXPIRED_CLICKS_SQL = """
+    UPDATE expired_urls AS e
+    SET hit_count = e.hit_count + c.hits,
+        last_used_at = c.last_used_at
+    FROM unnest($2::varchar[], $3::int[], $4::timestamptz[]) AS c(short_code, hits, last_used_at)
+    WHERE e.short_code = c.short_code AND e.moved_at = $1
+"""
+
+
+class Link:
+    """What a redirect needs to know about an active link."""
+    __slots__ = ("short_code", "original_url", "expires_at", "fixed_expiration")
+
+    def __init__(self, short_code: str, original_url: str, expires_at: Optional[datetime], fixed_expiration: bool):
+        self.short_code = short_code
+        self.original_url = original_url
+        self.expires_at = expires_at
+        self.fixed_expiration = fixed_expiration
+
+
+async def driver_connection(db: AsyncSession):
+    """The asyncpg connection behind the session, inside its transaction."""
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+async def run(db: AsyncSession, method: str, sql: str, *args):
+    """Call fetchrow/fetch/execute on the session's connection, timed like ORM statements."""
+    connection = await driver_connection(db)
+    start = time.perf_counter()
+    result = await getattr(connection, method)(sql, *args)
+    record_statement(sql, time.perf_counter() - start)
+    return result
+
+
+async def get_link(db: AsyncSession, short_code: str) -> Optional[Link]:
+    row = await run(db, "fetchrow", GET_LINK_SQL, short_code)
+    return Link(*row) if row is not None else None
+
+
+async def update_click_counts(db: AsyncSession, counts: list[tuple[str, int, datetime, datetime]]) -> None:
+    """Apply (short_code, hits, last_used_at, expires_at) counters in one round trip."""
+    codes, hits, last_used, expires = zip(*counts)
+    await run(db, "execute", UPDATE_CLICKS_SQL, list(codes), list(hits), list(last_used), list(expires))
+
+
+async def move_expired(db: AsyncSession, now: datetime) -> list[str]:
+    """Move links expired before now to expired_urls in one statement; returns their codes."""
+    rows = await run(db, "fetch", MOVE_EXPIRED_SQL, now)
+    return [row[0] for row in rows]
+
+
+async def add_expired_clicks(db: AsyncSession, moved_at: datetime, counts: list[tuple[str, int, datetime]]) -> None:
+    """Add (short_code, hits, last_used_at) to the links a sweep moved at moved_at."""
+    codes, hits, last_used = zip(*counts)
+    await run(db, "execute", ADD_EXPIRED_CLICKS_SQL, moved_at, list(codes), list(hits), list(last_used))
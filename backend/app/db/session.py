@@ -1,8 +1,12 @@
-from typing import AsyncGenerator
+import itertools
+from typing import AsyncGenerator, Optional
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from fastapi_users.db import SQLAlchemyUserDatabase
 from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.db.metrics import InstrumentedPool, instrument_engine
 from backend.app.models.user import User
 
 DATABASE_URL = (
@@ -11,7 +15,31 @@ DATABASE_URL = (
     f"{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Engine with the pool options of Settings. asyncpg keeps its own statement
+    cache next to SQLAlchemy's prepared statement cache; both follow
+    DB_STATEMENT_CACHE_SIZE (0 disables them, e.g. behind pgbouncer).
+    """
+    url = make_url(url).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    )
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    instrument_engine(engine)
+    return engine
+
+engine = create_engine(DATABASE_URL)
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -19,5 +47,68 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
+
+# Seconds a replica is behind the primary; 0 when it has replayed everything it
+# received, or when the server is not a standby at all.
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity')
+    END
+""")
+
+class Replica:
+    """A read replica; it serves reads only while its last lag check passed."""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+    async def check_lag(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                self.lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar_one()
+        except Exception as e:
+            logger.warning(f"Replica {self.engine.url.host} unavailable: {e}")
+            self.lag = None
+            self.healthy = False
+            return
+        healthy = self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if healthy != self.healthy:
+            logger.info(f"Replica {self.engine.url.host} {'in' if healthy else 'out of'} rotation, lag {self.lag:.3f}s")
+        self.healthy = healthy
+
+replicas = [Replica(url.strip()) for url in settings.POSTGRES_REPLICA_URLS.split(",") if url.strip()]
+replica_counter = itertools.count()
+
+def pick_replica() -> Optional[Replica]:
+    """Next healthy replica in round-robin order, None if there is none."""
+    healthy = [replica for replica in replicas if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(replica_counter) % len(healthy)]
+
+async def check_replicas() -> None:
+    for replica in replicas:
+        await replica.check_lag()
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only routes: a healthy replica if any, else the primary.
+    Replica sessions carry info["replica"] = True, so callers that must see
+    their own recent writes can retry on the primary. Reads that fill a Redis
+    cache or show users their own links use get_async_session instead.
+    """
+    replica = pick_replica()
+    if replica is None:
+        async with async_session_maker() as session:
+            yield session
+        return
+    async with replica.session_maker(info={"replica": True}) as session:
+        yield session
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User)
\ No newline at end of file
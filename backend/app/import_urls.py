@@ -0,0 +1,69 @@
+"""
+Bulk import of custom short links from an NDJSON or CSV file.
+
+Usage:
+    python -m backend.app.import_urls links.ndjson --owner user@example.com
+    python -m backend.app.import_urls links.csv --format csv
+
+Every row follows the /shorten payload: original_url, short_code, expiration
+and an optional fixed_expiration. CSV files need a header row.
+"""
+import argparse
+import asyncio
+import sys
+from typing import AsyncIterator
+
+from sqlalchemy.future import select
+
+from backend.app.api.schemas.url import URLImportReport
+from backend.app.core.config import settings
+from backend.app.db.session import get_async_session
+from backend.app.models.user import User
+from backend.app.services.url_import import IMPORT_FORMATS, URLImporter
+
+READ_SIZE = 1024 * 1024
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, READ_SIZE):
+            yield chunk
+
+
+async def print_progress(report: URLImportReport) -> None:
+    sys.stderr.write(
+        f"{report.rows_read} rows read, {report.imported} imported, "
+        f"{report.conflicts} conflicts, {report.invalid} invalid "
+        f"({report.rows_per_second} rows/s, {report.elapsed_seconds}s)\n"
+    )
+
+
+async def main(args: argparse.Namespace) -> int:
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    session_gen = get_async_session()
+    session = await session_gen.__anext__()
+    try:
+        owner_id = None
+        if args.owner:
+            result = await session.execute(select(User.id).where(User.email == args.owner))
+            owner_id = result.scalar_one_or_none()
+            if owner_id is None:
+                sys.stderr.write(f"User {args.owner} not found.\n")
+                return 1
+        importer = URLImporter(session, owner_id, chunk_size=args.chunk_size, on_progress=print_progress)
+        report = await importer.run(read_file(args.path), fmt)
+    finally:
+        await session.close()
+
+    for error in report.errors:
+        sys.stdout.write(f"line {error.line}: {error.short_code or '-'}: {error.error}\n")
+    return 0 if report.status == "completed" else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import custom short links from NDJSON or CSV.")
+    parser.add_argument("path", help="File to import.")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+    parser.add_argument("--owner", help="Email of the user the links are created for.")
+    parser.add_argument("--chunk-size", type=int, default=settings.URL_IMPORT_CHUNK_SIZE)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -11,18 +11,106 @@ from asyncpg.exceptions import UndefinedTableError
 
 from backend.app.api.routes.auth_users import router as auth_users_router
 from backend.app.api.routes.auth_users import fastapi_users, auth_backend
+from backend.app.api.routes.api_keys import router as api_keys_router
 from backend.app.api.routes.url import router as url_router
 from backend.app.core.config import settings
+from backend.app.core.security import current_superuser
 from backend.app.core.logging_config import request_id_timing
-from backend.app.db.session import get_async_session
+from backend.app.core.load_shedding import limiter, load_shedding, register_fixed_paths
+from backend.app.core.passwords import password_pool_status
+from backend.app.db.metrics import db_metrics
+from backend.app.db.session import check_replicas, engine, get_async_session, replicas
 from backend.app.models.url import URL
 from backend.app.services.expiration import move_expired_urls
-from backend.app.services.cache import store_short_code, delete_cache
+from backend.app.services.cache import (
+    store_short_code,
+    load_scripts,
+    mark_fixed_expiration,
+)
+from backend.app.services.url_helpers import sync_click_counts
+from backend.app.services.click_timeseries import compact_click_timeseries
+from backend.app.services.hot_links import refresh_hot_links
+from backend.app.services.click_events import run_click_event_ingestion
+from backend.app.services.breakdowns import snapshot_breakdowns
+from backend.app.services.live_hits import hit_broadcaster
+from backend.app.services.auth_invalidation import auth_invalidation_listener
 
 logger = logging.getLogger("fast-link")
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+async def click_sync_task():
+    while True:
+        await asyncio.sleep(settings.CLICK_SYNC_INTERVAL)
+        try:
+            await sync_click_counts()
+        except (ProgrammingError, UndefinedTableError) as e:
+            logger.warning(f"Click sync skipped: table 'urls' does not exist. {e}")
+        except Exception as e:
+            logger.error(f"Error during click sync task: {e}")
+
+async def timeseries_compact_task():
+    while True:
+        await asyncio.sleep(settings.TIMESERIES_COMPACT_INTERVAL)
+        try:
+            await compact_click_timeseries()
+        except Exception as e:
+            logger.error(f"Error during time series compaction task: {e}")
+
+async def hot_links_task():
+    while True:
+        await asyncio.sleep(settings.HOT_LINKS_ROTATE_INTERVAL)
+        try:
+            await refresh_hot_links()
+        except Exception as e:
+            logger.error(f"Error during hot links task: {e}")
+
+async def click_events_task():
+    while True:
+        try:
+            await run_click_event_ingestion()
+        except (ProgrammingError, UndefinedTableError) as e:
+            logger.warning(f"Click event ingestion skipped: table 'click_events' does not exist. {e}")
+        except Exception as e:
+            logger.error(f"Error during click event ingestion task: {e}")
+        await asyncio.sleep(settings.CLICK_SYNC_INTERVAL)
+
+async def breakdown_snapshot_task():
+    while True:
+        await asyncio.sleep(settings.BREAKDOWN_SNAPSHOT_INTERVAL)
+        try:
+            await snapshot_breakdowns()
+        except (ProgrammingError, UndefinedTableError) as e:
+            logger.warning(f"Breakdown snapshot skipped: table 'link_breakdowns' does not exist. {e}")
+        except Exception as e:
+            logger.error(f"Error during breakdown snapshot task: {e}")
+
+async def replica_check_task():
+    while True:
+        try:
+            await check_replicas()
+        except Exception as e:
+            logger.error(f"Error during replica lag check: {e}")
+        await asyncio.sleep(settings.REPLICA_CHECK_INTERVAL)
+
+async def expiration_task():
+    while True:
+        session_gen = get_async_session()
+        session = await session_gen.__anext__()
+        try:
+            # Pending clicks slide expirations, so they have to land before the sweep.
+            await sync_click_counts()
+            expired_shortcodes = await move_expired_urls(session)
+            if expired_shortcodes:
+                logger.info(f"Moved expired URLs and dropped their cache keys: {expired_shortcodes}")
+        except (ProgrammingError, UndefinedTableError) as e:
+            logger.warning(f"Expiration task skipped: table 'urls' does not exist. {e}")
+        except Exception as e:
+            logger.error(f"Error during expiration task: {e}")
+        finally:
+            await session.close()
+        logger.info("Expiration task sleeping...")
+        await asyncio.sleep(settings.EXPIRATION_CHECK_INTERVAL)
+
+async def warm_up_cache():
     session_gen = get_async_session()
     session = await session_gen.__anext__()
     try:
@@ -34,37 +122,38 @@ async def lifespan(app: FastAPI):
             urls = result.scalars().all()
             for url in urls:
                 await store_short_code(url.short_code, url.original_url)
+                if url.fixed_expiration:
+                    await mark_fixed_expiration(url.short_code)
             logger.info("Redis cache warmup completed with active URLs.")
         except (ProgrammingError, UndefinedTableError) as e:
             logger.warning(f"Could not warm up Redis cache: table 'urls' does not exist. {e}")
     finally:
         await session.close()
 
-    async def expiration_task():
-        while True:
-            session_gen = get_async_session()
-            session = await session_gen.__anext__()
-            try:
-                expired_shortcodes = await move_expired_urls(session)
-                if expired_shortcodes:
-                    logger.info(f"Moved expired URLs and transferred relationships for codes: {expired_shortcodes}")
-                    for code in expired_shortcodes:
-                        await delete_cache(code)
-                        logger.info(f"Deleted expired cache key: {code}")
-            except (ProgrammingError, UndefinedTableError) as e:
-                logger.warning(f"Expiration task skipped: table 'urls' does not exist. {e}")
-            except Exception as e:
-                logger.error(f"Error during expiration task: {e}")
-            finally:
-                await session.close()
-            logger.info("Expiration task sleeping...")
-            await asyncio.sleep(settings.EXPIRATION_CHECK_INTERVAL)
-    task = asyncio.create_task(expiration_task())
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_cache()
+    await load_scripts()
+    await auth_invalidation_listener.start()
+
+    tasks = [
+        asyncio.create_task(expiration_task()),
+        asyncio.create_task(click_sync_task()),
+        asyncio.create_task(timeseries_compact_task()),
+        asyncio.create_task(hot_links_task()),
+        asyncio.create_task(click_events_task()),
+        asyncio.create_task(breakdown_snapshot_task()),
+    ]
+    if replicas:
+        tasks.append(asyncio.create_task(replica_check_task()))
 
     try:
         yield
     finally:
-        task.cancel()
+        for task in tasks:
+            task.cancel()
+        await hit_broadcaster.close()
+        await auth_invalidation_listener.close()
 
 app = FastAPI(
     title="Fast-Link API",
@@ -82,14 +171,32 @@ app.add_middleware(
 )
 
 app.middleware("http")(request_id_timing)
+# Added last so it runs first and rejects before any other work.
+app.middleware("http")(load_shedding)
 
 app.include_router(auth_users_router)
+app.include_router(api_keys_router)
 app.include_router(url_router)
 
 @app.get("/", tags=["root"])
 async def root():
     return {"message": "Welcome to Fast-Link API!"}
 
+@app.get("/system/load", tags=["root"], dependencies=[Depends(current_superuser)])
+async def system_load():
+    """
+    Current adaptive concurrency limit, per-class capacity, admissions and
+    rejections of this worker, and how long password hashing waited for a thread.
+    """
+    return {**limiter.snapshot(), "password_hashing": password_pool_status()}
+
+@app.get("/system/db", tags=["root"], dependencies=[Depends(current_superuser)])
+async def system_db():
+    """Connection pool usage, checkout waits and statement latency of this worker."""
+    return db_metrics(engine, replicas)
+
+register_fixed_paths(app.routes)
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,7 @@
 # backend/app/models/__init__.py
 
 from backend.app.models.user import User
-from backend.app.models.url import URL, ExpiredURL
\ No newline at end of file
+from backend.app.models.url import URL, ExpiredURL
+from backend.app.models.click_event import ClickEvent
+from backend.app.models.link_breakdown import LinkBreakdown
+from backend.app.models.api_key import ApiKey
@@ -0,0 +1,22 @@
+from typing import Optional
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Identity, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.app.db.base_class import Base
+
+class ClickEvent(Base):
+    __tablename__ = "click_events"
+    __table_args__ = (
+        Index("ix_click_events_short_code_clicked_at", "short_code", "clicked_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    # Redis stream entry id (or spool segment and line), makes redelivered events idempotent.
+    event_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    short_code: Mapped[str] = mapped_column(String, nullable=False)
+    clicked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    referrer: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    ip_prefix: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from backend.app.db.base_class import Base
+
+class LinkBreakdown(Base):
+    """Snapshotted approximate click counts per referrer host or browser family of a link."""
+    __tablename__ = "link_breakdowns"
+
+    short_code: Mapped[str] = mapped_column(String, primary_key=True)
+    dimension: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
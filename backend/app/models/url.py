@@ -2,19 +2,38 @@ import uuid
 from typing import Optional
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Integer, text, Boolean
+from sqlalchemy import DateTime, ForeignKey, String, Integer, text, Boolean, Index, Computed
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from backend.app.db.base_class import Base
 
+# Lowercased host of original_url without userinfo, port and a leading "www.",
+# kept by Postgres as a stored generated column so every write path fills it.
+HOST_EXPRESSION = (
+    r"regexp_replace(lower(substring(original_url from "
+    r"'^[a-zA-Z][a-zA-Z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)')), '^www\.', '')"
+)
+# Prefix searches use an index on the first characters only, long URLs would
+# exceed the btree entry size limit otherwise.
+URL_PREFIX_INDEX_LENGTH = 256
+
 class URL(Base):
     __tablename__ = "urls"
+    __table_args__ = (
+        Index("ix_urls_created_by_created_at_id", "created_by", "created_at", "id"),
+        Index("ix_urls_host_created_at_id", "host", "created_at", "id"),
+        Index(
+            "ix_urls_original_url_prefix",
+            text(f"left(original_url, {URL_PREFIX_INDEX_LENGTH}) text_pattern_ops"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     short_code: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
     original_url: Mapped[str] = mapped_column(String, nullable=False)
+    host: Mapped[Optional[str]] = mapped_column(String, Computed(HOST_EXPRESSION, persisted=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     hit_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
@@ -24,11 +43,20 @@ class URL(Base):
 
 class ExpiredURL(Base):
     __tablename__ = "expired_urls"
+    __table_args__ = (
+        Index("ix_expired_urls_created_by_created_at_id", "created_by", "created_at", "id"),
+        Index("ix_expired_urls_host_created_at_id", "host", "created_at", "id"),
+        Index(
+            "ix_expired_urls_original_url_prefix",
+            text(f"left(original_url, {URL_PREFIX_INDEX_LENGTH}) text_pattern_ops"),
+        ),
+    )
     __mapper_args__ = {"concrete": True}
 
     id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     short_code: Mapped[str] = mapped_column(String, nullable=False, index=True)
     original_url: Mapped[str] = mapped_column(String, nullable=False)
+    host: Mapped[Optional[str]] = mapped_column(String, Computed(HOST_EXPRESSION, persisted=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     hit_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
@@ -0,0 +1,121 @@
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timezone
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.auth_cache import TTLCache, api_key_cache
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.models.api_key import ApiKey
+from backend.app.services.auth_invalidation import broadcast_invalidation
+from backend.app.services.cache import redis_client
+
+API_KEY_PREFIX = "fl_"
+# Characters of the key kept in clear to recognise it in listings.
+API_KEY_DISPLAY_LENGTH = 11
+API_KEY_CACHE_PREFIX = "apikey:"
+
+# Hashes that matched no active key. Kept apart and short-lived, so a flood of
+# random keys cannot evict the entries of real keys.
+unknown_key_cache = TTLCache(settings.API_KEY_UNKNOWN_CACHE_MAX_ENTRIES)
+
+
+def generate_api_key() -> str:
+    return f"{API_KEY_PREFIX}{secrets.token_urlsafe(32)}"
+
+
+def api_key_hash(key: str) -> str:
+    """
+    HMAC-SHA256 of the key with the server secret. Keys are random, so a fast
+    keyed hash is enough and verification never pays a password hash.
+    """
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def api_key_cache_key(key_hash: str) -> str:
+    return f"{API_KEY_CACHE_PREFIX}{key_hash}"
+
+
+async def create_api_key(db: AsyncSession, user_id, name: str) -> tuple[ApiKey, str]:
+    """Store a new key for the user; returns the row and the only copy of the key."""
+    key = generate_api_key()
+    api_key = ApiKey(user_id=user_id, name=name, prefix=key[:API_KEY_DISPLAY_LENGTH], key_hash=api_key_hash(key))
+    db.add(api_key)
+    await db.commit()
+    await db.refresh(api_key)
+    return api_key, key
+
+
+async def count_active_api_keys(db: AsyncSession, user_id) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(ApiKey)
+        .where(ApiKey.user_id == user_id, ApiKey.revoked_at.is_(None))
+    )
+    return result.scalar_one()
+
+
+async def list_api_keys(db: AsyncSession, user_id) -> list[ApiKey]:
+    result = await db.execute(
+        select(ApiKey).where(ApiKey.user_id == user_id).order_by(ApiKey.created_at.desc())
+    )
+    return list(result.scalars())
+
+
+async def revoke_api_key(db: AsyncSession, user_id, key_id) -> Optional[ApiKey]:
+    """
+    Revoke one of the user's keys and drop it from Redis and the process caches
+    of every worker. None if there is no such key.
+    """
+    result = await db.execute(
+        update(ApiKey)
+        .where(ApiKey.id == key_id, ApiKey.user_id == user_id)
+        .values(revoked_at=func.coalesce(ApiKey.revoked_at, datetime.now(timezone.utc)))
+        .returning(ApiKey)
+    )
+    api_key = result.scalar_one_or_none()
+    await db.commit()
+    if api_key is not None:
+        await redis_client.delete(api_key_cache_key(api_key.key_hash))
+        await broadcast_invalidation("api_key", api_key.key_hash)
+    return api_key
+
+
+async def resolve_api_key(db: AsyncSession, key: str) -> Optional[str]:
+    """
+    User id owning an active key, looked up in the process cache, then Redis,
+    then by the unique key_hash index. Only active keys are cached in Redis;
+    unknown keys are remembered locally for API_KEY_UNKNOWN_CACHE_TTL seconds.
+    Without Redis keys are checked against the database.
+    """
+    key_hash = api_key_hash(key)
+    user_id = api_key_cache.get(key_hash)
+    if user_id is not None:
+        return user_id
+    if unknown_key_cache.get(key_hash) is not None:
+        return None
+
+    redis_available = True
+    try:
+        user_id = await redis_client.get(api_key_cache_key(key_hash))
+    except RedisError as e:
+        logger.warning(f"API key cache unavailable, checking the database: {e}")
+        redis_available = False
+    if not user_id:
+        result = await db.execute(
+            select(ApiKey.user_id).where(ApiKey.key_hash == key_hash, ApiKey.revoked_at.is_(None))
+        )
+        owner = result.scalar_one_or_none()
+        if owner is None:
+            unknown_key_cache.put(key_hash, True, settings.API_KEY_UNKNOWN_CACHE_TTL)
+            return None
+        user_id = str(owner)
+        if redis_available:
+            await redis_client.set(api_key_cache_key(key_hash), user_id, ex=settings.API_KEY_CACHE_TTL)
+    api_key_cache.put(key_hash, user_id, settings.AUTH_CACHE_TTL)
+    return user_id
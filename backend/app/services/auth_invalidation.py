@@ -0,0 +1,71 @@
+import asyncio
+from typing import Optional
+
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from backend.app.core.auth_cache import TTLCache, api_key_cache, user_cache
+from backend.app.core.logging_config import logger
+from backend.app.services.cache import AUTH_INVALIDATE_CHANNEL, redis_client
+
+# Message kind -> process cache it invalidates, keyed like that cache.
+INVALIDATED_CACHES: dict[str, TTLCache] = {"user": user_cache, "api_key": api_key_cache}
+
+
+async def broadcast_invalidation(kind: str, key) -> None:
+    """
+    Drop an entry from the auth cache of this worker and tell every other worker
+    to do the same. Without Redis the others keep it for up to AUTH_CACHE_TTL.
+    """
+    INVALIDATED_CACHES[kind].pop(str(key))
+    try:
+        await redis_client.publish(AUTH_INVALIDATE_CHANNEL, f"{kind}:{key}")
+    except RedisError as e:
+        logger.warning(f"Could not broadcast {kind} cache invalidation: {e}")
+
+
+class AuthInvalidationListener:
+    """
+    Applies the invalidations broadcast by other workers. Each worker holds one
+    pub/sub connection for it; when reading fails, messages may have been lost,
+    so the auth caches are cleared before listening again.
+    """
+
+    def __init__(self):
+        self.pubsub: Optional[PubSub] = None
+        self.listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(AUTH_INVALIDATE_CHANNEL)
+        self.listener = asyncio.create_task(self.listen())
+
+    def dispatch(self, data: str) -> None:
+        kind, _, key = data.partition(":")
+        cache = INVALIDATED_CACHES.get(kind)
+        if cache is not None:
+            cache.pop(key)
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.error(f"Error reading auth invalidation messages: {e}")
+                for cache in INVALIDATED_CACHES.values():
+                    cache.clear()
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                self.dispatch(message["data"])
+
+    async def close(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+
+auth_invalidation_listener = AuthInvalidationListener()
@@ -0,0 +1,106 @@
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from backend.app.api.schemas.url import BreakdownItem
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.db.session import get_async_session
+from backend.app.models.link_breakdown import LinkBreakdown
+from backend.app.services.cache import (
+    cache_breakdown_snapshot,
+    drop_breakdown_snapshots,
+    get_breakdown_counts,
+    restore_sketch_snapshots,
+    take_sketch_snapshots,
+)
+from backend.app.services.sketch import BREAKDOWN_DIMENSIONS
+
+# Keeps the snapshot table bounded: only the heaviest values per link and dimension survive.
+prune_breakdowns_stmt = text("""
+    DELETE FROM link_breakdowns lb
+    USING (
+        SELECT short_code, dimension, value,
+               row_number() OVER (PARTITION BY short_code, dimension ORDER BY count DESC) AS rank
+        FROM link_breakdowns
+        WHERE short_code = ANY(:codes)
+    ) ranked
+    WHERE lb.short_code = ranked.short_code
+      AND lb.dimension = ranked.dimension
+      AND lb.value = ranked.value
+      AND ranked.rank > :max_rows
+""")
+
+
+async def snapshot_breakdowns(batch_size: int = 1000) -> int:
+    """
+    Add the top-k values collected in Redis since the last snapshot to
+    link_breakdowns, so breakdowns survive a Redis flush. Values are put back
+    into Redis if the database write fails. Returns the number of links written.
+    """
+    written = 0
+    while True:
+        snapshots = await take_sketch_snapshots(batch_size)
+        rows = [
+            {"short_code": code, "dimension": dimension, "value": value, "count": count}
+            for code, dimension, top in snapshots
+            for value, count in top
+        ]
+        if rows:
+            session_gen = get_async_session()
+            session = await session_gen.__anext__()
+            try:
+                stmt = insert(LinkBreakdown).values(rows)
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=[LinkBreakdown.short_code, LinkBreakdown.dimension, LinkBreakdown.value],
+                    set_={"count": LinkBreakdown.count + stmt.excluded.count, "updated_at": func.now()},
+                ))
+                codes = list({row["short_code"] for row in rows})
+                await session.execute(prune_breakdowns_stmt, {"codes": codes, "max_rows": settings.BREAKDOWN_MAX_ROWS})
+                await session.commit()
+            except Exception as e:
+                logger.error(f"Error writing breakdown snapshots: {e}")
+                await restore_sketch_snapshots(snapshots)
+                raise
+            finally:
+                await session.close()
+            await drop_breakdown_snapshots(codes)
+        codes_taken = len(snapshots) // len(BREAKDOWN_DIMENSIONS)
+        written += codes_taken
+        if codes_taken < batch_size:
+            return written
+
+
+async def get_link_breakdowns(db: AsyncSession, short_code: str) -> dict[str, list[BreakdownItem]]:
+    """
+    Approximate top referrers and browsers of a link: the snapshotted counts plus
+    the Count-Min Sketch estimates collected since the last snapshot. Snapshot
+    rows are read from Postgres only when they are not cached in Redis; the
+    cache lives STATS_CACHE_TTL seconds and is dropped by the snapshot task.
+    """
+    snapshot, live = await get_breakdown_counts(short_code)
+    if snapshot is None:
+        snapshot = {dimension: {} for dimension in BREAKDOWN_DIMENSIONS}
+        result = await db.execute(
+            select(LinkBreakdown.dimension, LinkBreakdown.value, LinkBreakdown.count)
+            .where(LinkBreakdown.short_code == short_code)
+        )
+        for row in result:
+            if row.dimension in snapshot:
+                snapshot[row.dimension][row.value] = row.count
+        await cache_breakdown_snapshot(short_code, snapshot, settings.STATS_CACHE_TTL)
+
+    totals = {dimension: dict(snapshot.get(dimension, {})) for dimension in BREAKDOWN_DIMENSIONS}
+    for dimension, top in live.items():
+        for value, count in top:
+            totals[dimension][value] = totals[dimension].get(value, 0) + int(count)
+
+    return {
+        dimension: [
+            BreakdownItem(value=value, count=count)
+            for value, count in sorted(counts.items(), key=lambda item: item[1], reverse=True)[:settings.SKETCH_TOP_K]
+        ]
+        for dimension, counts in totals.items()
+    }
@@ -1,6 +1,13 @@
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
 import redis.asyncio as redis
 
 from backend.app.core.config import settings
+from backend.app.core.load_shedding import limiter
+from backend.app.services.sketch import BREAKDOWN_DIMENSIONS, breakdown_items, sketch_indexes
 
 # Create a global Redis client instance
 redis_client = redis.Redis(
@@ -30,9 +37,573 @@ async def check_collision(code: str) -> bool:
     exists = await redis_client.exists(code)
     return exists == 1
 
+async def check_collisions(codes: list[str]) -> list[bool]:
+    """
+    Bulk variant of check_collision: one pipelined round trip for all codes.
+    Returns a flag per code, True if it already exists.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code in codes:
+            pipe.exists(code)
+        return [exists == 1 for exists in await pipe.execute()]
+
+async def store_short_codes(mapping: dict[str, str]) -> bool:
+    """Store many short code to original URL mappings with a single MSET."""
+    if not mapping:
+        return True
+    return await redis_client.mset(mapping)
+
+async def get_short_codes(codes: list[str]) -> list[Optional[str]]:
+    """Look up many short codes with a single MGET, None for codes that are not cached."""
+    return await redis_client.mget(codes)
+
 async def store_short_code(code: str, url: str, expire: int = None) -> bool:
     """
     Store the mapping of short code to original URL in Redis.
     Optionally set an expiration time (in seconds) for the key.
     """
     return await redis_client.set(code, url, ex=expire)
+
+# Per-code click counters live in a hash next to the URL key; codes with
+# pending clicks are tracked in a set so the sync task never has to SCAN.
+# The set lives outside the clicks: namespace, "dirty" is a valid short code.
+CLICKS_PREFIX = "clicks:"
+DIRTY_CLICKS_KEY = "clicksync:dirty"
+# Cached stats of a code (original_url, created_at, hit_count including pending
+# clicks, last_used). The redirect script keeps the hash current while it exists.
+STATS_PREFIX = "stats:"
+# Click time series: ts:{code}:minute|hour|day hashes map a bucket start (epoch
+# seconds, UTC) to its clicks. Clicks land in the minute hash and in
+# ts:{code}:pending; the compactor folds pending buckets into hours and days.
+TIMESERIES_PREFIX = "ts:"
+TIMESERIES_PENDING_KEY = "ts:pending"
+TIMESERIES_GRANULARITIES = ("minute", "hour", "day")
+# uv:{code}:{YYYYMMDD} HyperLogLogs of hashed visitor fingerprints, one per link and UTC day.
+UNIQUE_VISITORS_PREFIX = "uv:"
+# Hot links: clicks per code in hot:m:{minute} and hot:h:{hour} sorted sets,
+# plus hot:5m, hot:1h and hot:24h leaderboards that are incremented on every
+# click and rebuilt from the buckets by the rotation task as time moves on.
+HOT_LINKS_PREFIX = "hot:"
+HOT_LINKS_WINDOWS = ("5m", "1h", "24h")
+HOT_MINUTE_BUCKET_TTL = 65 * 60
+HOT_HOUR_BUCKET_TTL = 25 * 60 * 60
+# Raw click events for the click_events table, drained by a consumer group.
+# Entries are deleted once acknowledged and the stream is never trimmed, so
+# events still pending in the group cannot be lost.
+CLICK_EVENTS_STREAM = "events:clicks"
+# Referrer and browser breakdowns since the last snapshot: per link and dimension
+# a Count-Min Sketch (u32 counters in a BITFIELD string, SKETCH_DEPTH rows of
+# SKETCH_WIDTH) and a sorted set of the SKETCH_TOP_K heaviest values.
+SKETCH_PREFIX = "cms:"
+SKETCH_TOP_PREFIX = "cmstop:"
+DIRTY_SKETCHES_KEY = "cmstop:dirty"
+# Snapshotted breakdown counts of a link (link_breakdowns rows) as JSON, cached
+# next to its sketches so stats do not query Postgres.
+BREAKDOWN_SNAPSHOT_PREFIX = "cmsnap:"
+# Pub/sub channel prefix the redirect script publishes every click to
+# (hardcoded in REDIRECT_SCRIPT).
+HITS_CHANNEL_PREFIX = "hits:"
+# Pub/sub channel of "<kind>:<key>" messages naming entries every worker
+# drops from its process-local auth caches.
+AUTH_INVALIDATE_CHANNEL = "auth:invalidate"
+
+RATE_LIMIT_PREFIX = "ratelimit:"
+
+# KEYS: url key, clicks hash, dirty set, stats hash, minute hash, pending hash, pending set,
+# visitors HyperLogLog of the day, 5m/1h/24h leaderboards, hot minute and hour buckets,
+# click events stream, referrer sketch and top-k, browser sketch and top-k, dirty sketches set.
+# ARGV: now (epoch seconds), sliding TTL, code, minute bucket retention,
+# visitor fingerprint ('' to skip), visitors retention, hot minute and hour bucket TTLs,
+# '1' to record the click event and breakdowns ('' to skip), referrer, user agent, IP prefix,
+# sketch depth and width, top-k size, referrer and browser values, then the sketch
+# columns of the referrer and of the browser (depth each).
+REDIRECT_SCRIPT = """
+local url = redis.call('GET', KEYS[1])
+if not url then
+    return false
+end
+redis.call('HINCRBY', KEYS[2], 'hits', 1)
+redis.call('HSET', KEYS[2], 'last_used', ARGV[1])
+redis.call('SADD', KEYS[3], ARGV[3])
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    redis.call('HINCRBY', KEYS[4], 'hit_count', 1)
+    redis.call('HSET', KEYS[4], 'last_used', ARGV[1])
+end
+local minute = tostring(math.floor(tonumber(ARGV[1]) / 60) * 60)
+redis.call('HINCRBY', KEYS[5], minute, 1)
+redis.call('EXPIRE', KEYS[5], ARGV[4])
+redis.call('HINCRBY', KEYS[6], minute, 1)
+redis.call('SADD', KEYS[7], ARGV[3])
+if ARGV[5] ~= '' then
+    redis.call('PFADD', KEYS[8], ARGV[5])
+    redis.call('EXPIRE', KEYS[8], ARGV[6])
+end
+for i = 9, 13 do
+    redis.call('ZINCRBY', KEYS[i], 1, ARGV[3])
+end
+redis.call('PUBLISH', 'hits:' .. ARGV[3], 1)
+redis.call('EXPIRE', KEYS[12], ARGV[7])
+redis.call('EXPIRE', KEYS[13], ARGV[8])
+if ARGV[9] ~= '' then
+    redis.call('XADD', KEYS[14], '*',
+               'code', ARGV[3], 'ts', ARGV[1], 'referrer', ARGV[10],
+               'user_agent', ARGV[11], 'ip_prefix', ARGV[12])
+    local depth = tonumber(ARGV[13])
+    local width = tonumber(ARGV[14])
+    local top_k = tonumber(ARGV[15])
+    for dim = 0, 1 do
+        local sketch_key = KEYS[15 + 2 * dim]
+        local top_key = KEYS[16 + 2 * dim]
+        local ops = {'OVERFLOW', 'SAT'}
+        for row = 0, depth - 1 do
+            local column = tonumber(ARGV[18 + dim * depth + row])
+            table.insert(ops, 'INCRBY')
+            table.insert(ops, 'u32')
+            table.insert(ops, '#' .. (row * width + column))
+            table.insert(ops, 1)
+        end
+        local estimate = nil
+        for _, value in ipairs(redis.call('BITFIELD', sketch_key, unpack(ops))) do
+            if not estimate or value < estimate then
+                estimate = value
+            end
+        end
+        redis.call('ZADD', top_key, estimate, ARGV[16 + dim])
+        if redis.call('ZCARD', top_key) > top_k then
+            redis.call('ZREMRANGEBYRANK', top_key, 0, 0)
+        end
+    end
+    redis.call('SADD', KEYS[19], ARGV[3])
+end
+local ttl = tonumber(ARGV[2])
+if ttl > 0 and redis.call('HGET', KEYS[2], 'fixed') ~= '1' then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return url
+"""
+
+# KEYS: dirty set. ARGV: batch size, clicks hash prefix.
+DRAIN_CLICKS_SCRIPT = """
+local codes = redis.call('SPOP', KEYS[1], ARGV[1])
+local out = {}
+for _, code in ipairs(codes) do
+    local key = ARGV[2] .. code
+    local values = redis.call('HMGET', key, 'hits', 'last_used')
+    local hits = tonumber(values[1] or '0')
+    if hits > 0 then
+        redis.call('HINCRBY', key, 'hits', -hits)
+        table.insert(out, code)
+        table.insert(out, tostring(hits))
+        table.insert(out, values[2] or '0')
+    end
+end
+return out
+"""
+
+# KEYS: stats hash, clicks hash. ARGV: original_url, created_at, hit_count and
+# last_used (epoch seconds or '') from the database, TTL.
+# Clicks that were not synced yet are added on top of the database values.
+LOAD_STATS_SCRIPT = """
+local pending = redis.call('HMGET', KEYS[2], 'hits', 'last_used')
+local hits = tonumber(ARGV[3]) + tonumber(pending[1] or '0')
+local last_used = ARGV[4]
+if pending[2] and (last_used == '' or tonumber(pending[2]) > tonumber(last_used)) then
+    last_used = pending[2]
+end
+redis.call('HSET', KEYS[1], 'original_url', ARGV[1], 'created_at', ARGV[2],
+           'hit_count', hits, 'last_used', last_used)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {tostring(hits), last_used}
+"""
+
+# KEYS: pending set. ARGV: batch size, time series prefix, minute/hour/day
+# cutoffs (older buckets are trimmed), hour TTL, day TTL.
+COMPACT_TIMESERIES_SCRIPT = """
+local function trim(key, cutoff)
+    for _, bucket in ipairs(redis.call('HKEYS', key)) do
+        if tonumber(bucket) < cutoff then
+            redis.call('HDEL', key, bucket)
+        end
+    end
+end
+local codes = redis.call('SPOP', KEYS[1], ARGV[1])
+for _, code in ipairs(codes) do
+    local base = ARGV[2] .. code
+    local pending = redis.call('HGETALL', base .. ':pending')
+    redis.call('DEL', base .. ':pending')
+    for i = 1, #pending, 2 do
+        local minute = tonumber(pending[i])
+        local hits = tonumber(pending[i + 1])
+        redis.call('HINCRBY', base .. ':hour', tostring(minute - minute % 3600), hits)
+        redis.call('HINCRBY', base .. ':day', tostring(minute - minute % 86400), hits)
+    end
+    trim(base .. ':minute', tonumber(ARGV[3]))
+    trim(base .. ':hour', tonumber(ARGV[4]))
+    trim(base .. ':day', tonumber(ARGV[5]))
+    redis.call('EXPIRE', base .. ':hour', ARGV[6])
+    redis.call('EXPIRE', base .. ':day', ARGV[7])
+end
+return #codes
+"""
+
+# ARGV: hot links prefix, current minute and hour bucket (epoch seconds).
+# Each leaderboard becomes the union of the buckets still inside its window;
+# the 24h leaderboard has hour resolution.
+ROTATE_HOT_LINKS_SCRIPT = """
+local prefix = ARGV[1]
+local function rebuild(window, bucket_prefix, last, step, count)
+    local keys = {}
+    for i = 0, count - 1 do
+        table.insert(keys, prefix .. bucket_prefix .. tostring(last - i * step))
+    end
+    redis.call('ZUNIONSTORE', prefix .. window, #keys, unpack(keys))
+end
+rebuild('5m', 'm:', tonumber(ARGV[2]), 60, 5)
+rebuild('1h', 'm:', tonumber(ARGV[2]), 60, 60)
+rebuild('24h', 'h:', tonumber(ARGV[3]), 3600, 24)
+return true
+"""
+
+# KEYS: dirty sketches set. ARGV: batch size, sketch prefix, top-k prefix, dimensions...
+# Takes the top-k values of up to batch size links and resets their sketches.
+SNAPSHOT_SKETCHES_SCRIPT = """
+local codes = redis.call('SPOP', KEYS[1], ARGV[1])
+local out = {}
+for _, code in ipairs(codes) do
+    for i = 4, #ARGV do
+        local suffix = code .. ':' .. ARGV[i]
+        local top = redis.call('ZRANGE', ARGV[3] .. suffix, 0, -1, 'WITHSCORES')
+        redis.call('DEL', ARGV[3] .. suffix, ARGV[2] .. suffix)
+        table.insert(out, {code, ARGV[i], top})
+    end
+end
+return out
+"""
+
+# KEYS: token bucket hash. ARGV: capacity, refill rate (tokens per second), now
+# (epoch seconds), lease size. Refills the bucket and takes a lease of tokens
+# while at least two leases are left, one token while any is left, else none.
+# Returns {tokens granted, milliseconds until the next token if none}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = 0
+if tokens >= 2 * lease then
+    granted = lease
+elseif tokens >= 1 then
+    granted = 1
+end
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+if granted > 0 then
+    return {granted, 0}
+end
+return {0, math.ceil((1 - tokens) / rate * 1000)}
+"""
+
+redirect_script = redis_client.register_script(REDIRECT_SCRIPT)
+drain_clicks_script = redis_client.register_script(DRAIN_CLICKS_SCRIPT)
+load_stats_script = redis_client.register_script(LOAD_STATS_SCRIPT)
+compact_timeseries_script = redis_client.register_script(COMPACT_TIMESERIES_SCRIPT)
+rotate_hot_links_script = redis_client.register_script(ROTATE_HOT_LINKS_SCRIPT)
+snapshot_sketches_script = redis_client.register_script(SNAPSHOT_SKETCHES_SCRIPT)
+token_bucket_script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+def clicks_key(code: str) -> str:
+    return f"{CLICKS_PREFIX}{code}"
+
+def stats_key(code: str) -> str:
+    return f"{STATS_PREFIX}{code}"
+
+def timeseries_key(code: str, granularity: str) -> str:
+    return f"{TIMESERIES_PREFIX}{code}:{granularity}"
+
+def unique_visitors_key(code: str, day: date) -> str:
+    return f"{UNIQUE_VISITORS_PREFIX}{code}:{day:%Y%m%d}"
+
+def sketch_keys(code: str, dimension: str) -> tuple[str, str]:
+    """Count-Min Sketch and top-k keys of a link's breakdown dimension."""
+    return f"{SKETCH_PREFIX}{code}:{dimension}", f"{SKETCH_TOP_PREFIX}{code}:{dimension}"
+
+def breakdown_snapshot_key(code: str) -> str:
+    return f"{BREAKDOWN_SNAPSHOT_PREFIX}{code}"
+
+def hits_channel(code: str) -> str:
+    return f"{HITS_CHANNEL_PREFIX}{code}"
+
+def rate_limit_key(bucket: str) -> str:
+    return f"{RATE_LIMIT_PREFIX}{bucket}"
+
+def hot_links_key(window: str) -> str:
+    return f"{HOT_LINKS_PREFIX}{window}"
+
+def hot_bucket_keys(now: float) -> tuple[str, str]:
+    """Keys of the hot links minute and hour buckets that contain now."""
+    minute = int(now) // 60 * 60
+    hour = int(now) // 3600 * 3600
+    return f"{HOT_LINKS_PREFIX}m:{minute}", f"{HOT_LINKS_PREFIX}h:{hour}"
+
+def redirect_keys(code: str, now: float) -> list[str]:
+    return [
+        code,
+        clicks_key(code),
+        DIRTY_CLICKS_KEY,
+        stats_key(code),
+        timeseries_key(code, "minute"),
+        timeseries_key(code, "pending"),
+        TIMESERIES_PENDING_KEY,
+        unique_visitors_key(code, datetime.fromtimestamp(now, tz=timezone.utc).date()),
+        *(hot_links_key(window) for window in HOT_LINKS_WINDOWS),
+        *hot_bucket_keys(now),
+        CLICK_EVENTS_STREAM,
+        *(key for dimension in BREAKDOWN_DIMENSIONS for key in sketch_keys(code, dimension)),
+        DIRTY_SKETCHES_KEY,
+    ]
+
+def redirect_args(code: str, ttl: int, now: float, visitor: str = "", event: Optional[dict] = None) -> list:
+    """Script arguments; event holds referrer, user_agent and ip_prefix of a click to record."""
+    event = event or {}
+    items = breakdown_items(event)
+    return [
+        now,
+        ttl,
+        code,
+        settings.TIMESERIES_MINUTE_RETENTION,
+        visitor,
+        settings.UNIQUE_VISITORS_RETENTION_DAYS * 24 * 60 * 60,
+        HOT_MINUTE_BUCKET_TTL,
+        HOT_HOUR_BUCKET_TTL,
+        "1" if event else "",
+        event.get("referrer", ""),
+        event.get("user_agent", ""),
+        event.get("ip_prefix", ""),
+        settings.SKETCH_DEPTH,
+        settings.SKETCH_WIDTH,
+        settings.SKETCH_TOP_K,
+        *(items[dimension] for dimension in BREAKDOWN_DIMENSIONS),
+        *(column for dimension in BREAKDOWN_DIMENSIONS for column in sketch_indexes(items[dimension])),
+    ]
+
+async def load_scripts() -> None:
+    """
+    Load the Lua scripts into Redis so that later calls go through EVALSHA.
+    The script objects reload themselves if Redis was restarted in between.
+    """
+    redirect_script.sha = await redis_client.script_load(REDIRECT_SCRIPT)
+    drain_clicks_script.sha = await redis_client.script_load(DRAIN_CLICKS_SCRIPT)
+    load_stats_script.sha = await redis_client.script_load(LOAD_STATS_SCRIPT)
+    compact_timeseries_script.sha = await redis_client.script_load(COMPACT_TIMESERIES_SCRIPT)
+    rotate_hot_links_script.sha = await redis_client.script_load(ROTATE_HOT_LINKS_SCRIPT)
+    snapshot_sketches_script.sha = await redis_client.script_load(SNAPSHOT_SKETCHES_SCRIPT)
+    token_bucket_script.sha = await redis_client.script_load(TOKEN_BUCKET_SCRIPT)
+
+async def resolve_and_count(
+    code: str, ttl: int, visitor: str = "", event: Optional[dict] = None
+) -> Optional[str]:
+    """
+    Resolve a short code and record the click (and the visitor fingerprint and
+    click event, if given) in a single round trip.
+    Returns the original URL, or None on a cache miss (nothing is counted then).
+    The round trip time feeds the load shedding limiter as Redis latency.
+    """
+    now = time.time()
+    start = time.perf_counter()
+    url = await redirect_script(
+        keys=redirect_keys(code, now), args=redirect_args(code, ttl, now, visitor, event)
+    )
+    limiter.observe("redis", time.perf_counter() - start)
+    return url
+
+async def resolve_and_count_many(codes: list[str], ttl: int) -> list[Optional[str]]:
+    """Bulk variant of resolve_and_count: the redirect script for every code in one pipeline."""
+    now = time.time()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code in codes:
+            await redirect_script(
+                keys=redirect_keys(code, now), args=redirect_args(code, ttl, now), client=pipe
+            )
+        return await pipe.execute()
+
+async def mark_fixed_expiration(code: str) -> int:
+    """Keep the redirect script from sliding the TTL of a fixed-expiration link."""
+    return await redis_client.hset(clicks_key(code), "fixed", 1)
+
+async def mark_fixed_expirations(codes: list[str]) -> None:
+    """Bulk variant of mark_fixed_expiration in one pipelined round trip."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code in codes:
+            pipe.hset(clicks_key(code), "fixed", 1)
+        await pipe.execute()
+
+async def drain_click_counts(batch_size: int) -> list[tuple[str, int, float]]:
+    """
+    Atomically take up to batch_size pending click counters.
+    Returns (code, hits, last_used) tuples; the hits are subtracted from Redis.
+    """
+    flat = await drain_clicks_script(keys=[DIRTY_CLICKS_KEY], args=[batch_size, CLICKS_PREFIX])
+    return [
+        (flat[i], int(flat[i + 1]), float(flat[i + 2]))
+        for i in range(0, len(flat), 3)
+    ]
+
+async def restore_click_counts(counts: list[tuple[str, int, float]]) -> None:
+    """Put drained counters back, e.g. when writing them to the database failed."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code, hits, _ in counts:
+            pipe.hincrby(clicks_key(code), "hits", hits)
+            pipe.sadd(DIRTY_CLICKS_KEY, code)
+        await pipe.execute()
+
+async def delete_click_stats(code: str) -> tuple[int, Optional[float]]:
+    """
+    Drop the click counters, cached stats, click time series, visitor counts
+    and breakdown sketches of a code and return what was still pending as
+    (hits, last_used).
+    """
+    timeseries_keys = [timeseries_key(code, g) for g in TIMESERIES_GRANULARITIES + ("pending",)]
+    today = datetime.now(timezone.utc).date()
+    visitor_keys = [
+        unique_visitors_key(code, today - timedelta(days=days))
+        for days in range(settings.UNIQUE_VISITORS_RETENTION_DAYS + 1)
+    ]
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hmget(clicks_key(code), "hits", "last_used")
+        pipe.delete(
+            clicks_key(code),
+            stats_key(code),
+            *timeseries_keys,
+            *visitor_keys,
+            *(key for dimension in BREAKDOWN_DIMENSIONS for key in sketch_keys(code, dimension)),
+        )
+        pipe.srem(DIRTY_CLICKS_KEY, code)
+        pipe.srem(TIMESERIES_PENDING_KEY, code)
+        (hits, last_used), _, _, _ = await pipe.execute()
+    return int(hits or 0), (float(last_used) if last_used else None)
+
+async def get_cached_stats(codes: list[str]) -> list[dict]:
+    """Read the stats hashes of many codes in one pipelined round trip, {} for misses."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code in codes:
+            pipe.hgetall(stats_key(code))
+        return await pipe.execute()
+
+async def load_stats(entries: list[tuple[str, str, str, int, Optional[float]]], ttl: int) -> list[tuple[int, str]]:
+    """
+    Cache stats loaded from the database as (code, original_url, created_at,
+    hit_count, last_used) tuples, merging pending clicks. Returns the cached
+    (hit_count, last_used) of each entry.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code, original_url, created_at, hit_count, last_used in entries:
+            await load_stats_script(
+                keys=[stats_key(code), clicks_key(code)],
+                args=[original_url, created_at, hit_count, "" if last_used is None else last_used, ttl],
+                client=pipe,
+            )
+        return [(int(hits), last_used) for hits, last_used in await pipe.execute()]
+
+async def drop_cached_stats(code: str) -> int:
+    return await redis_client.delete(stats_key(code))
+
+async def compact_timeseries(batch_size: int, cutoffs: dict[str, int]) -> int:
+    """
+    Fold the pending minute buckets of up to batch_size codes into hour and day
+    buckets and trim buckets older than the given per-granularity cutoffs.
+    Returns the number of codes that were compacted.
+    """
+    return await compact_timeseries_script(
+        keys=[TIMESERIES_PENDING_KEY],
+        args=[
+            batch_size,
+            TIMESERIES_PREFIX,
+            cutoffs["minute"],
+            cutoffs["hour"],
+            cutoffs["day"],
+            settings.TIMESERIES_HOUR_RETENTION,
+            settings.TIMESERIES_DAY_RETENTION,
+        ],
+    )
+
+async def get_timeseries_buckets(code: str, granularity: str, buckets: list[int]) -> tuple[list, dict]:
+    """
+    Read the given buckets of a granularity and the minute buckets that were
+    not compacted yet in one MULTI, so a compaction cannot move clicks between
+    the two reads and have them counted twice or not at all.
+    """
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hmget(timeseries_key(code, granularity), buckets)
+        pipe.hgetall(timeseries_key(code, "pending"))
+        values, pending = await pipe.execute()
+    return values, pending
+
+async def rotate_hot_links(now: float) -> None:
+    """Drop clicks that left their window from the hot links leaderboards."""
+    minute = int(now) // 60 * 60
+    hour = int(now) // 3600 * 3600
+    await rotate_hot_links_script(args=[HOT_LINKS_PREFIX, minute, hour])
+
+async def get_hot_links(window: str, n: int) -> list[tuple[str, float]]:
+    """The n most clicked codes of a leaderboard as (code, hits), most clicked first."""
+    return await redis_client.zrevrange(hot_links_key(window), 0, n - 1, withscores=True)
+
+async def take_sketch_snapshots(batch_size: int) -> list[tuple[str, str, list[tuple[str, int]]]]:
+    """
+    Atomically take the top-k values of up to batch_size links with new clicks
+    and reset their sketches. Returns (code, dimension, [(value, count), ...]).
+    """
+    flat = await snapshot_sketches_script(
+        keys=[DIRTY_SKETCHES_KEY],
+        args=[batch_size, SKETCH_PREFIX, SKETCH_TOP_PREFIX, *BREAKDOWN_DIMENSIONS],
+    )
+    return [
+        (code, dimension, [(top[i], int(top[i + 1])) for i in range(0, len(top), 2)])
+        for code, dimension, top in flat
+    ]
+
+async def restore_sketch_snapshots(snapshots: list[tuple[str, str, list[tuple[str, int]]]]) -> None:
+    """Put taken top-k values back, e.g. when writing them to the database failed."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for code, dimension, top in snapshots:
+            _, top_key = sketch_keys(code, dimension)
+            for value, count in top:
+                pipe.zincrby(top_key, count, value)
+            pipe.sadd(DIRTY_SKETCHES_KEY, code)
+        await pipe.execute()
+
+async def get_breakdown_counts(
+    code: str,
+) -> tuple[Optional[dict[str, dict[str, int]]], dict[str, list[tuple[str, float]]]]:
+    """
+    In one round trip: the cached snapshot counts per dimension (None if not
+    cached) and the top-k values per dimension since the last snapshot.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.get(breakdown_snapshot_key(code))
+        for dimension in BREAKDOWN_DIMENSIONS:
+            pipe.zrevrange(sketch_keys(code, dimension)[1], 0, -1, withscores=True)
+        snapshot, *tops = await pipe.execute()
+    return (json.loads(snapshot) if snapshot else None), dict(zip(BREAKDOWN_DIMENSIONS, tops))
+
+async def cache_breakdown_snapshot(code: str, counts: dict[str, dict[str, int]], ttl: int) -> None:
+    await redis_client.set(breakdown_snapshot_key(code), json.dumps(counts), ex=ttl)
+
+async def drop_breakdown_snapshots(codes: list[str]) -> None:
+    await redis_client.delete(*(breakdown_snapshot_key(code) for code in codes))
+
+async def take_tokens(bucket: str, capacity: int, rate: float, lease: int) -> tuple[int, int]:
+    """
+    Take tokens from a shared token bucket in one round trip.
+    Returns (tokens granted, milliseconds until a token is available if none were).
+    """
+    granted, retry_ms = await token_bucket_script(
+        keys=[rate_limit_key(bucket)], args=[capacity, rate, time.time(), lease]
+    )
+    return int(granted), int(retry_ms)
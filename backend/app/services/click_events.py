@@ -0,0 +1,268 @@
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from redis.exceptions import ResponseError
+from sqlalchemy import text
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.db.session import get_async_session
+from backend.app.services.cache import CLICK_EVENTS_STREAM, redis_client
+
+CLICK_EVENTS_GROUP = "click-ingest"
+CLICK_EVENTS_CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+# Entries delivered to a consumer that did not acknowledge them within this
+# time (e.g. a worker that died mid-batch) are claimed by the next one.
+CLAIM_IDLE_MS = 60_000
+
+SPOOL_PATTERN = "clicks-*.ndjson"
+CLAIMED_SPOOL_PATTERN = "clicks-*.ndjson.*.processing"
+# Claimed segments older than this belong to a worker that died while loading
+# them (segments are renamed back when loading fails); they are claimed again.
+SPOOL_CLAIM_TIMEOUT = 600
+
+STAGING_TABLE = "click_events_staging"
+STAGING_COLUMNS = ["event_id", "short_code", "clicked_at", "referrer", "user_agent", "ip_prefix"]
+
+create_staging_stmt = text(f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        event_id varchar NOT NULL,
+        short_code varchar NOT NULL,
+        clicked_at timestamptz NOT NULL,
+        referrer varchar,
+        user_agent varchar,
+        ip_prefix varchar
+    ) ON COMMIT DELETE ROWS
+""")
+
+# Redelivered events (a crash between commit and acknowledgement) are skipped.
+merge_staging_stmt = text(f"""
+    INSERT INTO click_events (event_id, short_code, clicked_at, referrer, user_agent, ip_prefix)
+    SELECT event_id, short_code, clicked_at, referrer, user_agent, ip_prefix
+    FROM {STAGING_TABLE}
+    ON CONFLICT (event_id) DO NOTHING
+""")
+
+
+def ip_prefix(host: Optional[str]) -> str:
+    """Truncate a client address to its /24 (IPv4) or /48 (IPv6) network."""
+    if not host:
+        return ""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return ""
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+def click_event_fields(request: Request) -> dict:
+    return {
+        "referrer": request.headers.get("referer", ""),
+        "user_agent": request.headers.get("user-agent", ""),
+        "ip_prefix": ip_prefix(request.client.host if request.client else None),
+    }
+
+
+def append_to_segment(segment: Path, line: str) -> None:
+    segment.parent.mkdir(parents=True, exist_ok=True)
+    with segment.open("a", encoding="utf-8") as f:
+        f.write(line)
+
+
+async def spool_click_event(short_code: str, event: dict) -> None:
+    """
+    Append a click event to the local segment file of the current minute. Used
+    when Redis is unavailable; the ingestion task loads closed segments later.
+    The file is written in a thread so a slow disk does not stall the event loop.
+    """
+    now = time.time()
+    spool_dir = Path(settings.CLICK_EVENTS_SPOOL_DIR)
+    segment = spool_dir / f"clicks-{time.strftime('%Y%m%d%H%M', time.gmtime(now))}-{os.getpid()}.ndjson"
+    line = json.dumps({"code": short_code, "ts": now, **event}) + "\n"
+    await asyncio.to_thread(append_to_segment, segment, line)
+
+
+def event_row(event_id: str, fields: dict) -> tuple:
+    return (
+        event_id,
+        fields["code"],
+        datetime.fromtimestamp(float(fields["ts"]), tz=timezone.utc),
+        fields.get("referrer") or None,
+        fields.get("user_agent") or None,
+        fields.get("ip_prefix") or None,
+    )
+
+
+async def copy_click_events(rows: list[tuple]) -> None:
+    """Load event rows with COPY into a staging table and merge them in one transaction."""
+    session_gen = get_async_session()
+    session = await session_gen.__anext__()
+    try:
+        await session.execute(create_staging_stmt)
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=rows, columns=STAGING_COLUMNS
+        )
+        await session.execute(merge_staging_stmt)
+        await session.commit()
+    finally:
+        await session.close()
+
+
+async def ensure_consumer_group() -> None:
+    try:
+        await redis_client.xgroup_create(CLICK_EVENTS_STREAM, CLICK_EVENTS_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def read_click_events(batch_size: int, block_ms: Optional[int]) -> list[tuple[str, Optional[dict]]]:
+    """Entries abandoned by other consumers first, then new ones."""
+    claimed = await redis_client.xautoclaim(
+        CLICK_EVENTS_STREAM, CLICK_EVENTS_GROUP, CLICK_EVENTS_CONSUMER,
+        min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=batch_size,
+    )
+    if claimed[1]:
+        return claimed[1]
+    response = await redis_client.xreadgroup(
+        CLICK_EVENTS_GROUP, CLICK_EVENTS_CONSUMER, {CLICK_EVENTS_STREAM: ">"},
+        count=batch_size, block=block_ms,
+    )
+    return response[0][1] if response else []
+
+
+async def ingest_click_events(batch_size: int, block_ms: Optional[int] = None) -> int:
+    """
+    Move one batch of click events from the stream into click_events. Entries
+    are acknowledged and deleted only after the database commit succeeded, so a
+    failed batch is delivered again. Returns the number of entries handled.
+    """
+    entries = await read_click_events(batch_size, block_ms)
+    if not entries:
+        return 0
+    rows = [event_row(entry_id, fields) for entry_id, fields in entries if fields]
+    if rows:
+        await copy_click_events(rows)
+
+    entry_ids = [entry_id for entry_id, _ in entries]
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.xack(CLICK_EVENTS_STREAM, CLICK_EVENTS_GROUP, *entry_ids)
+        pipe.xdel(CLICK_EVENTS_STREAM, *entry_ids)
+        await pipe.execute()
+    return len(entries)
+
+
+def list_spool_segments(spool_dir: Path, current_minute: str) -> list[tuple[Path, Path]]:
+    """
+    (file, segment) pairs to load: segments of minutes that are over, and
+    segments claimed by a worker that did not finish them within SPOOL_CLAIM_TIMEOUT.
+    """
+    if not spool_dir.is_dir():
+        return []
+    found = [
+        (segment, segment)
+        for segment in sorted(spool_dir.glob(SPOOL_PATTERN))
+        if segment.name.split("-")[1] < current_minute
+    ]
+    stale = time.time() - SPOOL_CLAIM_TIMEOUT
+    for claimed in sorted(spool_dir.glob(CLAIMED_SPOOL_PATTERN)):
+        try:
+            if claimed.stat().st_mtime >= stale:
+                continue
+        except FileNotFoundError:
+            continue
+        logger.warning(f"Retrying abandoned click spool segment {claimed.name}")
+        found.append((claimed, claimed.with_name(claimed.name.split(".ndjson")[0] + ".ndjson")))
+    return found
+
+
+def claim_segment(path: Path, segment: Path) -> Optional[Path]:
+    """Rename path to this worker's claim of segment; None if another worker was faster."""
+    claimed = segment.with_name(f"{segment.name}.{CLICK_EVENTS_CONSUMER}.processing")
+    try:
+        path.rename(claimed)
+    except FileNotFoundError:
+        return None
+    # The claim time tells live claims from abandoned ones.
+    os.utime(claimed)
+    return claimed
+
+
+def read_segment(claimed: Path, segment: Path) -> list[tuple]:
+    with claimed.open(encoding="utf-8") as f:
+        return [
+            event_row(f"{segment.stem}:{line_no}", json.loads(line))
+            for line_no, line in enumerate(f, start=1) if line.strip()
+        ]
+
+
+async def ingest_spooled_events() -> int:
+    """
+    Load spool segments of minutes that are over into click_events. A segment is
+    claimed by renaming it, so concurrent workers never load the same file, and
+    claims abandoned by a dead worker are retried. Event ids follow the segment
+    and line, so a segment loaded twice is not duplicated. File access runs in
+    threads. Returns the number of events loaded.
+    """
+    current_minute = time.strftime("%Y%m%d%H%M", time.gmtime())
+    spool_dir = Path(settings.CLICK_EVENTS_SPOOL_DIR)
+    loaded = 0
+    for path, segment in await asyncio.to_thread(list_spool_segments, spool_dir, current_minute):
+        claimed = await asyncio.to_thread(claim_segment, path, segment)
+        if claimed is None:
+            continue
+        try:
+            rows = await asyncio.to_thread(read_segment, claimed, segment)
+            if rows:
+                await copy_click_events(rows)
+        except Exception:
+            await asyncio.to_thread(claimed.rename, segment)
+            raise
+        await asyncio.to_thread(claimed.unlink)
+        loaded += len(rows)
+    return loaded
+
+
+async def get_click_events_lag() -> dict:
+    """
+    Stream length, entries delivered but not acknowledged, and entries not yet
+    delivered to the group (reported by Redis 7+, None before).
+    """
+    length = await redis_client.xlen(CLICK_EVENTS_STREAM)
+    for group in await redis_client.xinfo_groups(CLICK_EVENTS_STREAM):
+        if group["name"] == CLICK_EVENTS_GROUP:
+            return {"length": length, "pending": group["pending"], "lag": group.get("lag")}
+    return {"length": length, "pending": 0, "lag": None}
+
+
+async def run_click_event_ingestion() -> None:
+    """Ingestion loop of the background task: drain the stream, then the spool."""
+    await ensure_consumer_group()
+    while True:
+        handled = await ingest_click_events(settings.CLICK_EVENTS_BATCH_SIZE, settings.CLICK_EVENTS_BLOCK_MS)
+        if handled:
+            lag = await get_click_events_lag()
+            logger.info(
+                f"Ingested {handled} click events "
+                f"(stream length {lag['length']}, pending {lag['pending']}, lag {lag['lag']})"
+            )
+            if lag["length"] > settings.CLICK_EVENTS_BACKLOG_ALERT:
+                logger.error(
+                    f"Click event backlog of {lag['length']} entries exceeds "
+                    f"{settings.CLICK_EVENTS_BACKLOG_ALERT}; ingestion is falling behind"
+                )
+        else:
+            spooled = await ingest_spooled_events()
+            if spooled:
+                logger.info(f"Ingested {spooled} spooled click events")
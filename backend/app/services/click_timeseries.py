@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timezone
+
+from backend.app.api.schemas.url import ClickTimeseries, ClickTimeseriesPoint
+from backend.app.core.config import settings
+from backend.app.services.cache import compact_timeseries, get_timeseries_buckets
+
+GRANULARITY_SECONDS = {"minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+# Span returned when no start time is given.
+DEFAULT_SPANS = {"minute": 60 * 60, "hour": 24 * 60 * 60, "day": 30 * 24 * 60 * 60}
+
+
+def bucket_starts(granularity: str, start: datetime, end: datetime) -> list[int]:
+    """Start times (epoch seconds, UTC) of the buckets overlapping [start, end]."""
+    step = GRANULARITY_SECONDS[granularity]
+    first = int(start.timestamp()) // step * step
+    return list(range(first, int(end.timestamp()) + 1, step))
+
+
+async def compact_click_timeseries(batch_size: int = 1000) -> int:
+    """
+    Run the compactor until every code with pending minute buckets is folded
+    into its hour and day buckets. Returns the number of codes compacted.
+    """
+    now = int(time.time())
+    cutoffs = {
+        "minute": now - settings.TIMESERIES_MINUTE_RETENTION,
+        "hour": now - settings.TIMESERIES_HOUR_RETENTION,
+        "day": now - settings.TIMESERIES_DAY_RETENTION,
+    }
+    compacted = 0
+    while True:
+        count = await compact_timeseries(batch_size, cutoffs)
+        compacted += count
+        if count < batch_size:
+            return compacted
+
+
+async def get_click_timeseries(
+    short_code: str, granularity: str, start: datetime, end: datetime
+) -> ClickTimeseries:
+    """
+    Clicks per bucket between start and end, zero-filled, read from the rollup
+    hashes. Minute buckets the compactor has not folded yet are added to hour
+    and day buckets here, so the series is current without waiting for it.
+    """
+    buckets = bucket_starts(granularity, start, end)
+    values, pending = await get_timeseries_buckets(short_code, granularity, buckets)
+    hits = {bucket: int(value or 0) for bucket, value in zip(buckets, values)}
+    if granularity != "minute":
+        step = GRANULARITY_SECONDS[granularity]
+        for minute, count in pending.items():
+            bucket = int(minute) // step * step
+            if bucket in hits:
+                hits[bucket] += int(count)
+    return ClickTimeseries(
+        short_code=short_code,
+        granularity=granularity,
+        points=[
+            ClickTimeseriesPoint(start=datetime.fromtimestamp(bucket, tz=timezone.utc), hits=count)
+            for bucket, count in hits.items()
+        ],
+    )
@@ -1,29 +1,23 @@
 from datetime import datetime, timezone
-from sqlalchemy.future import select
-from backend.app.models.url import URL, ExpiredURL
+from backend.app.db.queries import add_expired_clicks, move_expired
+from backend.app.services.cache import delete_cache
+from backend.app.services.url_helpers import take_pending_clicks
 
 async def move_expired_urls(session) -> list[str]:
+    """
+    Move expired links to expired_urls and drop their Redis state. Clicks counted
+    since the last sync are added to the moved rows, as when a link is expired by hand.
+    """
     now = datetime.now(timezone.utc)
-    result = await session.execute(
-        select(URL).where(URL.expires_at != None, URL.expires_at < now)
-    )
-    expired_urls = result.scalars().all()
-    moved_codes = []
-    for url in expired_urls:
-        expired = ExpiredURL(
-            id=url.id,
-            short_code=url.short_code,
-            original_url=url.original_url,
-            created_at=url.created_at,
-            expires_at=url.expires_at,
-            hit_count=url.hit_count,
-            moved_at=now,
-            created_by=url.created_by,
-            last_used_at=url.last_used_at,
-            fixed_expiration=url.fixed_expiration,
-        )
-        session.add(expired)
-        await session.delete(url)
-        moved_codes.append(url.short_code)
+    moved_codes = await move_expired(session, now)
     await session.commit()
-    return moved_codes
\ No newline at end of file
+    pending = []
+    for code in moved_codes:
+        await delete_cache(code)
+        hits, last_used_at = await take_pending_clicks(code)
+        if hits:
+            pending.append((code, hits, last_used_at))
+    if pending:
+        await add_expired_clicks(session, now, pending)
+        await session.commit()
+    return moved_codes
@@ -0,0 +1,45 @@
+import time
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.db.session import get_async_session
+from backend.app.services.cache import (
+    check_collisions,
+    get_hot_links,
+    mark_fixed_expirations,
+    rotate_hot_links,
+    store_short_codes,
+)
+from backend.app.services.url_resolve import find_active_urls
+
+
+async def pin_hot_links(count: int) -> int:
+    """
+    Make sure the hottest links of the last hour are in the redirect cache,
+    reloading evicted ones with one query. Returns the number of links reloaded.
+    """
+    codes = [code for code, _ in await get_hot_links("1h", count)]
+    if not codes:
+        return 0
+    missing = [code for code, cached in zip(codes, await check_collisions(codes)) if not cached]
+    if not missing:
+        return 0
+
+    session_gen = get_async_session()
+    session = await session_gen.__anext__()
+    try:
+        found = await find_active_urls(session, missing)
+    finally:
+        await session.close()
+    await store_short_codes({code: row.original_url for code, row in found.items()})
+    fixed_codes = [code for code, row in found.items() if row.fixed_expiration]
+    if fixed_codes:
+        await mark_fixed_expirations(fixed_codes)
+    logger.info(f"Pinned {len(found)} hot links back into the cache")
+    return len(found)
+
+
+async def refresh_hot_links() -> int:
+    """Rotate the hot links leaderboards and pin the hottest links in the cache."""
+    await rotate_hot_links(time.time())
+    return await pin_hot_links(settings.HOT_LINKS_PIN_COUNT)
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.services.cache import redis_client
+
+IDEMPOTENCY_PREFIX = "idempotency:"
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+STATE_PENDING = "pending"
+STATE_DONE = "done"
+
+
+def idempotency_key(scope: str, current_user, key: str) -> str:
+    owner = current_user.id if current_user else "anonymous"
+    return f"{IDEMPOTENCY_PREFIX}{scope}:{owner}:{key}"
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+async def store_record(redis_key: str, record: dict, expire: int) -> None:
+    await redis_client.set(redis_key, json.dumps(record), ex=expire)
+
+def replay(record: dict, response: Response):
+    response.headers["Idempotent-Replayed"] = "true"
+    if record["status_code"] != status.HTTP_200_OK:
+        raise HTTPException(
+            status_code=record["status_code"],
+            detail=record["detail"],
+            headers={"Idempotent-Replayed": "true"},
+        )
+    return record["body"]
+
+
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    current_user,
+    payload: BaseModel,
+    response: Response,
+    handler: Callable[[], Awaitable[BaseModel]],
+):
+    """
+    Run handler at most once per Idempotency-Key.
+
+    The first request claims the key with SET NX and stores its result (including
+    4xx errors) for IDEMPOTENCY_TTL seconds; retries with the same key and body get
+    that result replayed. Concurrent duplicates poll until the first request finishes
+    instead of running in parallel. Reusing a key with a different body is a 422.
+    """
+    if not key:
+        return await handler()
+
+    redis_key = idempotency_key(scope, current_user, key)
+    fingerprint = request_fingerprint(payload)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while True:
+        claimed = await redis_client.set(
+            redis_key,
+            json.dumps({"state": STATE_PENDING, "fingerprint": fingerprint}),
+            nx=True,
+            ex=settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        )
+        if claimed:
+            return await execute_and_store(redis_key, fingerprint, handler)
+
+        data = await redis_client.get(redis_key)
+        if data is None:
+            # The first request failed and released the key, try to claim it again.
+            continue
+        record = json.loads(data)
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request body."
+            )
+        if record["state"] == STATE_DONE:
+            return replay(record, response)
+        if time.monotonic() > deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed."
+            )
+        await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+
+async def execute_and_store(redis_key: str, fingerprint: str, handler: Callable[[], Awaitable[BaseModel]]):
+    try:
+        result = await handler()
+    except HTTPException as e:
+        if e.status_code < 500:
+            await store_record(redis_key, {
+                "state": STATE_DONE,
+                "fingerprint": fingerprint,
+                "status_code": e.status_code,
+                "detail": e.detail,
+            }, settings.IDEMPOTENCY_TTL)
+        else:
+            await redis_client.delete(redis_key)
+        raise
+    except BaseException:
+        # Also on cancellation (a client disconnect or shutdown), which is no
+        # Exception, so a retry does not wait for IDEMPOTENCY_LOCK_TIMEOUT.
+        await redis_client.delete(redis_key)
+        raise
+
+    await store_record(redis_key, {
+        "state": STATE_DONE,
+        "fingerprint": fingerprint,
+        "status_code": status.HTTP_200_OK,
+        "body": jsonable_encoder(result),
+    }, settings.IDEMPOTENCY_TTL)
+    logger.debug(f"Stored idempotent result for {redis_key}")
+    return result
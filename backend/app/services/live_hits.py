@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from redis.asyncio.client import PubSub
+
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.services.cache import HITS_CHANNEL_PREFIX, hits_channel, redis_client
+
+
+class HitWatcher:
+    """Clicks seen for one connected client since its last event."""
+    __slots__ = ("pending", "changed")
+
+    def __init__(self):
+        self.pending = 0
+        self.changed = asyncio.Event()
+
+
+class HitBroadcaster:
+    """
+    Fans the per-link click messages published by the redirect script out to the
+    clients connected to this worker. The worker holds a single pub/sub
+    connection and is subscribed only to links somebody is watching; a watcher
+    is a counter, so a slow client never queues up messages.
+    """
+
+    def __init__(self):
+        self.watchers: dict[str, set[HitWatcher]] = {}
+        self.pubsub: Optional[PubSub] = None
+        self.listener: Optional[asyncio.Task] = None
+
+    async def watch(self, short_code: str) -> HitWatcher:
+        watcher = HitWatcher()
+        watchers = self.watchers.setdefault(short_code, set())
+        watchers.add(watcher)
+        if len(watchers) == 1:
+            if self.pubsub is None:
+                self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            await self.pubsub.subscribe(hits_channel(short_code))
+            if self.listener is None or self.listener.done():
+                self.listener = asyncio.create_task(self.listen())
+        return watcher
+
+    async def unwatch(self, short_code: str, watcher: HitWatcher) -> None:
+        watchers = self.watchers.get(short_code)
+        if watchers is None:
+            return
+        watchers.discard(watcher)
+        if not watchers:
+            del self.watchers[short_code]
+            if self.pubsub is not None:
+                await self.pubsub.unsubscribe(hits_channel(short_code))
+
+    def dispatch(self, channel: str, data: str) -> None:
+        short_code = channel[len(HITS_CHANNEL_PREFIX):]
+        for watcher in self.watchers.get(short_code, ()):
+            watcher.pending += int(data)
+            watcher.changed.set()
+
+    async def listen(self) -> None:
+        while self.watchers:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.error(f"Error reading live hit messages: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message["type"] == "message":
+                self.dispatch(message["channel"], message["data"])
+
+    async def close(self) -> None:
+        self.watchers.clear()
+        if self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+
+hit_broadcaster = HitBroadcaster()
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def live_hit_events(
+    short_code: str,
+    hit_count: int,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one client: the current hit count first, then at most
+    one "hits" event per LIVE_HITS_INTERVAL with the clicks since the previous
+    one, and a comment line as keep-alive while the link is idle.
+    """
+    watcher = await hit_broadcaster.watch(short_code)
+    try:
+        yield sse_event("stats", {"short_code": short_code, "hit_count": hit_count})
+        last_sent = 0.0
+        while not await is_disconnected():
+            try:
+                await asyncio.wait_for(watcher.changed.wait(), timeout=settings.LIVE_HITS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            wait = last_sent + settings.LIVE_HITS_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            delta, watcher.pending = watcher.pending, 0
+            watcher.changed.clear()
+            hit_count += delta
+            last_sent = time.monotonic()
+            yield sse_event("hits", {"short_code": short_code, "delta": delta, "hit_count": hit_count})
+    finally:
+        await hit_broadcaster.unwatch(short_code, watcher)
@@ -0,0 +1,100 @@
+import math
+import re
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.auth_cache import TTLCache
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.core.security import jwt_strategy
+from backend.app.db.session import get_async_session
+from backend.app.services.api_keys import resolve_api_key
+from backend.app.services.cache import take_tokens
+
+RATE_LIMIT_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(second|minute|hour|day)\s*$")
+PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+# Share of a bucket a worker may take at once while the bucket is far from
+# empty, and how long the leased tokens stay usable locally.
+LEASE_FRACTION = 0.05
+LEASE_TTL = 1.0
+
+# bucket -> [tokens left of the worker's lease]
+leases = TTLCache(settings.RATE_LIMIT_MAX_LEASES)
+
+
+def parse_rate_limit(spec: str) -> tuple[int, int]:
+    """'60/minute' -> (60, 60): bucket capacity and the seconds it takes to refill."""
+    match = RATE_LIMIT_PATTERN.match(spec)
+    if not match:
+        raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '60/minute'")
+    return int(match.group(1)), PERIOD_SECONDS[match.group(2)]
+
+
+async def rate_limit_identity(request: Request, db: AsyncSession) -> str:
+    """The API key's or token's user if the credential is valid, else the client IP."""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        user_id = await resolve_api_key(db, api_key)
+        if user_id:
+            return f"user:{user_id}"
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = jwt_strategy.read_subject(token)
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def check_rate_limit(scope: str, identity: str, spec: str) -> int:
+    """
+    Take one token of the identity's bucket for scope. Returns 0 if the request
+    may proceed, else the seconds until it may be retried.
+
+    Tokens come from a lease held by this worker when possible. While the shared
+    bucket holds at least two leases the Redis script hands out a whole lease,
+    so clients far below their limit reach Redis about once per lease; close to
+    the limit every request takes a single token from Redis.
+    """
+    capacity, period = parse_rate_limit(spec)
+    bucket = f"{scope}:{identity}"
+    lease = leases.get(bucket)
+    if lease is not None and lease[0] > 0:
+        lease[0] -= 1
+        return 0
+
+    lease_size = max(1, int(capacity * LEASE_FRACTION))
+    granted, retry_ms = await take_tokens(bucket, capacity, capacity / period, lease_size)
+    if not granted:
+        return max(1, math.ceil(retry_ms / 1000))
+    if granted > 1:
+        leases.put(bucket, [granted - 1], LEASE_TTL)
+    return 0
+
+
+def rate_limit(scope: str):
+    """
+    Dependency limiting a route group to the RATE_LIMIT_<SCOPE> setting per
+    user (JWT or API key) or client IP. Exceeding it is a 429 with Retry-After.
+    The limiter fails open when Redis is unavailable.
+    """
+    setting = f"RATE_LIMIT_{scope.upper()}"
+
+    async def dependency(request: Request, db: AsyncSession = Depends(get_async_session)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        try:
+            identity = await rate_limit_identity(request, db)
+            retry_after = await check_rate_limit(scope, identity, getattr(settings, setting))
+        except RedisError as e:
+            logger.warning(f"Rate limit check skipped, Redis unavailable: {e}")
+            return
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded, try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    return dependency
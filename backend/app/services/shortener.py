@@ -1,7 +1,7 @@
 import hashlib
 import string
 
-from backend.app.services.cache import store_short_code, check_collision
+from backend.app.services.cache import store_short_code, check_collision, check_collisions
 
 # Character set for base62 encoding and desired code length
 CHARSET = string.ascii_letters + string.digits
@@ -45,3 +45,26 @@ async def generate_unique_short_code(url: str, max_attempts: int = 5) -> str:
             return short_code
         salt = str(attempt + 1)
     raise Exception("Unable to generate a unique short code after multiple attempts.")
+
+async def generate_short_code_candidates(
+    urls: dict[int, str], attempt: int, taken: set[str]
+) -> dict[int, str]:
+    """
+    Bulk counterpart of a single generate_unique_short_code attempt.
+    Hashes every URL with the salt of the given attempt and keeps the codes that are
+    neither already used in this batch (taken) nor present in Redis.
+    Returns a mapping of item index to candidate code; taken is updated in place.
+    """
+    salt = str(attempt) if attempt else ""
+    candidates = {}
+    for index, url in urls.items():
+        short_code = generate_hash(url, salt)
+        if short_code not in taken:
+            candidates[index] = short_code
+            taken.add(short_code)
+    collisions = await check_collisions(list(candidates.values()))
+    return {
+        index: short_code
+        for (index, short_code), collided in zip(candidates.items(), collisions)
+        if not collided
+    }
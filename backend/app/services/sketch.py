@@ -0,0 +1,54 @@
+import hashlib
+import re
+from urllib.parse import urlsplit
+
+from backend.app.core.config import settings
+
+BREAKDOWN_DIMENSIONS = ("referrer", "browser")
+DIRECT_REFERRER = "(direct)"
+UNKNOWN_BROWSER = "(unknown)"
+
+# Checked in order: most user agents also claim to be the engines listed after them.
+BROWSER_PATTERNS = (
+    ("Bot", re.compile(r"bot|crawl|spider|slurp", re.IGNORECASE)),
+    ("Edge", re.compile(r"Edg(e|A|iOS)?/")),
+    ("Opera", re.compile(r"OPR/|Opera")),
+    ("Samsung Internet", re.compile(r"SamsungBrowser/")),
+    ("Chrome", re.compile(r"Chrome/|CriOS/")),
+    ("Firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("Safari", re.compile(r"Safari/")),
+    ("curl", re.compile(r"^curl/")),
+)
+
+
+def referrer_host(referrer: str) -> str:
+    host = urlsplit(referrer).hostname if referrer else None
+    if not host:
+        return DIRECT_REFERRER
+    return host[4:] if host.startswith("www.") else host
+
+
+def browser_family(user_agent: str) -> str:
+    if not user_agent:
+        return UNKNOWN_BROWSER
+    for family, pattern in BROWSER_PATTERNS:
+        if pattern.search(user_agent):
+            return family
+    return "Other"
+
+
+def sketch_indexes(item: str) -> list[int]:
+    """Column of item in each Count-Min Sketch row, from one hash of the item."""
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=4 * settings.SKETCH_DEPTH).digest()
+    return [
+        int.from_bytes(digest[4 * row:4 * row + 4], "little") % settings.SKETCH_WIDTH
+        for row in range(settings.SKETCH_DEPTH)
+    ]
+
+
+def breakdown_items(event: dict) -> dict[str, str]:
+    """The value a click adds to each breakdown dimension."""
+    return {
+        "referrer": referrer_host(event.get("referrer", "")),
+        "browser": browser_family(event.get("user_agent", "")),
+    }
@@ -0,0 +1,52 @@
+import hashlib
+import secrets
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import Request
+
+from backend.app.services.cache import redis_client, unique_visitors_key
+
+# Outside the uv: namespace, "salt" is a valid short code. The colon also keeps
+# the key out of reach of redirects, which only look up letters and digits.
+VISITOR_SALT_PREFIX = "uvsalt:"
+# Standard error of Redis HyperLogLog counts (12 KB per dense key).
+UNIQUE_VISITORS_ERROR = 0.0081
+
+# Salt of the current UTC day, cached per process as (day, salt).
+_daily_salt: tuple[date, str] = (date.min, "")
+
+
+async def get_daily_salt(day: date) -> str:
+    """
+    Random salt shared by all workers for one UTC day. It is stored in Redis
+    only until the day is over, so fingerprints cannot be recomputed later.
+    """
+    global _daily_salt
+    if _daily_salt[0] == day:
+        return _daily_salt[1]
+    key = f"{VISITOR_SALT_PREFIX}{day:%Y%m%d}"
+    await redis_client.set(key, secrets.token_hex(16), nx=True, ex=2 * 24 * 60 * 60)
+    salt = await redis_client.get(key)
+    _daily_salt = (day, salt)
+    return salt
+
+
+async def visitor_fingerprint(request: Request) -> str:
+    """Salted hash of client IP and user agent; no visitor data is stored in clear."""
+    salt = await get_daily_salt(datetime.now(timezone.utc).date())
+    ip = request.client.host if request.client else ""
+    user_agent = request.headers.get("user-agent", "")
+    return hashlib.sha256(f"{salt}|{ip}|{user_agent}".encode("utf-8")).hexdigest()[:32]
+
+
+async def count_unique_visitors(short_code: str, start: date, end: date) -> int:
+    """
+    Approximate distinct visitors of a link between two UTC days (inclusive),
+    from one PFCOUNT over the day keys. Because the salt rotates daily, a
+    visitor returning on another day is counted again.
+    """
+    keys = [
+        unique_visitors_key(short_code, start + timedelta(days=offset))
+        for offset in range((end - start).days + 1)
+    ]
+    return await redis_client.pfcount(*keys)
@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.api.schemas.url import URLBatchItemResult
+from backend.app.models.url import URL
+from backend.app.services.cache import store_short_codes
+from backend.app.services.shortener import generate_short_code_candidates
+from backend.app.services.url_utils import create_url_response, URL_RESPONSE_COLUMNS
+
+MAX_CODE_ATTEMPTS = 5
+# Six bind parameters per row keeps a chunk below asyncpg's 32767 parameter limit.
+INSERT_CHUNK_SIZE = 5000
+
+
+async def find_existing_urls(db: AsyncSession, original_urls: list[str], user_id) -> dict:
+    """Map each original URL the user already shortened to one of its rows, in one query."""
+    result = await db.execute(
+        select(*URL_RESPONSE_COLUMNS)
+        .where(URL.created_by == user_id, URL.original_url.in_(original_urls))
+    )
+    existing = {}
+    for row in result:
+        existing.setdefault(row.original_url, row)
+    return existing
+
+
+async def insert_url_rows(db: AsyncSession, rows: list[dict]) -> dict:
+    """
+    Insert rows with multi-row INSERTs, skipping short codes that already exist.
+    Returns the inserted rows keyed by short code.
+    """
+    inserted = {}
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = (
+            insert(URL)
+            .values(rows[start:start + INSERT_CHUNK_SIZE])
+            .on_conflict_do_nothing(index_elements=[URL.short_code])
+            .returning(*URL_RESPONSE_COLUMNS)
+        )
+        result = await db.execute(stmt)
+        inserted.update({row.short_code: row for row in result})
+    return inserted
+
+
+async def create_urls_batch(
+    db: AsyncSession, original_urls: list[str], current_user: Optional[object]
+) -> list[URLBatchItemResult]:
+    """
+    Shorten many URLs at once with a fixed number of round trips:
+    one dedup query for authenticated users, then per salt attempt one Redis
+    collision check and one INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    one commit and one MSET to populate the cache.
+    Results are returned in input order.
+    """
+    results: list[Optional[URLBatchItemResult]] = [None] * len(original_urls)
+    user_id = current_user.id if current_user else None
+
+    pending: dict[int, str] = dict(enumerate(original_urls))
+    if user_id is not None:
+        existing = await find_existing_urls(db, list(set(original_urls)), user_id)
+        # Repeated URLs within the batch are shortened once for the same user.
+        first_index: dict[str, int] = {}
+        for index, original_url in enumerate(original_urls):
+            if original_url in existing:
+                results[index] = URLBatchItemResult(
+                    index=index, url=create_url_response(existing[original_url])
+                )
+                del pending[index]
+            elif original_url in first_index:
+                del pending[index]
+            else:
+                first_index[original_url] = index
+
+    now = datetime.now(timezone.utc)
+    expires_at = (now + timedelta(minutes=settings.URL_EXPIRE_MINUTES)
+                  if settings.URL_EXPIRE_MINUTES > 0 else None)
+
+    created: dict[int, object] = {}
+    taken: set[str] = set()
+    for attempt in range(MAX_CODE_ATTEMPTS):
+        if not pending:
+            break
+        candidates = await generate_short_code_candidates(pending, attempt, taken)
+        if not candidates:
+            continue
+        inserted = await insert_url_rows(db, [
+            {
+                "id": uuid.uuid4(),
+                "short_code": short_code,
+                "original_url": pending[index],
+                "created_at": now,
+                "expires_at": expires_at,
+                "created_by": user_id,
+            }
+            for index, short_code in candidates.items()
+        ])
+        for index, short_code in candidates.items():
+            if short_code in inserted:
+                created[index] = inserted[short_code]
+                del pending[index]
+
+    await db.commit()
+    await store_short_codes({row.short_code: row.original_url for row in created.values()})
+
+    for index, row in created.items():
+        results[index] = URLBatchItemResult(index=index, url=create_url_response(row))
+    for index in pending:
+        results[index] = URLBatchItemResult(
+            index=index, error="Unable to generate a unique short code after multiple attempts."
+        )
+    if user_id is not None:
+        for index, original_url in enumerate(original_urls):
+            if results[index] is None:
+                source = results[first_index[original_url]]
+                results[index] = URLBatchItemResult(index=index, url=source.url, error=source.error)
+    return results
@@ -1,45 +1,55 @@
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import update
-from sqlalchemy.future import select
+from typing import Optional
 from backend.app.core.config import settings
+from backend.app.db.queries import update_click_counts
 from backend.app.db.session import get_async_session
-from backend.app.models.url import URL
+from backend.app.services.cache import drain_click_counts, restore_click_counts, delete_click_stats
 from backend.app.core.logging_config import logger
 
+def build_click_params(counts: list[tuple[str, int, float]]) -> list[tuple[str, int, datetime, datetime]]:
+    params = []
+    for code, hits, last_used in counts:
+        last_used_at = datetime.fromtimestamp(last_used, tz=timezone.utc)
+        params.append((code, hits, last_used_at, last_used_at + timedelta(minutes=settings.URL_EXPIRE_MINUTES)))
+    return params
 
-async def update_url_background(short_code: str) -> None:
-    session_gen = get_async_session()
-    session = await session_gen.__anext__()
-    try:
-        result = await session.execute(select(URL).where(URL.short_code == short_code))
-        url_entry = result.scalar_one_or_none()
-        if not url_entry:
-            return
 
-        if url_entry.fixed_expiration:
-            stmt = (
-                update(URL)
-                .where(URL.short_code == short_code)
-                .values(
-                    hit_count=URL.hit_count + 1
-                )
-            )
-        else:
-            new_expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.URL_EXPIRE_MINUTES)
-            stmt = (
-                update(URL)
-                .where(URL.short_code == short_code)
-                .values(
-                    expires_at=new_expires_at,
-                    hit_count=URL.hit_count + 1
-                )
-            )
-        logger.debug(f"Updating URL {short_code} in background")
-        await session.execute(stmt)
-        await session.commit()
-        logger.info(f"Successfully updated URL {short_code}")
-    except Exception as e:
-        logger.error(f"Error updating URL {short_code}: {e}")
-        raise
-    finally:
-        await session.close()
\ No newline at end of file
+async def take_pending_clicks(short_code: str) -> tuple[int, Optional[datetime]]:
+    """
+    Drop the Redis click counters of short_code and return the clicks that were
+    not synced yet as (hits, last_used_at), so they survive a delete or a code change.
+    """
+    pending_hits, last_used = await delete_click_stats(short_code)
+    if not pending_hits:
+        return 0, None
+    return pending_hits, datetime.fromtimestamp(last_used, tz=timezone.utc)
+
+
+async def sync_click_counts(batch_size: int = 1000) -> int:
+    """
+    Move click counters accumulated by the redirect script from Redis into Postgres.
+    Counters are put back into Redis if the database write fails.
+    Returns the number of short codes that were updated.
+    """
+    synced = 0
+    while True:
+        counts = await drain_click_counts(batch_size)
+        if not counts:
+            return synced
+
+        session_gen = get_async_session()
+        session = await session_gen.__anext__()
+        try:
+            logger.debug(f"Syncing click counts for {len(counts)} URLs")
+            await update_click_counts(session, build_click_params(counts))
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Error syncing click counts: {e}")
+            await restore_click_counts(counts)
+            raise
+        finally:
+            await session.close()
+
+        synced += len(counts)
+        if len(counts) < batch_size:
+            return synced
@@ -0,0 +1,256 @@
+import csv
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.api.schemas.url import URLCustomCreate, URLImportError, URLImportReport
+from backend.app.core.config import settings
+from backend.app.core.logging_config import logger
+from backend.app.services.cache import redis_client, store_short_codes, mark_fixed_expirations
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_PROGRESS_PREFIX = "import:"
+IMPORT_PROGRESS_TTL = 24 * 60 * 60
+# Only the first errors are kept in the report, the counters cover all of them.
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "url_import_staging"
+STAGING_COLUMNS = ["line_no", "id", "short_code", "original_url", "expires_at", "fixed_expiration"]
+
+create_staging_stmt = text(f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        line_no integer NOT NULL,
+        id uuid NOT NULL,
+        short_code varchar NOT NULL,
+        original_url varchar NOT NULL,
+        expires_at timestamptz NOT NULL,
+        fixed_expiration boolean NOT NULL
+    ) ON COMMIT DELETE ROWS
+""")
+
+# Earlier lines win when the same short code appears twice in one chunk.
+merge_staging_stmt = text(f"""
+    INSERT INTO urls (id, short_code, original_url, created_at, expires_at, created_by, fixed_expiration)
+    SELECT id, short_code, original_url, now(), expires_at, CAST(:created_by AS uuid), fixed_expiration
+    FROM {STAGING_TABLE}
+    ORDER BY line_no
+    ON CONFLICT (short_code) DO NOTHING
+    RETURNING short_code, original_url, fixed_expiration
+""")
+
+ProgressCallback = Callable[[URLImportReport], Awaitable[None]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into decoded lines without buffering the whole stream."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """
+    Yield (first line number, values) per CSV record. A quoted field may span
+    lines, so lines are collected until their quotes balance: quotes inside a
+    field are doubled, so the count is odd only while a field is open.
+    """
+    pending: list[str] = []
+    quotes = 0
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not pending and not line.strip():
+            continue
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        yield line_no - len(pending) + 1, next(csv.reader(part + "\n" for part in pending))
+        pending, quotes = [], 0
+    if pending:
+        yield line_no - len(pending) + 1, "Unterminated quoted field"
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple[int, object]]:
+    """
+    Yield (line number, record) pairs from an NDJSON or CSV stream.
+    CSV input needs a header row; a record is a dict, or an error message for unparsable lines.
+    """
+    if fmt == "ndjson":
+        line_no = 0
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, f"Invalid JSON: {e}"
+        return
+
+    header = None
+    async for line_no, values in iter_csv_rows(chunks):
+        if isinstance(values, str):
+            yield line_no, values
+            continue
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield line_no, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        record = dict(zip(header, values))
+        if record.get("fixed_expiration", "") == "":
+            record.pop("fixed_expiration", None)
+        yield line_no, record
+
+
+def validate_record(record: object, now: datetime) -> URLCustomCreate:
+    if isinstance(record, str):
+        raise ValueError(record)
+    if not isinstance(record, dict):
+        raise ValueError("Each row must be an object.")
+    try:
+        custom_data = URLCustomCreate(**record)
+    except ValidationError as e:
+        raise ValueError("; ".join(err["msg"] for err in e.errors()))
+    except TypeError as e:
+        raise ValueError(str(e))
+    if custom_data.expiration.tzinfo is None:
+        custom_data.expiration = custom_data.expiration.replace(tzinfo=timezone.utc)
+    if custom_data.expiration <= now:
+        raise ValueError("Expiration time must be in the future.")
+    return custom_data
+
+
+class URLImporter:
+    """
+    Imports URLCustomCreate rows chunk by chunk: each chunk is validated, copied
+    into a temporary staging table with COPY, merged into urls with
+    ON CONFLICT DO NOTHING, committed and then written to the cache.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        created_by: Optional[uuid.UUID],
+        job_id: Optional[str] = None,
+        chunk_size: int = settings.URL_IMPORT_CHUNK_SIZE,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        self.db = db
+        self.created_by = created_by
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.report = URLImportReport(job_id=job_id or uuid.uuid4().hex, status="running")
+        self.started = time.monotonic()
+
+    def add_error(self, line: int, error: str, short_code: Optional[str] = None) -> None:
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(URLImportError(line=line, short_code=short_code, error=error))
+
+    async def run(self, chunks: AsyncIterator[bytes], fmt: str) -> URLImportReport:
+        try:
+            chunk = []
+            async for line_no, record in iter_records(chunks, fmt):
+                chunk.append((line_no, record))
+                if len(chunk) >= self.chunk_size:
+                    await self.load_chunk(chunk)
+                    chunk = []
+            if chunk:
+                await self.load_chunk(chunk)
+            self.report.status = "completed"
+        except Exception as e:
+            self.report.status = "failed"
+            self.add_error(self.report.rows_read, f"Import aborted: {e}")
+            logger.error(f"Import {self.report.job_id} failed: {e}")
+            await self.db.rollback()
+        await self.publish_progress()
+        return self.report
+
+    async def load_chunk(self, chunk: list[tuple[int, object]]) -> None:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for line_no, record in chunk:
+            try:
+                custom_data = validate_record(record, now)
+            except ValueError as e:
+                self.report.invalid += 1
+                self.add_error(line_no, str(e), record.get("short_code") if isinstance(record, dict) else None)
+                continue
+            rows.append((
+                line_no,
+                uuid.uuid4(),
+                custom_data.short_code,
+                custom_data.original_url,
+                custom_data.expiration,
+                custom_data.fixed_expiration,
+            ))
+        self.report.rows_read += len(chunk)
+
+        if rows:
+            inserted = await self.copy_and_merge(rows)
+            for line_no, _, short_code, *_ in rows:
+                if inserted.pop(short_code, None) is None:
+                    self.report.conflicts += 1
+                    self.add_error(line_no, "Short code already exists.", short_code)
+                else:
+                    self.report.imported += 1
+        await self.publish_progress()
+
+    async def copy_and_merge(self, rows: list[tuple]) -> dict[str, object]:
+        """Load rows through the staging table and return the merged rows by short code."""
+        await self.db.execute(create_staging_stmt)
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=rows, columns=STAGING_COLUMNS
+        )
+        result = await self.db.execute(merge_staging_stmt, {"created_by": self.created_by})
+        merged = {row.short_code: row for row in result}
+        await self.db.commit()
+
+        await store_short_codes({code: row.original_url for code, row in merged.items()})
+        fixed_codes = [code for code, row in merged.items() if row.fixed_expiration]
+        if fixed_codes:
+            await mark_fixed_expirations(fixed_codes)
+        return merged
+
+    async def publish_progress(self) -> None:
+        elapsed = time.monotonic() - self.started
+        self.report.elapsed_seconds = round(elapsed, 3)
+        self.report.rows_per_second = round(self.report.rows_read / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"Import {self.report.job_id}: {self.report.rows_read} rows read, "
+            f"{self.report.imported} imported, {self.report.conflicts} conflicts, "
+            f"{self.report.invalid} invalid ({self.report.rows_per_second} rows/s)"
+        )
+        if self.on_progress:
+            await self.on_progress(self.report)
+
+
+def import_progress_key(owner_id: uuid.UUID, job_id: str) -> str:
+    """Job ids are chosen by clients, so progress is kept per owner."""
+    return f"{IMPORT_PROGRESS_PREFIX}{owner_id}:{job_id}"
+
+
+async def store_import_progress(owner_id: uuid.UUID, report: URLImportReport) -> None:
+    await redis_client.set(
+        import_progress_key(owner_id, report.job_id), report.model_dump_json(), ex=IMPORT_PROGRESS_TTL
+    )
+
+
+async def get_import_progress(owner_id: uuid.UUID, job_id: str) -> Optional[URLImportReport]:
+    data = await redis_client.get(import_progress_key(owner_id, job_id))
+    return URLImportReport.model_validate_json(data) if data else None
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import String, any_, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.models.url import URL
+from backend.app.services.url_utils import is_short_code
+from backend.app.services.cache import (
+    get_short_codes,
+    mark_fixed_expirations,
+    resolve_and_count_many,
+    store_short_codes,
+)
+
+
+async def find_active_urls(db: AsyncSession, codes: list[str]) -> dict:
+    """Load the non-expired rows for codes in one WHERE short_code = ANY(...) query."""
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(URL.short_code, URL.original_url, URL.fixed_expiration)
+        .where(URL.short_code == any_(cast(codes, ARRAY(String))))
+        .where((URL.expires_at.is_(None)) | (URL.expires_at > now))
+    )
+    return {row.short_code: row for row in result}
+
+
+async def resolve_short_codes(
+    db: AsyncSession, codes: list[str], count_clicks: bool = True
+) -> dict[str, Optional[str]]:
+    """
+    Resolve many short codes at once: one Redis round trip for all of them (MGET,
+    or the pipelined redirect script when the lookups count as clicks), then one
+    query for the cache misses, which are written back to the cache.
+    Unknown and expired codes map to None, as do strings that are no short
+    code, which never reach Redis.
+    """
+    resolved = dict.fromkeys(codes)
+    codes = [code for code in resolved if is_short_code(code)]
+    if not codes:
+        return resolved
+    ttl = settings.URL_EXPIRE_MINUTES * 60
+    if count_clicks:
+        cached = await resolve_and_count_many(codes, ttl)
+    else:
+        cached = await get_short_codes(codes)
+    resolved.update(zip(codes, cached))
+
+    misses = [code for code, url in zip(codes, cached) if url is None]
+    if not misses:
+        return resolved
+    found = await find_active_urls(db, misses)
+    if not found:
+        return resolved
+
+    await store_short_codes({code: row.original_url for code, row in found.items()})
+    fixed_codes = [code for code, row in found.items() if row.fixed_expiration]
+    if fixed_codes:
+        await mark_fixed_expirations(fixed_codes)
+    if count_clicks:
+        await resolve_and_count_many(list(found), ttl)
+    for code, row in found.items():
+        resolved[code] = row.original_url
+    return resolved
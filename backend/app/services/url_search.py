@@ -0,0 +1,84 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import func, union_all
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.url import URL, ExpiredURL, URL_PREFIX_INDEX_LENGTH
+from backend.app.services.url_utils import apply_keyset_page, split_keyset_page
+
+
+def normalize_host(value: str) -> str:
+    """Normalize a host or URL the same way as the generated host column."""
+    value = value.strip().lower()
+    host = urlsplit(value if "://" in value else f"//{value}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_columns(model) -> tuple:
+    return (model.id, model.short_code, model.original_url, model.created_at, model.expires_at)
+
+
+def search_filters(
+    model, original_url: Optional[str], host: Optional[str], prefix: Optional[str]
+) -> list:
+    """
+    Filters that can be answered from the host or prefix indexes. The left()
+    comparisons match the prefix index expression, the full-column comparisons
+    keep results exact for values longer than the indexed prefix.
+    """
+    indexed_url = func.left(model.original_url, URL_PREFIX_INDEX_LENGTH)
+    filters = []
+    if original_url is not None:
+        filters += [
+            indexed_url == original_url[:URL_PREFIX_INDEX_LENGTH],
+            model.original_url == original_url,
+        ]
+    if host is not None:
+        filters.append(model.host == normalize_host(host))
+    if prefix is not None:
+        filters += [
+            indexed_url.like(escape_like(prefix[:URL_PREFIX_INDEX_LENGTH]) + "%", escape="\\"),
+            model.original_url.like(escape_like(prefix) + "%", escape="\\"),
+        ]
+    return filters
+
+
+async def search_urls(
+    db: AsyncSession,
+    original_url: Optional[str] = None,
+    host: Optional[str] = None,
+    prefix: Optional[str] = None,
+    include_expired: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> tuple[list, Optional[str]]:
+    """
+    Find links by exact URL, host or URL prefix, newest first, one keyset page at a time.
+    With include_expired both tables are paged separately and merged in one UNION ALL.
+    Raises ValueError for an invalid cursor.
+    """
+    models = (URL, ExpiredURL) if include_expired else (URL,)
+    pages = [
+        apply_keyset_page(
+            select(*search_columns(model)).where(*search_filters(model, original_url, host, prefix)),
+            model, cursor, limit,
+        )
+        for model in models
+    ]
+    if len(pages) == 1:
+        stmt = pages[0]
+    else:
+        merged = union_all(*(select(page.subquery()) for page in pages)).subquery()
+        stmt = (
+            select(merged)
+            .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+            .limit(limit + 1)
+        )
+    result = await db.execute(stmt)
+    return split_keyset_page(result.all(), limit)
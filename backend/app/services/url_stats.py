@@ -0,0 +1,82 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import String, any_, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.api.schemas.url import URLStats
+from backend.app.core.config import settings
+from backend.app.models.url import URL
+from backend.app.services.cache import get_cached_stats, load_stats
+
+
+def build_stats(original_url: str, created_at: str, hit_count, last_used: str) -> URLStats:
+    return URLStats(
+        original_url=original_url,
+        created_at=datetime.fromisoformat(created_at),
+        hit_count=int(hit_count),
+        last_used_at=datetime.fromtimestamp(float(last_used), tz=timezone.utc) if last_used else None,
+    )
+
+
+async def get_urls_stats(db: AsyncSession, codes: list[str]) -> dict[str, Optional[URLStats]]:
+    """
+    Stats for many codes: one pipelined read of the Redis stats hashes, then one
+    short_code = ANY(...) query for the misses, which are cached for STATS_CACHE_TTL
+    seconds. Unknown codes map to None.
+    """
+    codes = list(dict.fromkeys(codes))
+    stats: dict[str, Optional[URLStats]] = {}
+    misses = []
+    for code, cached in zip(codes, await get_cached_stats(codes)):
+        if cached:
+            stats[code] = build_stats(
+                cached["original_url"], cached["created_at"], cached["hit_count"], cached["last_used"]
+            )
+        else:
+            stats[code] = None
+            misses.append(code)
+    if not misses:
+        return stats
+
+    result = await db.execute(
+        select(URL.short_code, URL.original_url, URL.created_at, URL.hit_count, URL.last_used_at)
+        .where(URL.short_code == any_(cast(misses, ARRAY(String))))
+    )
+    entries = [
+        (
+            row.short_code,
+            row.original_url,
+            row.created_at.isoformat(),
+            row.hit_count,
+            row.last_used_at.timestamp() if row.last_used_at else None,
+        )
+        for row in result
+    ]
+    if not entries:
+        return stats
+    loaded = await load_stats(entries, settings.STATS_CACHE_TTL)
+    for (code, original_url, created_at, _, _), (hit_count, last_used) in zip(entries, loaded):
+        stats[code] = build_stats(original_url, created_at, hit_count, last_used)
+    return stats
+
+
+def etag_response(request: Request, content) -> Response:
+    """
+    Serialize content as JSON with an ETag of its body, or answer 304 Not Modified
+    when the client already holds that version (If-None-Match).
+    """
+    body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, cast, func, literal, null, union_all
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.api.schemas.url import URLSummaryResponse, URLSummarySection, URLSummaryTotals
+from backend.app.models.url import URL, ExpiredURL
+from backend.app.services.url_utils import create_url_list_response, split_keyset_page, url_list_columns
+
+
+def labeled_columns(model, label: str) -> tuple:
+    """url_list_columns with a label column and a moved_at column for both tables."""
+    columns = url_list_columns(model)
+    if model is URL:
+        columns += (cast(null(), DateTime(timezone=True)).label("moved_at"),)
+    return (literal(label).label("section"),) + columns
+
+
+def ranked_page(model, label: str, order_by: tuple, limit: int, *criteria):
+    """One labelled part of a UNION ALL: its first rows and their position within the part."""
+    page = (
+        select(*labeled_columns(model, label), func.row_number().over(order_by=order_by).label("position"))
+        .where(*criteria)
+        .order_by(*order_by)
+        .limit(limit)
+        .subquery()
+    )
+    return select(page)
+
+
+def ordered_union(*parts):
+    """UNION ALL of ranked pages; SQL keeps no row order across it, so order explicitly."""
+    union = union_all(*parts).subquery()
+    return select(union).order_by(union.c.section, union.c.position)
+
+
+def sections_stmt(user_id, limit: int):
+    """First page of both sections in one UNION ALL, newest first within each section."""
+    return ordered_union(*(
+        ranked_page(
+            model, label, (model.created_at.desc(), model.id.desc()), limit + 1, model.created_by == user_id
+        )
+        for label, model in (("active", URL), ("expired", ExpiredURL))
+    ))
+
+
+def totals_stmt(user_id, now: datetime, soon: datetime):
+    def scalar(model, column, *criteria):
+        return select(column).where(model.created_by == user_id, *criteria).scalar_subquery()
+
+    return select(
+        scalar(URL, func.count()).label("active_count"),
+        scalar(ExpiredURL, func.count()).label("expired_count"),
+        scalar(URL, func.coalesce(func.sum(URL.hit_count), 0)).label("active_hits"),
+        scalar(ExpiredURL, func.coalesce(func.sum(ExpiredURL.hit_count), 0)).label("expired_hits"),
+        scalar(URL, func.count(), URL.expires_at > now, URL.expires_at <= soon).label("expiring_soon_count"),
+    )
+
+
+def highlights_stmt(user_id, top_n: int, now: datetime, soon: datetime):
+    """Top links by hits and the links expiring next, in one UNION ALL."""
+    return ordered_union(
+        ranked_page(URL, "top", (URL.hit_count.desc(), URL.created_at.desc()), top_n, URL.created_by == user_id),
+        ranked_page(
+            URL, "expiring", (URL.expires_at,), top_n,
+            URL.created_by == user_id, URL.expires_at > now, URL.expires_at <= soon,
+        ),
+    )
+
+
+async def get_url_summary(
+    db: AsyncSession, user_id, limit: int, top_n: int, expiring_within: timedelta
+) -> URLSummaryResponse:
+    """
+    Dashboard data in three round trips: both list sections, the SQL aggregates
+    and the highlight lists. Sections continue through /my_urls with next_cursor.
+    """
+    now = datetime.now(timezone.utc)
+    soon = now + expiring_within
+
+    grouped = {"active": [], "expired": [], "top": [], "expiring": []}
+    for stmt in (sections_stmt(user_id, limit), highlights_stmt(user_id, top_n, now, soon)):
+        result = await db.execute(stmt)
+        for row in result:
+            grouped[row.section].append(row)
+    totals = (await db.execute(totals_stmt(user_id, now, soon))).one()
+
+    sections = {}
+    for label in ("active", "expired"):
+        rows, next_cursor = split_keyset_page(grouped[label], limit)
+        sections[label] = URLSummarySection(
+            items=[create_url_list_response(row) for row in rows], next_cursor=next_cursor
+        )
+    return URLSummaryResponse(
+        **sections,
+        totals=URLSummaryTotals(**totals._asdict()),
+        top_links=[create_url_list_response(row) for row in grouped["top"]],
+        expiring_soon=[create_url_list_response(row) for row in grouped["expiring"]],
+    )
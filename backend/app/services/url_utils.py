@@ -1,11 +1,66 @@
+import base64
+import uuid
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.future import select
+from sqlalchemy import Row, update, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.core.config import settings
-from backend.app.api.schemas.url import URLResponse, URLListResponse
-from backend.app.models.url import URL
+from backend.app.api.schemas.url import SHORT_CODE_PATTERN, URLResponse, URLListResponse
+from backend.app.models.url import URL, ExpiredURL
+
+# Columns needed to build a URLResponse, returned straight from INSERT/UPDATE statements.
+URL_RESPONSE_COLUMNS = (URL.short_code, URL.original_url, URL.created_at, URL.expires_at)
+
+def url_list_columns(model) -> tuple:
+    """Columns needed to build a URLListResponse (plus id for the keyset cursor)."""
+    columns = (
+        model.id,
+        model.short_code,
+        model.original_url,
+        model.created_at,
+        model.expires_at,
+        model.hit_count,
+        model.last_used_at,
+        model.fixed_expiration,
+    )
+    if model is ExpiredURL:
+        columns += (ExpiredURL.moved_at,)
+    return columns
+
+def encode_cursor(created_at: datetime, url_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{url_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for cursors that were not produced by encode_cursor."""
+    try:
+        created_at, url_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(url_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def apply_keyset_page(stmt, model, cursor: Optional[str], limit: int):
+    """
+    Order stmt newest first (created_at DESC, id DESC) and continue after cursor.
+    One extra row is fetched so the caller can tell whether another page exists.
+    """
+    if cursor:
+        created_at, url_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, url_id))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+def split_keyset_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """Return the rows of the page and the cursor of the next page, if there is one."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def is_short_code(code: str) -> bool:
+    return SHORT_CODE_PATTERN.fullmatch(code) is not None
 
 def build_full_short_url(short_code: str) -> str:
     return f"{settings.APP_URL}{short_code}"
@@ -31,9 +86,28 @@ def create_url_list_response(url) -> URLListResponse:
         moved_at=getattr(url, "moved_at", None)
     )
 
-async def get_url_by_shortcode(db: AsyncSession, short_code: str) -> Optional[URL]:
-    result = await db.execute(select(URL).where(URL.short_code == short_code))
-    return result.scalar_one_or_none()
+async def insert_url(db: AsyncSession, values: dict, skip_existing_code: bool = False) -> Optional[Row]:
+    """
+    Insert a URL row and get its response columns back in the same round trip.
+    With skip_existing_code an existing short code returns None instead of raising.
+    """
+    stmt = insert(URL).values(**values)
+    if skip_existing_code:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[URL.short_code])
+    result = await db.execute(stmt.returning(*URL_RESPONSE_COLUMNS))
+    return result.one_or_none()
+
+async def update_url_fields(db: AsyncSession, url_id, values: dict) -> Optional[Row]:
+    """Update a URL row by id and get its response columns back in the same round trip."""
+    stmt = (
+        update(URL)
+        .where(URL.id == url_id)
+        .values(**values)
+        .returning(*URL_RESPONSE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.one_or_none()
 
 def check_user_ownership(url_entry: URL, current_user: Optional) -> bool:
     if current_user is None:
@@ -10,7 +10,8 @@ from helpers import (
     delete_url,
     get_url_stats,
     get_current_user_info,
-    fetch_url_list
+    fetch_url_summary,
+    fetch_all_urls
 )
 st.set_page_config(page_title="Fast-Link App", layout="wide")
 
@@ -138,17 +139,31 @@ def page_delete():
 def page_url_list():
     st.header("My URL List")
     token = st.session_state.get("token")
-    active_urls, expired_urls = fetch_url_list(token)
-    st.subheader("Active URLs")
-    if active_urls:
-        st.table(active_urls)
-    else:
-        st.write("No active URLs found.")
-    st.subheader("Expired URLs")
-    if expired_urls:
-        st.table(expired_urls)
-    else:
-        st.write("No expired URLs found.")
+    summary = fetch_url_summary(token)
+    if not summary:
+        return
+    totals = summary["totals"]
+    cols = st.columns(4)
+    cols[0].metric("Active URLs", totals["active_count"])
+    cols[1].metric("Expired URLs", totals["expired_count"])
+    cols[2].metric("Total Hits", totals["active_hits"] + totals["expired_hits"])
+    cols[3].metric("Expiring Soon", totals["expiring_soon_count"])
+    if summary["top_links"]:
+        st.subheader("Top Links")
+        st.table(summary["top_links"])
+    if summary["expiring_soon"]:
+        st.subheader("Expiring Soon")
+        st.table(summary["expiring_soon"])
+    for url_type, title in (("active", "Active URLs"), ("expired", "Expired URLs")):
+        st.subheader(title)
+        section = summary[url_type]
+        urls = section["items"]
+        if section["next_cursor"] and st.checkbox(f"Load all {url_type} URLs", key=f"all_{url_type}"):
+            urls = fetch_all_urls(url_type, token)
+        if urls:
+            st.table(urls)
+        else:
+            st.write(f"No {url_type} URLs found.")
 
 def page_stats():
     st.header("Short URL Statistics")
@@ -1,5 +1,5 @@
 import streamlit as st
-from typing import Optional, Tuple
+from typing import Optional
 import requests
 
 from logging_config import logger
@@ -8,33 +8,45 @@ from config import settings
 FASTAPI_URL = f"{settings.FASTAPI_URL}:{settings.FASTAPI_PORT}"
 
 
-def fetch_url_list(token: Optional[str] = None) -> Tuple[list, list]:
+def fetch_url_pages(url_type: str, headers: dict) -> list:
+    """Collect every page of /my_urls by following the X-Next-Cursor header."""
+    endpoint = f"{FASTAPI_URL}/my_urls"
+    params = {"url_type": url_type}
+    urls = []
+    while True:
+        response = requests.get(endpoint, params=params, headers=headers)
+        if response.status_code != 200:
+            st.error(f"Failed to fetch {url_type} URLs: {response.status_code}")
+            return urls
+        urls.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return urls
+        params["cursor"] = cursor
+
+
+def fetch_url_summary(token: Optional[str] = None) -> dict:
+    url = f"{FASTAPI_URL}/my_urls/summary"
     headers = {"Authorization": f"Bearer {token}"} if token else {}
-    active_url_endpoint = f"{FASTAPI_URL}/my_urls?url_type=active"
-    expired_url_endpoint = f"{FASTAPI_URL}/my_urls?url_type=expired"
     try:
-        active_response = requests.get(active_url_endpoint, headers=headers)
-        if active_response.status_code == 200:
-            active_urls = active_response.json()
+        response = requests.get(url, headers=headers)
+        if response.status_code == 200:
+            return response.json()
         else:
-            st.error(f"Failed to fetch active URLs: {active_response.status_code}")
-            active_urls = []
+            st.error(f"Failed to fetch URL summary: {response.status_code}")
+            return {}
     except Exception as e:
-        st.error(f"Error fetching active URLs: {e}")
-        active_urls = []
+        st.error(f"Error fetching URL summary: {e}")
+        return {}
 
+
+def fetch_all_urls(url_type: str, token: Optional[str] = None) -> list:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
     try:
-        expired_response = requests.get(expired_url_endpoint, headers=headers)
-        if expired_response.status_code == 200:
-            expired_urls = expired_response.json()
-        else:
-            st.error(f"Failed to fetch expired URLs: {expired_response.status_code}")
-            expired_urls = []
+        return fetch_url_pages(url_type, headers)
     except Exception as e:
-        st.error(f"Error fetching expired URLs: {e}")
-        expired_urls = []
-
-    return active_urls, expired_urls
+        st.error(f"Error fetching {url_type} URLs: {e}")
+        return []
 
 
 def get_url_stats(short_code: str, token: Optional[str] = None) -> dict:
@@ -0,0 +1,85 @@
+"""
+Redirect latency during a login storm.
+
+Registers a few users, then runs concurrent login loops against a running API
+while a single client keeps resolving one short link, and prints redirect
+latency percentiles. Compare a server started with PASSWORD_HASH_WORKERS=0
+(hashing on the event loop) against the default pool:
+
+    python scripts/bench_login_storm.py --base-url http://localhost:8000 --logins 32
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+
+import httpx
+
+logger = logging.getLogger("bench_login_storm")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def login_loop(client: httpx.AsyncClient, email: str, password: str, stop: asyncio.Event) -> int:
+    logins = 0
+    while not stop.is_set():
+        response = await client.post("/auth/jwt/login", data={"username": email, "password": password})
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+
+async def redirect_loop(client: httpx.AsyncClient, short_code: str, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"/{short_code}", params={"no_redirect": "true"})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+
+async def main(args) -> None:
+    limits = httpx.Limits(max_connections=args.logins + 8)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        password = "bench-password"
+        emails = [f"bench-{uuid.uuid4().hex[:12]}@example.com" for _ in range(args.users)]
+        for email in emails:
+            response = await client.post("/auth/register", json={"email": email, "password": password})
+            response.raise_for_status()
+        response = await client.post("/url", json={"original_url": "https://example.com/bench"})
+        response.raise_for_status()
+        short_code = response.json()["short_code"]
+
+        for storm in (False, True):
+            stop = asyncio.Event()
+            redirects = asyncio.create_task(redirect_loop(client, short_code, stop))
+            logins = [
+                asyncio.create_task(login_loop(client, emails[i % len(emails)], password, stop))
+                for i in range(args.logins if storm else 0)
+            ]
+            await asyncio.sleep(args.duration)
+            stop.set()
+            latencies = await redirects
+            login_count = sum(await asyncio.gather(*logins))
+            ms = [latency * 1000 for latency in latencies]
+            logger.info(
+                f"{'login storm' if storm else 'idle       '}: {len(ms)} redirects, "
+                f"p50 {statistics.median(ms):.1f} ms, p99 {percentile(ms, 99):.1f} ms, "
+                f"max {max(ms):.1f} ms, {login_count / args.duration:.1f} logins/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login loops")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""
+ORM statements against the asyncpg fast path in backend.app.db.queries.
+
+Inserts throwaway links into the configured database, then times the
+redirect lookup and a click sync batch both ways and logs wall clock and
+CPU time per call. The links are removed afterwards.
+
+    python scripts/bench_queries.py --rounds 2000 --batch 500
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, case, delete, select, update
+
+from backend.app.core.logging_config import logger
+from backend.app.db.queries import get_link, update_click_counts
+from backend.app.db.session import async_session_maker, engine
+from backend.app.models.url import URL
+
+urls_table = URL.__table__
+
+# The statement click sync ran before the fast path, one execution per counter.
+orm_sync_stmt = (
+    update(urls_table)
+    .where(urls_table.c.short_code == bindparam("b_code"))
+    .values(
+        hit_count=urls_table.c.hit_count + bindparam("b_hits"),
+        last_used_at=bindparam("b_last_used"),
+        expires_at=case(
+            (urls_table.c.fixed_expiration, urls_table.c.expires_at),
+            else_=bindparam("b_expires_at"),
+        ),
+    )
+)
+
+
+async def orm_lookup(session, code):
+    result = await session.execute(select(URL).where(URL.short_code == code))
+    return result.scalar_one_or_none()
+
+
+async def orm_sync(session, counts):
+    await session.execute(orm_sync_stmt, [
+        {"b_code": code, "b_hits": hits, "b_last_used": last_used, "b_expires_at": expires}
+        for code, hits, last_used, expires in counts
+    ])
+
+
+async def timed(label: str, rounds: int, call) -> None:
+    for _ in range(min(rounds, 50)):
+        await call()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        await call()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    logger.info(
+        f"{label:<22} {wall / rounds * 1000:8.3f} ms/call  {cpu / rounds * 1000:8.3f} ms CPU/call"
+    )
+
+
+async def main(args) -> None:
+    prefix = f"bq{uuid.uuid4().hex[:6]}"
+    codes = [f"{prefix}{i}" for i in range(args.batch)]
+    now = datetime.now(timezone.utc)
+    async with async_session_maker() as session:
+        session.add_all(
+            URL(short_code=code, original_url=f"https://example.com/{code}", expires_at=now + timedelta(days=1))
+            for code in codes
+        )
+        await session.commit()
+    try:
+        async with async_session_maker() as session:
+            await timed("lookup ORM", args.rounds, lambda: orm_lookup(session, codes[0]))
+            await timed("lookup asyncpg", args.rounds, lambda: get_link(session, codes[0]))
+            counts = [(code, 1, now, now + timedelta(days=1)) for code in codes]
+            sync_rounds = max(1, args.rounds // 100)
+            await timed(f"sync {args.batch} ORM", sync_rounds, lambda: orm_sync(session, counts))
+            await timed(f"sync {args.batch} asyncpg", sync_rounds, lambda: update_click_counts(session, counts))
+            await session.rollback()
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(URL).where(URL.short_code.in_(codes)))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000, help="lookups per variant")
+    parser.add_argument("--batch", type=int, default=500, help="counters per click sync")
+    asyncio.run(main(parser.parse_args()))
@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from httpx import AsyncClient, ASGITransport
 from backend.app.main import app
 from backend.app.models.url import URL
@@ -19,6 +19,17 @@ async def register_and_login(ac: AsyncClient, email: str, password: str):
     token = login_response.json().get("access_token")
     return token
 
+async def register_superuser_and_login(ac: AsyncClient, email: str, password: str):
+    from sqlalchemy import update
+    from backend.app.db.session import async_session_maker
+    from backend.app.models.user import User
+
+    await ac.post("/auth/register", json={"email": email, "password": password})
+    async with async_session_maker() as session:
+        await session.execute(update(User).where(User.email == email).values(is_superuser=True))
+        await session.commit()
+    return await register_and_login(ac, email, password)
+
 transport = ASGITransport(app=app)
 
 
@@ -170,6 +181,44 @@ async def test_create_custom_url_errors():
         res_duplicate = await ac.post("/shorten", json=payload, headers=headers)
         assert res_duplicate.status_code == 400, res_duplicate.text
 
+        payload["original_url"] = "https://custom.com/other"
+        res_taken = await ac.post("/shorten", json=payload, headers=headers)
+        assert res_taken.status_code == 400, res_taken.text
+        assert "already exists" in res_taken.json()["detail"]
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_custom_code_dirty_redirects_and_syncs():
+    from backend.app.services.url_helpers import sync_click_counts
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "dirtycode@example.com", "dirtypass")
+        headers = {"Authorization": f"Bearer {token}"}
+        expiration = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        payload = {"original_url": "https://dirty.com", "short_code": "dirty", "expiration": expiration}
+        res = await ac.post("/shorten", json=payload, headers=headers)
+        assert res.status_code == 200, res.text
+
+        for _ in range(2):
+            redirect = await ac.get("/dirty?no_redirect=true")
+            assert redirect.status_code == 200, redirect.text
+            assert redirect.json()["redirect_url"] == "https://dirty.com"
+
+        assert await sync_click_counts() == 1
+        assert (await ac.get("/dirty/stats")).json()["hit_count"] == 2
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_ignores_internal_keys():
+    from backend.app.services.cache import clicks_key, redis_client
+
+    await redis_client.set("internal:secret", "https://leak.com")
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for path in ("/internal:secret", "/internal:secret/stats", "/internal:secret/stats/timeseries"):
+            response = await ac.get(path, params={"no_redirect": "true"})
+            assert response.status_code == 404, path
+            assert "leak.com" not in response.text
+    assert await redis_client.ttl("internal:secret") == -1
+    assert not await redis_client.exists(clicks_key("internal:secret"))
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_search_url():
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -335,10 +384,17 @@ async def test_update_url_without_regenerate():
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_update_url_with_regenerate(mocker):
-    from sqlalchemy.ext.asyncio.session import AsyncSession
-    mocker.patch.object(AsyncSession, "refresh", new_callable=AsyncClient)
-    from unittest.mock import AsyncMock
-    mocker.patch("sqlalchemy.ext.asyncio.session.AsyncSession.refresh", new=AsyncMock())
+    from types import SimpleNamespace
+
+    async def fake_update_url_fields(db, url_id, values):
+        return SimpleNamespace(
+            short_code=values["short_code"],
+            original_url=values["original_url"],
+            created_at=datetime.now(timezone.utc) - timedelta(hours=1),
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        )
+
+    mocker.patch("backend.app.api.routes.url.update_url_fields", side_effect=fake_update_url_fields)
 
     from backend.app.api.routes.url import get_user_owned_url
     async def fake_get_user_owned_url(short_code: str, db=None, current_user=None):
@@ -385,5 +441,1049 @@ async def test_update_url_with_regenerate(mocker):
         assert data["short_code"] == "newcode", f"Expected 'newcode', got {data['short_code']}"
         assert data["original_url"] == "https://new.com"
 
+    app.dependency_overrides.pop(get_user_owned_url, None)
     assert delete_cache_called, "delete_cache was not called"
-    assert store_cache_called, "store_short_code was not called"
\ No newline at end of file
+    assert store_cache_called, "store_short_code was not called"
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_counts_clicks_in_redis():
+    from backend.app.services.cache import redis_client, clicks_key
+    from backend.app.services.url_helpers import sync_click_counts
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_create = await ac.post("/url", json={"original_url": "https://clicks.com"})
+        assert res_create.status_code == 200, res_create.text
+        short_code = res_create.json()["short_code"]
+
+        for _ in range(3):
+            res = await ac.get(f"/{short_code}?no_redirect=true")
+            assert res.status_code == 200, res.text
+
+        assert await redis_client.hget(clicks_key(short_code), "hits") == "3"
+        assert await redis_client.ttl(short_code) > 0
+
+        await sync_click_counts()
+        assert await redis_client.hget(clicks_key(short_code), "hits") == "0"
+
+        stats = (await ac.get(f"/{short_code}/stats")).json()
+        assert stats["hit_count"] == 3
+        assert stats["last_used_at"] is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_url_batch():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "batchuser@example.com", "batchpass")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        existing = await ac.post("/url", json={"original_url": "https://batch.com/existing"}, headers=headers)
+        assert existing.status_code == 200, existing.text
+
+        urls = ["https://batch.com/a", "https://batch.com/existing", "https://batch.com/b", "https://batch.com/a"]
+        response = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]}, headers=headers)
+        assert response.status_code == 200, response.text
+        results = response.json()["results"]
+
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+        assert all(r["error"] is None for r in results)
+        assert [r["url"]["original_url"] for r in results] == urls
+        assert results[1]["url"]["short_code"] == existing.json()["short_code"]
+        assert results[0]["url"]["short_code"] == results[3]["url"]["short_code"]
+        assert results[0]["url"]["short_code"] != results[2]["url"]["short_code"]
+
+        redirect = await ac.get(f"/{results[2]['url']['short_code']}?no_redirect=true")
+        assert redirect.json()["redirect_url"] == "https://batch.com/b"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_url_batch_limits():
+    from backend.app.core.config import settings
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        empty = await ac.post("/url/batch", json={"urls": []})
+        assert empty.status_code == 422, empty.text
+
+        too_many = [{"original_url": f"https://batch.com/{i}"} for i in range(settings.URL_BATCH_MAX_ITEMS + 1)]
+        response = await ac.post("/url/batch", json={"urls": too_many})
+        assert response.status_code == 400, response.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_import_urls_ndjson():
+    import json
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "importer@example.com", "importpass")
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+        future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        past = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+        rows = [
+            {"original_url": "https://import.com/1", "short_code": "imp1", "expiration": future},
+            {"original_url": "https://import.com/2", "short_code": "imp2", "expiration": future,
+             "fixed_expiration": True},
+            {"original_url": "https://import.com/dup", "short_code": "imp1", "expiration": future},
+            {"original_url": "https://import.com/old", "short_code": "imp3", "expiration": past},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+
+        response = await ac.post("/import", params={"job_id": "job1"}, content=body, headers=headers)
+        assert response.status_code == 200, response.text
+        report = response.json()
+        assert report["status"] == "completed"
+        assert report["rows_read"] == 5
+        assert report["imported"] == 2
+        assert report["conflicts"] == 1
+        assert report["invalid"] == 2
+        assert sorted(error["line"] for error in report["errors"]) == [3, 4, 5]
+
+        progress = await ac.get("/import/job1", headers=headers)
+        assert progress.status_code == 200, progress.text
+        assert progress.json()["imported"] == 2
+
+        other_token = await register_and_login(ac, "otherimporter@example.com", "importpass")
+        other = await ac.get("/import/job1", headers={"Authorization": f"Bearer {other_token}"})
+        assert other.status_code == 404
+
+        redirect = await ac.get("/imp2?no_redirect=true")
+        assert redirect.json()["redirect_url"] == "https://import.com/2"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_import_urls_csv():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "importer@example.com", "importpass")
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+        future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        body = (
+            "original_url,short_code,expiration,fixed_expiration\n"
+            f"https://import.com/csv,impcsv1,{future},true\n"
+            f"https://import.com/csv,bad-code,{future},\n"
+        )
+        response = await ac.post("/import", content=body, headers=headers)
+        assert response.status_code == 200, response.text
+        report = response.json()
+        assert report["imported"] == 1
+        assert report["invalid"] == 1
+
+        invalid_format = await ac.post("/import", params={"format": "xml"}, content=body, headers=headers)
+        assert invalid_format.status_code == 400, invalid_format.text
+
+        multiline = (
+            "original_url,short_code,expiration,note\n"
+            f'https://import.com/note,impcsv2,{future},"first line\nsecond, ""quoted"" line"\n'
+            f"https://import.com/bad,bad-csv,{future},\n"
+            f"https://import.com/after,impcsv4,{future},plain\n"
+        )
+        response = await ac.post("/import", content=multiline, headers=headers)
+        report = response.json()
+        assert report["rows_read"] == 3
+        assert report["imported"] == 2
+        assert [(e["line"], e["short_code"]) for e in report["errors"]] == [(4, "bad-csv")]
+        after = await ac.get("/impcsv4?no_redirect=true")
+        assert after.json()["redirect_url"] == "https://import.com/after"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_custom_url_concurrent_same_code():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "racer@example.com", "racepass")
+        headers = {"Authorization": f"Bearer {token}"}
+        payload = {
+            "original_url": "https://race.com",
+            "short_code": "race01",
+            "expiration": (datetime.now(timezone.utc) + timedelta(minutes=10)).isoformat(),
+            "fixed_expiration": True,
+        }
+        responses = await asyncio.gather(*[
+            ac.post("/shorten", json=payload, headers=headers) for _ in range(5)
+        ])
+        assert sorted(r.status_code for r in responses) == [200, 400, 400, 400, 400]
+
+        stats = await ac.get("/race01/stats")
+        assert stats.status_code == 200, stats.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_url_idempotency_key():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = {"Idempotency-Key": "retry-1"}
+        payload = {"original_url": "https://idempotent.com"}
+
+        first = await ac.post("/url", json=payload, headers=headers)
+        assert first.status_code == 200, first.text
+        retry = await ac.post("/url", json=payload, headers=headers)
+        assert retry.status_code == 200, retry.text
+        assert retry.json() == first.json()
+        assert retry.headers.get("Idempotent-Replayed") == "true"
+
+        without_key = await ac.post("/url", json=payload)
+        assert without_key.json()["short_code"] != first.json()["short_code"]
+
+        other_body = await ac.post("/url", json={"original_url": "https://other.com"}, headers=headers)
+        assert other_body.status_code == 422, other_body.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_url_idempotency_key_concurrent():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = {"Idempotency-Key": "storm-1"}
+        payload = {"original_url": "https://retry-storm.com"}
+        responses = await asyncio.gather(*[ac.post("/url", json=payload, headers=headers) for _ in range(5)])
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.json()["short_code"] for r in responses}) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_idempotency_key_released_on_cancel():
+    from pydantic import BaseModel
+    from fastapi import Response
+    from backend.app.services.cache import redis_client
+    from backend.app.services.idempotency import idempotency_key, run_idempotent
+
+    class Payload(BaseModel):
+        value: int
+
+    started = asyncio.Event()
+
+    async def slow_handler():
+        started.set()
+        await asyncio.sleep(60)
+
+    task = asyncio.create_task(
+        run_idempotent("cancel-1", "test", None, Payload(value=1), Response(), slow_handler)
+    )
+    await started.wait()
+    assert await redis_client.exists(idempotency_key("test", None, "cancel-1"))
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not await redis_client.exists(idempotency_key("test", None, "cancel-1"))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_custom_url_idempotency_replays_error():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "idem@example.com", "idempass")
+        headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "custom-1"}
+        payload = {
+            "original_url": "https://idem-custom.com",
+            "short_code": "idem01",
+            "expiration": (datetime.now(timezone.utc) + timedelta(minutes=10)).isoformat(),
+        }
+        first = await ac.post("/shorten", json=payload, headers=headers)
+        assert first.status_code == 200, first.text
+        retry = await ac.post("/shorten", json=payload, headers=headers)
+        assert retry.status_code == 200, retry.text
+        assert retry.json() == first.json()
+
+        headers["Idempotency-Key"] = "custom-2"
+        taken = await ac.post("/shorten", json=payload, headers=headers)
+        assert taken.status_code == 400, taken.text
+        taken_retry = await ac.post("/shorten", json=payload, headers=headers)
+        assert taken_retry.status_code == 400, taken_retry.text
+        assert taken_retry.headers.get("Idempotent-Replayed") == "true"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_my_urls_keyset_pagination():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "pager@example.com", "pagerpass")
+        headers = {"Authorization": f"Bearer {token}"}
+        urls = [f"https://pager.com/{i}" for i in range(5)]
+        response = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]}, headers=headers)
+        assert response.status_code == 200, response.text
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"url_type": "active", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            page = await ac.get("/my_urls", params=params, headers=headers)
+            assert page.status_code == 200, page.text
+            assert len(page.json()) <= 2
+            seen.extend(page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert sorted(item["original_url"] for item in seen) == urls
+        created = [item["created_at"] for item in seen]
+        assert created == sorted(created, reverse=True)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_my_urls():
+    import csv
+    import gzip
+    import io
+    import json
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "exporter@example.com", "exportpass")
+        headers = {"Authorization": f"Bearer {token}"}
+        for url in ["https://export.com/1", "https://export.com/2"]:
+            res = await ac.post("/url", json={"original_url": url}, headers=headers)
+            assert res.status_code == 200, res.text
+        deleted = res.json()["short_code"]
+        assert (await ac.delete(f"/{deleted}", headers=headers)).status_code == 200
+
+        ndjson = await ac.get("/my_urls/export", headers=headers)
+        assert ndjson.status_code == 200, ndjson.text
+        rows = [json.loads(line) for line in ndjson.text.splitlines()]
+        assert sorted((row["status"], row["original_url"]) for row in rows) == [
+            ("active", "https://export.com/1"),
+            ("expired", "https://export.com/2"),
+        ]
+
+        compressed = await ac.get("/my_urls/export", params={"format": "csv", "gzip": "true"}, headers=headers)
+        assert compressed.status_code == 200, compressed.text
+        assert compressed.headers["content-type"] == "application/gzip"
+        csv_rows = list(csv.DictReader(io.StringIO(gzip.decompress(compressed.content).decode("utf-8"))))
+        assert {row["short_code"] for row in csv_rows} == {row["short_code"] for row in rows}
+
+        invalid = await ac.get("/my_urls/export", params={"format": "xml"}, headers=headers)
+        assert invalid.status_code == 400, invalid.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_my_urls_summary():
+    from backend.app.services.url_helpers import sync_click_counts
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "dashboard@example.com", "dashpass")
+        headers = {"Authorization": f"Bearer {token}"}
+        urls = [f"https://dashboard.com/{i}" for i in range(3)]
+        res = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]}, headers=headers)
+        codes = [item["url"]["short_code"] for item in res.json()["results"]]
+        for _ in range(2):
+            await ac.get(f"/{codes[1]}?no_redirect=true")
+        await sync_click_counts()
+        assert (await ac.delete(f"/{codes[2]}", headers=headers)).status_code == 200
+
+        response = await ac.get("/my_urls/summary", params={"limit": 1, "top_n": 1, "expiring_within": 1}, headers=headers)
+        assert response.status_code == 200, response.text
+        summary = response.json()
+
+        assert summary["totals"] == {
+            "active_count": 2,
+            "expired_count": 1,
+            "active_hits": 2,
+            "expired_hits": 0,
+            "expiring_soon_count": 0,
+        }
+        assert len(summary["active"]["items"]) == 1
+        assert summary["active"]["next_cursor"]
+        assert summary["expired"]["items"][0]["short_code"] == codes[2]
+        assert summary["expired"]["next_cursor"] is None
+        assert summary["top_links"][0]["short_code"] == codes[1]
+
+        soon = await ac.get("/my_urls/summary", params={"expiring_within": 24 * 60}, headers=headers)
+        assert soon.json()["totals"]["expiring_soon_count"] == 2
+        assert len(soon.json()["expiring_soon"]) == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_by_host_and_prefix():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "searcher@example.com", "searchpass")
+        headers = {"Authorization": f"Bearer {token}"}
+        urls = [
+            "https://WWW.Hostsearch.com/docs/1",
+            "https://hostsearch.com/docs/2",
+            "http://user@hostsearch.com:8080/blog",
+            "https://other-hostsearch.com/docs/1",
+            "https://hostsearch.com/100%_off",
+        ]
+        res = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]}, headers=headers)
+        codes = [item["url"]["short_code"] for item in res.json()["results"]]
+
+        res_host = await ac.get("/search", params={"host": "www.hostsearch.com", "limit": 2})
+        assert res_host.status_code == 200, res_host.text
+        cursor = res_host.headers["X-Next-Cursor"]
+        res_next = await ac.get("/search", params={"host": "hostsearch.com", "limit": 2, "cursor": cursor})
+        assert "X-Next-Cursor" not in res_next.headers
+        found = {item["short_code"] for item in res_host.json() + res_next.json()}
+        assert found == {codes[0], codes[1], codes[2], codes[4]}
+
+        res_prefix = await ac.get("/search", params={"prefix": "https://hostsearch.com/docs"})
+        assert [item["short_code"] for item in res_prefix.json()] == [codes[1]]
+        res_escaped = await ac.get("/search", params={"prefix": "https://hostsearch.com/100%_"})
+        assert [item["short_code"] for item in res_escaped.json()] == [codes[4]]
+        assert (await ac.get("/search", params={"prefix": "https://hostsearch.com/1_0"})).status_code == 404
+
+        assert (await ac.delete(f"/{codes[1]}", headers=headers)).status_code == 200
+        res_active = await ac.get("/search", params={"prefix": "https://hostsearch.com/docs"})
+        assert res_active.status_code == 404
+        res_all = await ac.get(
+            "/search", params={"prefix": "https://hostsearch.com/docs", "include_expired": True}
+        )
+        assert [item["short_code"] for item in res_all.json()] == [codes[1]]
+
+        assert (await ac.get("/search", params={"host": "x.com", "cursor": "bad"})).status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resolve_codes():
+    from backend.app.services.cache import redis_client, clicks_key
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        urls = ["https://resolve.com/a", "https://resolve.com/b"]
+        res = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]})
+        codes = [item["url"]["short_code"] for item in res.json()["results"]]
+        await redis_client.delete(codes[1])
+
+        response = await ac.post("/resolve", json={"codes": codes + ["missing", codes[0]], "count_clicks": False})
+        assert response.status_code == 200, response.text
+        assert response.json()["urls"] == {codes[0]: urls[0], codes[1]: urls[1], "missing": None}
+        assert await redis_client.get(codes[1]) == urls[1]
+        assert await redis_client.hget(clicks_key(codes[0]), "hits") is None
+
+        await redis_client.delete(codes[1])
+        response = await ac.post("/resolve", json={"codes": codes})
+        assert response.json()["urls"] == dict(zip(codes, urls))
+        for code in codes:
+            assert await redis_client.hget(clicks_key(code), "hits") == "1"
+
+        await redis_client.set("internal:secret", "https://leak.com")
+        response = await ac.post("/resolve", json={"codes": ["internal:secret", codes[0]], "count_clicks": False})
+        assert response.json()["urls"] == {"internal:secret": None, codes[0]: urls[0]}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resolve_codes_limit(monkeypatch):
+    from backend.app.core.config import settings
+
+    monkeypatch.setattr(settings, "RESOLVE_MAX_CODES", 2)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/resolve", json={"codes": ["a", "b", "c"]})
+    assert response.status_code == 400, response.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_many_url_stats_cached():
+    from backend.app.services.cache import redis_client, stats_key
+    from backend.app.services.url_helpers import sync_click_counts
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        urls = ["https://manystats.com/a", "https://manystats.com/b"]
+        res = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]})
+        codes = [item["url"]["short_code"] for item in res.json()["results"]]
+        await ac.get(f"/{codes[0]}?no_redirect=true")
+
+        response = await ac.get("/stats", params={"codes": f"{codes[0]},{codes[1]},missing"})
+        assert response.status_code == 200, response.text
+        stats = response.json()["stats"]
+        assert stats[codes[0]]["hit_count"] == 1
+        assert stats[codes[0]]["last_used_at"] is not None
+        assert stats[codes[1]]["hit_count"] == 0
+        assert stats["missing"] is None
+        assert await redis_client.exists(stats_key(codes[0]))
+
+        etag = response.headers["ETag"]
+        params = {"codes": f"{codes[0]},{codes[1]},missing"}
+        not_modified = await ac.get("/stats", params=params, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+
+        await ac.get(f"/{codes[0]}?no_redirect=true")
+        await sync_click_counts()
+        changed = await ac.get("/stats", params=params, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["stats"][codes[0]]["hit_count"] == 2
+
+        single = await ac.get(f"/{codes[0]}/stats")
+        assert single.json()["hit_count"] == 2
+        assert (await ac.get(f"/{codes[0]}/stats", headers={"If-None-Match": single.headers["ETag"]})).status_code == 304
+
+        await redis_client.delete(stats_key(codes[0]))
+        assert (await ac.get(f"/{codes[0]}/stats")).json()["hit_count"] == 2
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_click_timeseries_rollups():
+    from backend.app.services.cache import redis_client, timeseries_key
+    from backend.app.services.click_timeseries import compact_click_timeseries
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_create = await ac.post("/url", json={"original_url": "https://timeseries.com"})
+        short_code = res_create.json()["short_code"]
+        for _ in range(3):
+            await ac.get(f"/{short_code}?no_redirect=true")
+
+        minutes = await ac.get(f"/{short_code}/stats/timeseries", params={"granularity": "minute"})
+        assert minutes.status_code == 200, minutes.text
+        assert len(minutes.json()["points"]) == 61
+        assert sum(point["hits"] for point in minutes.json()["points"]) == 3
+
+        hours = await ac.get(f"/{short_code}/stats/timeseries", params={"granularity": "hour"})
+        assert sum(point["hits"] for point in hours.json()["points"]) == 3
+
+        assert await compact_click_timeseries() == 1
+        assert not await redis_client.exists(timeseries_key(short_code, "pending"))
+        await ac.get(f"/{short_code}?no_redirect=true")
+
+        for granularity in ("hour", "day"):
+            res = await ac.get(f"/{short_code}/stats/timeseries", params={"granularity": granularity})
+            points = res.json()["points"]
+            assert sum(point["hits"] for point in points) == 4
+
+        past = datetime.now(timezone.utc) - timedelta(days=3)
+        res_past = await ac.get(
+            f"/{short_code}/stats/timeseries",
+            params={"granularity": "day", "from": past.isoformat(), "to": (past + timedelta(days=1)).isoformat()},
+        )
+        assert [point["hits"] for point in res_past.json()["points"]] == [0, 0]
+
+        invalid = await ac.get(f"/{short_code}/stats/timeseries", params={"granularity": "week"})
+        assert invalid.status_code == 400
+        too_long = await ac.get(
+            f"/{short_code}/stats/timeseries",
+            params={"granularity": "minute", "from": (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()},
+        )
+        assert too_long.status_code == 400
+        assert (await ac.get("/nonexistent/stats/timeseries")).status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_unique_visitors():
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_create = await ac.post("/url", json={"original_url": "https://visitors.com"})
+        short_code = res_create.json()["short_code"]
+        for agent in ("agent-a", "agent-b", "agent-a", "agent-c", "agent-b"):
+            await ac.get(f"/{short_code}?no_redirect=true", headers={"User-Agent": agent})
+
+        response = await ac.get(f"/{short_code}/stats/visitors")
+        assert response.status_code == 200, response.text
+        assert response.json()["unique_visitors"] == 3
+        assert response.json()["standard_error"] == 0.0081
+
+        today = datetime.now(timezone.utc).date()
+        week = await ac.get(
+            f"/{short_code}/stats/visitors",
+            params={"from": (today - timedelta(days=6)).isoformat(), "to": today.isoformat()},
+        )
+        assert week.json()["unique_visitors"] == 3
+
+        yesterday = (today - timedelta(days=1)).isoformat()
+        past = await ac.get(f"/{short_code}/stats/visitors", params={"from": yesterday, "to": yesterday})
+        assert past.json()["unique_visitors"] == 0
+
+        too_long = await ac.get(
+            f"/{short_code}/stats/visitors", params={"from": (today - timedelta(days=365)).isoformat()}
+        )
+        assert too_long.status_code == 400
+        assert (await ac.get("/nonexistent/stats/visitors")).status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_unique_visitors_custom_code_salt(monkeypatch):
+    from backend.app.services import unique_visitors
+    from backend.app.services.cache import redis_client
+
+    monkeypatch.setattr(unique_visitors, "_daily_salt", (date.min, ""))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "saltcode@example.com", "saltpass")
+        expiration = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        payload = {"original_url": "https://salt.com", "short_code": "salt", "expiration": expiration}
+        res = await ac.post("/shorten", json=payload, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code == 200, res.text
+
+        for agent in ("agent-a", "agent-b", "agent-a"):
+            redirect = await ac.get("/salt?no_redirect=true", headers={"User-Agent": agent})
+            assert redirect.status_code == 200, redirect.text
+
+        assert (await ac.get("/salt/stats/visitors")).json()["unique_visitors"] == 2
+        salt_key = f"{unique_visitors.VISITOR_SALT_PREFIX}{datetime.now(timezone.utc):%Y%m%d}"
+        assert await redis_client.type(salt_key) == "string"
+
+        # The salt is never reachable as a short code.
+        salt = await redis_client.get(salt_key)
+        leaked = await ac.get(f"/{salt_key}?no_redirect=true")
+        assert leaked.status_code == 404
+        assert salt not in leaked.text
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_top_links_leaderboard():
+    import time
+    from backend.app.services.cache import redis_client, rotate_hot_links
+    from backend.app.services.hot_links import refresh_hot_links
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        urls = [f"https://hot.com/{i}" for i in range(3)]
+        res = await ac.post("/url/batch", json={"urls": [{"original_url": u} for u in urls]})
+        codes = [item["url"]["short_code"] for item in res.json()["results"]]
+        for code, clicks in zip(codes, (1, 3, 2)):
+            for _ in range(clicks):
+                await ac.get(f"/{code}?no_redirect=true")
+
+        response = await ac.get("/stats/top", params={"window": "5m", "n": 2})
+        assert response.status_code == 200, response.text
+        assert response.json()["links"] == [
+            {"short_code": codes[1], "hits": 3},
+            {"short_code": codes[2], "hits": 2},
+        ]
+
+        await redis_client.delete(codes[1])
+        assert await refresh_hot_links() == 1
+        assert await redis_client.get(codes[1]) == urls[1]
+        day = await ac.get("/stats/top", params={"window": "24h"})
+        assert [link["hits"] for link in day.json()["links"]] == [3, 2, 1]
+
+        await rotate_hot_links(time.time() + 10 * 60)
+        later = await ac.get("/stats/top", params={"window": "5m"})
+        assert later.json()["links"] == []
+        assert len((await ac.get("/stats/top", params={"window": "1h"})).json()["links"]) == 3
+
+        assert (await ac.get("/stats/top", params={"window": "7d"})).status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_click_events_stream_ingestion():
+    from sqlalchemy import select
+    from backend.app.db.session import get_async_session
+    from backend.app.models.click_event import ClickEvent
+    from backend.app.services.cache import CLICK_EVENTS_STREAM, redis_client
+    from backend.app.services.click_events import (
+        ensure_consumer_group,
+        get_click_events_lag,
+        ingest_click_events,
+    )
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ensure_consumer_group()
+        res_create = await ac.post("/url", json={"original_url": "https://events.com"})
+        short_code = res_create.json()["short_code"]
+        headers = {"Referer": "https://news.example.com/", "User-Agent": "event-agent"}
+        for _ in range(3):
+            await ac.get(f"/{short_code}?no_redirect=true", headers=headers)
+
+        assert (await get_click_events_lag())["length"] == 3
+        assert await ingest_click_events(batch_size=2) == 2
+        assert (await get_click_events_lag())["length"] == 1
+        assert await ingest_click_events(batch_size=10) == 1
+        assert await ingest_click_events(batch_size=10) == 0
+        assert await redis_client.xlen(CLICK_EVENTS_STREAM) == 0
+
+        session_gen = get_async_session()
+        session = await session_gen.__anext__()
+        try:
+            events = (await session.execute(
+                select(ClickEvent).where(ClickEvent.short_code == short_code)
+            )).scalars().all()
+        finally:
+            await session.close()
+        assert len(events) == 3
+        assert {event.referrer for event in events} == {"https://news.example.com/"}
+        assert {event.user_agent for event in events} == {"event-agent"}
+        assert {event.ip_prefix for event in events} == {"127.0.0.0/24"}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_click_events_failed_batch_is_redelivered(mocker):
+    from backend.app.services.cache import CLICK_EVENTS_STREAM, redis_client
+    from backend.app.services import click_events
+
+    await click_events.ensure_consumer_group()
+    await redis_client.xadd(CLICK_EVENTS_STREAM, {"code": "abc", "ts": "1700000000"})
+    mocker.patch.object(click_events, "copy_click_events", side_effect=RuntimeError("db down"))
+    with pytest.raises(RuntimeError):
+        await click_events.ingest_click_events(batch_size=10)
+    assert (await click_events.get_click_events_lag())["pending"] == 1
+
+    mocker.patch.object(click_events, "CLAIM_IDLE_MS", 0)
+    mocker.patch.object(click_events, "copy_click_events")
+    assert await click_events.ingest_click_events(batch_size=10) == 1
+    assert (await click_events.get_click_events_lag())["pending"] == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redirect_spools_click_events_without_redis(mocker, tmp_path):
+    import os
+    from redis.exceptions import ConnectionError as RedisConnectionError
+    from backend.app.core.config import settings
+    from backend.app.services import click_events
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_create = await ac.post("/url", json={"original_url": "https://spool.com"})
+        short_code = res_create.json()["short_code"]
+
+        mocker.patch.object(settings, "CLICK_EVENTS_SPOOL_DIR", str(tmp_path))
+        mocker.patch(
+            "backend.app.api.routes.url.resolve_and_count",
+            side_effect=RedisConnectionError("Redis is down"),
+        )
+        response = await ac.get(f"/{short_code}?no_redirect=true")
+        assert response.status_code == 200, response.text
+        assert response.json()["redirect_url"] == "https://spool.com"
+
+    segments = list(tmp_path.glob("clicks-*.ndjson"))
+    assert len(segments) == 1
+    assert await click_events.ingest_spooled_events() == 0
+    closed = segments[0].with_name(f"clicks-200001010000-{os.getpid()}.ndjson")
+    segments[0].rename(closed)
+
+    copy = mocker.patch.object(click_events, "copy_click_events")
+    assert await click_events.ingest_spooled_events() == 1
+    (row,) = copy.call_args.args[0]
+    assert row[0] == f"{closed.stem}:1"
+    assert row[1] == short_code
+    assert list(tmp_path.iterdir()) == []
+
+    # A segment claimed by a worker that died is retried once its claim is stale.
+    abandoned = tmp_path / f"{closed.name}.deadhost-1.processing"
+    abandoned.write_text('{"code": "abc", "ts": 1700000000}\n', encoding="utf-8")
+    assert await click_events.ingest_spooled_events() == 0
+    stale = abandoned.stat().st_mtime - click_events.SPOOL_CLAIM_TIMEOUT - 1
+    os.utime(abandoned, (stale, stale))
+    assert await click_events.ingest_spooled_events() == 1
+    assert copy.call_args.args[0][0][0] == f"{closed.stem}:1"
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_referrer_and_browser_breakdowns(mocker):
+    from backend.app.services import breakdowns
+    from backend.app.services.breakdowns import snapshot_breakdowns
+    from backend.app.services.cache import breakdown_snapshot_key, redis_client, sketch_keys
+
+    chrome = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+    firefox = "Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0"
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_create = await ac.post("/url", json={"original_url": "https://breakdowns.com"})
+        short_code = res_create.json()["short_code"]
+        clicks = [
+            ("https://www.news.com/a", chrome),
+            ("https://news.com/b", chrome),
+            ("https://blog.org/", firefox),
+            ("", chrome),
+        ]
+        for referrer, agent in clicks:
+            headers = {"User-Agent": agent}
+            if referrer:
+                headers["Referer"] = referrer
+            await ac.get(f"/{short_code}?no_redirect=true", headers=headers)
+
+        stats = (await ac.get(f"/{short_code}/stats")).json()
+        assert stats["top_referrers"][0] == {"value": "news.com", "count": 2}
+        assert {item["value"] for item in stats["top_referrers"]} == {"news.com", "blog.org", "(direct)"}
+        assert stats["top_browsers"] == [{"value": "Chrome", "count": 3}, {"value": "Firefox", "count": 1}]
+
+        assert await snapshot_breakdowns() == 1
+        assert not await redis_client.exists(*sketch_keys(short_code, "referrer"))
+        await ac.get(
+            f"/{short_code}?no_redirect=true",
+            headers={"User-Agent": firefox, "Referer": "https://news.com/c"},
+        )
+
+        stats = (await ac.get(f"/{short_code}/stats")).json()
+        assert stats["top_browsers"] == [{"value": "Chrome", "count": 3}, {"value": "Firefox", "count": 2}]
+        assert stats["top_referrers"][0] == {"value": "news.com", "count": 3}
+
+        # Snapshot rows are cached in Redis, later stats do not query them again.
+        assert await redis_client.exists(breakdown_snapshot_key(short_code))
+        reload = mocker.spy(breakdowns, "cache_breakdown_snapshot")
+        assert (await ac.get(f"/{short_code}/stats")).json()["top_browsers"] == stats["top_browsers"]
+        assert reload.call_count == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_live_hit_events(mocker):
+    import asyncio
+    import json
+    from backend.app.core.config import settings
+    from backend.app.services.live_hits import hit_broadcaster, live_hit_events
+
+    mocker.patch.object(settings, "LIVE_HITS_INTERVAL", 0.2)
+
+    async def connected():
+        return False
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res_missing = await ac.get("/nonexistent/stats/stream")
+        assert res_missing.status_code == 404
+
+        res_create = await ac.post("/url", json={"original_url": "https://live-hits.com"})
+        short_code = res_create.json()["short_code"]
+
+        events = live_hit_events(short_code, 0, connected)
+        first = await events.__anext__()
+        assert first.startswith("event: stats\n")
+        assert short_code in hit_broadcaster.watchers
+
+        for _ in range(3):
+            await ac.get(f"/{short_code}?no_redirect=true")
+        event = await asyncio.wait_for(events.__anext__(), timeout=5)
+        assert event.startswith("event: hits\n")
+        data = json.loads(event.split("data: ", 1)[1])
+        assert data["short_code"] == short_code
+        assert data["hit_count"] == data["delta"]
+        while data["hit_count"] < 3:
+            event = await asyncio.wait_for(events.__anext__(), timeout=5)
+            data = json.loads(event.split("data: ", 1)[1])
+        assert data["hit_count"] == 3
+
+        await events.aclose()
+        assert short_code not in hit_broadcaster.watchers
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_authenticated_user_is_cached(mocker):
+    from backend.app.core.manager import UserManager
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "cached@example.com", "password123")
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await ac.get("/my_urls", headers=headers)).status_code == 200
+
+        get_user = mocker.spy(UserManager, "get")
+        assert (await ac.get("/my_urls", headers=headers)).status_code == 200
+        assert get_user.call_count == 0
+
+        res_update = await ac.patch("/users/me", json={"email": "cached2@example.com"}, headers=headers)
+        assert res_update.status_code == 200, res_update.text
+        assert (await ac.get("/users/me", headers=headers)).json()["email"] == "cached2@example.com"
+        assert get_user.call_count == 1
+
+        assert (await ac.get("/my_urls", headers=headers)).status_code == 200
+        assert get_user.call_count == 1
+
+        res_invalid = await ac.get("/my_urls", headers={"Authorization": "Bearer invalid"})
+        assert res_invalid.status_code == 401
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_auth_invalidation_reaches_other_workers():
+    import asyncio
+    from backend.app.core.auth_cache import api_key_cache, user_cache
+    from backend.app.services.auth_invalidation import auth_invalidation_listener, broadcast_invalidation
+    from backend.app.services.cache import AUTH_INVALIDATE_CHANNEL, redis_client
+
+    await auth_invalidation_listener.start()
+    try:
+        user_cache.put("other-user", {"id": "other-user"}, 60)
+        api_key_cache.put("other-key", "other-user", 60)
+        # Published by another worker: only the listener can drop the entries here.
+        await redis_client.publish(AUTH_INVALIDATE_CHANNEL, "user:other-user")
+        await redis_client.publish(AUTH_INVALIDATE_CHANNEL, "api_key:other-key")
+        for _ in range(50):
+            if user_cache.get("other-user") is None and api_key_cache.get("other-key") is None:
+                break
+            await asyncio.sleep(0.05)
+        assert user_cache.get("other-user") is None
+        assert api_key_cache.get("other-key") is None
+
+        user_cache.put("local-user", {"id": "local-user"}, 60)
+        await broadcast_invalidation("user", "local-user")
+        assert user_cache.get("local-user") is None
+    finally:
+        await auth_invalidation_listener.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_password_hashing_runs_in_pool(mocker):
+    import asyncio
+    from backend.app.core import passwords
+    from backend.app.core.config import settings
+
+    run_task = mocker.spy(passwords, "run_password_task")
+    waits_before = passwords.password_wait_stats.count
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "pooled@example.com", "password123")
+        assert token
+        assert run_task.call_count == 2
+        assert passwords.password_wait_stats.count == waits_before + 2
+
+        res_wrong = await ac.post(
+            "/auth/jwt/login",
+            data={"username": "pooled@example.com", "password": "wrong"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        assert res_wrong.status_code == 400
+
+        mocker.patch.object(passwords, "password_slots", asyncio.Semaphore(0))
+        mocker.patch.object(settings, "PASSWORD_HASH_MAX_WAIT", 0.01)
+        res_busy = await ac.post(
+            "/auth/jwt/login",
+            data={"username": "pooled@example.com", "password": "password123"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        assert res_busy.status_code == 503
+        assert res_busy.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_api_key_authentication(mocker):
+    from redis.exceptions import RedisError
+    from backend.app.services import api_keys
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        token = await register_and_login(ac, "machine@example.com", "password123")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        res_create = await ac.post("/users/me/api-keys", json={"name": "ci"}, headers=headers)
+        assert res_create.status_code == 201, res_create.text
+        created = res_create.json()
+        key = created["key"]
+        assert key.startswith("fl_") and created["prefix"] == key[:11]
+
+        key_headers = {"X-API-Key": key}
+        res_url = await ac.post("/url", json={"original_url": "https://machine.com"}, headers=key_headers)
+        assert res_url.status_code == 200
+        res_list = await ac.get("/my_urls", headers=key_headers)
+        assert [url["original_url"] for url in res_list.json()] == ["https://machine.com"]
+
+        resolve = mocker.spy(api_keys.redis_client, "get")
+        assert (await ac.get("/my_urls", headers=key_headers)).status_code == 200
+        assert resolve.call_count == 0
+
+        res_keys = await ac.get("/users/me/api-keys", headers=headers)
+        assert [item["name"] for item in res_keys.json()] == ["ci"]
+        assert "key" not in res_keys.json()[0]
+
+        assert (await ac.get("/my_urls", headers={"X-API-Key": "fl_unknown"})).status_code == 401
+        unknown_hash = api_keys.api_key_hash("fl_unknown")
+        assert not await api_keys.redis_client.exists(api_keys.api_key_cache_key(unknown_hash))
+        assert api_keys.api_key_cache.get(unknown_hash) is None
+
+        api_keys.api_key_cache.clear()
+        mocker.patch.object(api_keys.redis_client, "get", side_effect=RedisError("down"))
+        redis_set = mocker.spy(api_keys.redis_client, "set")
+        assert (await ac.get("/my_urls", headers=key_headers)).status_code == 200
+        assert redis_set.call_count == 0
+        mocker.stopall()
+
+        res_revoke = await ac.delete(f"/users/me/api-keys/{created['id']}", headers=headers)
+        assert res_revoke.status_code == 200
+        assert res_revoke.json()["revoked_at"] is not None
+        assert (await ac.get("/my_urls", headers=key_headers)).status_code == 401
+
+        res_missing = await ac.delete(f"/users/me/api-keys/{created['id'].replace('-', '')[::-1]}", headers=headers)
+        assert res_missing.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limit_create(mocker):
+    from backend.app.core.config import settings
+    from backend.app.services import rate_limit
+
+    mocker.patch.object(settings, "RATE_LIMIT_CREATE", "3/minute")
+    rate_limit.leases.clear()
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for i in range(3):
+            res = await ac.post("/url", json={"original_url": f"https://limited.com/{i}"})
+            assert res.status_code == 200
+        res_limited = await ac.post("/shorten", json={
+            "original_url": "https://limited.com/custom",
+            "short_code": "limited1",
+            "expiration": "2099-01-01T00:00",
+        })
+        assert res_limited.status_code == 429
+        assert 1 <= int(res_limited.headers["Retry-After"]) <= 20
+
+        token = await register_and_login(ac, "limited@example.com", "password123")
+        res_user = await ac.post(
+            "/url", json={"original_url": "https://limited.com/user"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert res_user.status_code == 200
+
+        assert (await ac.get("/search", params={"original_url": "limited"})).status_code != 429
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rate_limit_leases_skip_redis(mocker):
+    from backend.app.core.config import settings
+    from backend.app.services import rate_limit
+
+    mocker.patch.object(settings, "RATE_LIMIT_SEARCH", "100/minute")
+    rate_limit.leases.clear()
+    take_tokens = mocker.spy(rate_limit, "take_tokens")
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for _ in range(5):
+            assert (await ac.get("/search", params={"original_url": "leased"})).status_code != 429
+    assert take_tokens.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_load_shedding_protects_redirects(mocker):
+    from backend.app.core.load_shedding import limiter
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        short_code = (await ac.post("/url", json={"original_url": "https://shed.com"})).json()["short_code"]
+
+        mocker.patch.object(limiter, "limit", 10.0)
+        mocker.patch.object(limiter, "inflight", 7)
+        res_write = await ac.post("/url", json={"original_url": "https://shed.com/2"})
+        assert res_write.status_code == 503
+        assert res_write.headers["Retry-After"] == "1"
+        assert (await ac.get("/search", params={"original_url": "shed"})).status_code == 503
+        assert (await ac.get(f"/{short_code}?no_redirect=true")).status_code == 200
+
+        assert (await ac.get("/system/load")).status_code == 401
+        token = await register_superuser_and_login(ac, "shedadmin@example.com", "adminpass")
+        user_token = await register_and_login(ac, "shedviewer@example.com", "viewerpass")
+        mocker.patch.object(limiter, "inflight", 0)
+        forbidden = await ac.get("/system/load", headers={"Authorization": f"Bearer {user_token}"})
+        assert forbidden.status_code == 403
+        mocker.patch.object(limiter, "inflight", 7)
+        load = (await ac.get("/system/load", headers={"Authorization": f"Bearer {token}"})).json()
+        assert load["capacity"]["write"] < load["capacity"]["read"] < load["capacity"]["redirect"]
+        assert load["rejected"]["write"] >= 2
+        assert load["password_hashing"]["wait"]["count"] > 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_db_metrics():
+    from backend.app.core.config import settings
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/url", json={"original_url": "https://metrics.com"})
+        assert (await ac.get("/system/db")).status_code == 401
+        token = await register_superuser_and_login(ac, "dbadmin@example.com", "adminpass")
+        metrics = (await ac.get("/system/db", headers={"Authorization": f"Bearer {token}"})).json()
+    assert metrics["pool"]["size"] == settings.DB_POOL_SIZE
+    # At most the connection of this request's own user lookup.
+    assert metrics["pool"]["checked_out"] <= 1
+    assert metrics["pool"]["checkout_wait"]["count"] > 0
+    assert metrics["statements"]["count"] > 0
+    assert metrics["statements"]["avg_ms"] > 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_replica_routing(mocker):
+    from backend.app.core.config import settings
+    from backend.app.db import session as db_session
+
+    # The test database is not a standby, so it passes as a replica without lag.
+    replica = db_session.Replica(f"{db_session.DATABASE_URL}?ssl=disable")
+    mocker.patch.object(db_session, "replicas", [replica])
+    try:
+        assert replica.engine.url.query["ssl"] == "disable"
+        assert replica.engine.url.query["prepared_statement_cache_size"] == str(settings.DB_STATEMENT_CACHE_SIZE)
+        await db_session.check_replicas()
+        assert replica.healthy and replica.lag == 0
+
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            short_code = (await ac.post("/url", json={"original_url": "https://replica.com"})).json()["short_code"]
+            checkouts = replica.engine.pool.checkedin()
+            res_search = await ac.get("/search", params={"original_url": "https://replica.com"})
+            assert res_search.status_code == 200
+            assert replica.engine.pool.checkedin() >= max(checkouts, 1)
+
+            session_gen = db_session.get_read_session()
+            session = await session_gen.__anext__()
+            assert session.info["replica"] is True
+            await session.close()
+
+            mocker.patch.object(settings, "REPLICA_MAX_LAG_SECONDS", -1)
+            await db_session.check_replicas()
+            assert not replica.healthy
+            session_gen = db_session.get_read_session()
+            session = await session_gen.__anext__()
+            assert "replica" not in session.info
+            await session.close()
+
+            assert (await ac.get(f"/{short_code}/stats")).status_code == 200
+    finally:
+        await replica.engine.dispose()
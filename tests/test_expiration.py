@@ -41,4 +41,31 @@ async def test_move_expired_urls(db_session):
         assert expired_url is not None, "URL should be present in expired table."
         assert expired_url.original_url == "https://expired.com"
         now = datetime.now(timezone.utc)
-        assert (now - expired_url.moved_at) < timedelta(seconds=5), "Moved_at timestamp is not recent."
\ No newline at end of file
+        assert (now - expired_url.moved_at) < timedelta(seconds=5), "Moved_at timestamp is not recent."
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_move_expired_urls_keeps_pending_clicks(db_session):
+    from backend.app.services.cache import clicks_key, redis_client
+
+    now = datetime.now(timezone.utc)
+    db_session.add(URL(
+        short_code="exppend",
+        original_url="https://pending.com",
+        created_at=now - timedelta(minutes=20),
+        expires_at=now - timedelta(minutes=1),
+        hit_count=5,
+        fixed_expiration=True,
+    ))
+    await db_session.commit()
+    last_click = now - timedelta(seconds=30)
+    await redis_client.hset(clicks_key("exppend"), mapping={"hits": 3, "last_used": last_click.timestamp()})
+
+    async with TestingSessionLocal() as expiration_session:
+        assert "exppend" in await move_expired_urls(expiration_session)
+
+    assert not await redis_client.exists(clicks_key("exppend"))
+    async with TestingSessionLocal() as new_session:
+        result = await new_session.execute(select(ExpiredURL).where(ExpiredURL.short_code == "exppend"))
+        expired_url = result.scalar_one()
+    assert expired_url.hit_count == 8
+    assert abs(expired_url.last_used_at - last_click) < timedelta(milliseconds=1)
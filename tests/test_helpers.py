@@ -3,7 +3,7 @@ from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock
 
 from sqlalchemy.future import select
-from backend.app.services.url_helpers import update_url_background
+from backend.app.services.url_helpers import sync_click_counts
 from backend.app.services.expiration import move_expired_urls
 from backend.app.models.url import URL
 from backend.app.core.config import settings
@@ -22,72 +22,66 @@ async def dummy_session_generator(session):
     yield session
 
 @pytest.mark.asyncio(loop_scope="session")
-async def test_update_url_background_not_found(mocker):
+async def test_move_expired_urls_none_expired(mocker):
     dummy_session = AsyncMock()
-    dummy_result = AsyncMock()
-    dummy_result.scalar_one_or_none = AsyncMock(return_value=None)
-    dummy_result.scalars = lambda: DummyScalarResult()
-    dummy_session.execute.return_value = dummy_result
-
-    mocker.patch(
-        "backend.app.services.url_helpers.get_async_session",
-        return_value=dummy_session_generator(dummy_session)
+    move_expired = mocker.patch(
+        "backend.app.services.expiration.move_expired", new_callable=AsyncMock, return_value=[]
     )
 
     moved_codes = await move_expired_urls(dummy_session)
     assert moved_codes == []
-    dummy_session.execute.assert_called_once()
+    move_expired.assert_called_once()
+    assert move_expired.call_args.args[0] is dummy_session
+    dummy_session.commit.assert_called_once()
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sync_click_counts_nothing_pending(mocker):
+    mocker.patch("backend.app.services.url_helpers.drain_click_counts", new_callable=AsyncMock, return_value=[])
+    get_session = mocker.patch("backend.app.services.url_helpers.get_async_session")
 
-@pytest.mark.asyncio
-async def test_update_url_background_fixed_expiration(mocker):
+    assert await sync_click_counts() == 0
+    get_session.assert_not_called()
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sync_click_counts_writes_batch(mocker):
     dummy_session = AsyncMock()
-    dummy_url = URL(
-        id="11111111-1111-1111-1111-111111111111",
-        short_code="fixexp",
-        original_url="https://fixed.com",
-        created_at=datetime.now(timezone.utc) - timedelta(hours=1),
-        expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
-        hit_count=0,
-        created_by=None,
-        last_used_at=datetime.now(timezone.utc),
-        fixed_expiration=True,
+    last_used = datetime.now(timezone.utc).timestamp()
+    mocker.patch(
+        "backend.app.services.url_helpers.drain_click_counts",
+        new_callable=AsyncMock,
+        return_value=[("fixexp", 3, last_used), ("nonfix", 1, last_used)],
     )
-    dummy_result = AsyncMock()
-    dummy_result.scalar_one_or_none = lambda: dummy_url
-    dummy_session.execute.return_value = dummy_result
-
     mocker.patch(
         "backend.app.services.url_helpers.get_async_session",
         return_value=dummy_session_generator(dummy_session)
     )
+    update = mocker.patch("backend.app.services.url_helpers.update_click_counts", new_callable=AsyncMock)
 
-    await update_url_background("fixexp")
-    assert dummy_session.execute.call_count >= 2
+    assert await sync_click_counts() == 2
+    update.assert_called_once()
+    params = update.call_args.args[1]
+    assert [p[0] for p in params] == ["fixexp", "nonfix"]
+    assert params[0][1] == 3
+    assert params[0][3] - params[0][2] == timedelta(minutes=settings.URL_EXPIRE_MINUTES)
     dummy_session.commit.assert_called_once()
 
-@pytest.mark.asyncio
-async def test_update_url_background_non_fixed_expiration(mocker):
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sync_click_counts_restores_on_failure(mocker):
     dummy_session = AsyncMock()
-    dummy_url = URL(
-        id="22222222-2222-2222-2222-222222222222",
-        short_code="nonfix",
-        original_url="https://nonfixed.com",
-        created_at=datetime.now(timezone.utc) - timedelta(hours=1),
-        expires_at=datetime.now(timezone.utc) - timedelta(minutes=5),
-        hit_count=3,
-        created_by=None,
-        last_used_at=datetime.now(timezone.utc),
-        fixed_expiration=False,
+    mocker.patch(
+        "backend.app.services.url_helpers.update_click_counts",
+        new_callable=AsyncMock,
+        side_effect=RuntimeError("db down"),
     )
-    dummy_result = AsyncMock()
-    dummy_result.scalar_one_or_none = lambda: dummy_url
-    dummy_session.execute.return_value = dummy_result
-
+    counts = [("nonfix", 2, datetime.now(timezone.utc).timestamp())]
+    mocker.patch("backend.app.services.url_helpers.drain_click_counts", new_callable=AsyncMock, return_value=counts)
+    restore = mocker.patch("backend.app.services.url_helpers.restore_click_counts", new_callable=AsyncMock)
     mocker.patch(
         "backend.app.services.url_helpers.get_async_session",
         return_value=dummy_session_generator(dummy_session)
     )
 
-    await update_url_background("nonfix")
-    assert dummy_session.execute.call_count >= 2
-    dummy_session.commit.assert_called_once()
\ No newline at end of file
+    with pytest.raises(RuntimeError):
+        await sync_click_counts()
+    restore.assert_called_once_with(counts)
+    dummy_session.commit.assert_not_called()
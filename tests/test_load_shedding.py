@@ -0,0 +1,50 @@
+from backend.app.core.load_shedding import (
+    PRIORITY_READ,
+    PRIORITY_REDIRECT,
+    PRIORITY_WRITE,
+    AdaptiveLimiter,
+)
+
+def test_lower_priorities_are_shed_first():
+    limiter = AdaptiveLimiter(100, 10, 1000)
+    limiter.inflight = 50
+    assert not limiter.try_acquire(PRIORITY_WRITE)
+    assert limiter.try_acquire(PRIORITY_READ)
+    limiter.inflight = 80
+    assert not limiter.try_acquire(PRIORITY_READ)
+    assert limiter.try_acquire(PRIORITY_REDIRECT)
+    assert limiter.rejected == {PRIORITY_REDIRECT: 0, PRIORITY_READ: 1, PRIORITY_WRITE: 1}
+    assert limiter.inflight == 81
+
+def test_limit_follows_latency():
+    limiter = AdaptiveLimiter(100, 10, 1000)
+    for _ in range(50):
+        limiter.observe("db", 0.01)
+    # Healthy but unused: the limit does not grow.
+    assert limiter.limit == 100
+
+    limiter.inflight = 90
+    for _ in range(20):
+        limiter.observe("db", 0.01)
+    grown = limiter.limit
+    assert grown > 100
+
+    for _ in range(50):
+        limiter.observe("db", 0.2)
+    assert limiter.limit < grown / 2
+    assert limiter.limit >= 10
+
+def test_only_request_statements_feed_the_limiter(mocker):
+    from backend.app.core.load_shedding import limiter, observe_db_latency
+    from backend.app.db.metrics import record_statement
+
+    observe = mocker.patch.object(limiter, "observe")
+    record_statement("COPY click_events_staging", 0.5)
+    assert observe.call_count == 0
+
+    token = observe_db_latency.set(True)
+    try:
+        record_statement("SELECT 1", 0.001)
+    finally:
+        observe_db_latency.reset(token)
+    observe.assert_called_once_with("db", 0.001)
@@ -1,11 +1,13 @@
+import uuid
 import pytest
 from datetime import datetime, timedelta, timezone
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Response, status
 from sqlalchemy.future import select
 
 from backend.app.models.url import URL, ExpiredURL
 from backend.app.api.routes.url import get_my_urls
 from backend.app.api.schemas.url import URLListResponse
+from backend.app.services.url_utils import decode_cursor
 
 class DummyScalarResult:
     def __init__(self, values):
@@ -18,6 +20,8 @@ class DummyResult:
         self._values = values
     def scalars(self):
         return DummyScalarResult(self._values)
+    def all(self):
+        return self._values
 
 class DummySession:
     async def execute(self, query):
@@ -49,7 +53,10 @@ async def test_get_my_urls_active(dummy_user):
     dummy_session.result = [active_url]
 
     result = await get_my_urls(
+        response=Response(),
         url_type="active",
+        limit=10,
+        cursor=None,
         db=dummy_session,
         current_user=dummy_user
     )
@@ -75,7 +82,10 @@ async def test_get_my_urls_expired(dummy_user):
     dummy_session.result = [expired_url]
 
     result = await get_my_urls(
+        response=Response(),
         url_type="expired",
+        limit=10,
+        cursor=None,
         db=dummy_session,
         current_user=dummy_user
     )
@@ -90,9 +100,65 @@ async def test_get_my_urls_invalid_type(dummy_user):
     dummy_session.result = []
     with pytest.raises(HTTPException) as excinfo:
         await get_my_urls(
+            response=Response(),
             url_type="invalid",
+            limit=10,
+            cursor=None,
+            db=dummy_session,
+            current_user=dummy_user
+        )
+    assert excinfo.value.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Invalid URL type specified" in excinfo.value.detail
+
+@pytest.mark.asyncio
+async def test_get_my_urls_next_cursor(dummy_user):
+    now = datetime.now(timezone.utc)
+    urls = [
+        URL(
+            id=f"00000000-0000-0000-0000-00000000000{i}",
+            short_code=f"page{i}",
+            original_url=f"https://page.com/{i}",
+            created_at=now - timedelta(minutes=i),
+            created_by=dummy_user.id,
+            hit_count=0,
+            fixed_expiration=False
+        )
+        for i in range(3)
+    ]
+    dummy_session = DummySession()
+    dummy_session.result = urls
+    response = Response()
+
+    result = await get_my_urls(
+        response=response,
+        url_type="active",
+        limit=2,
+        cursor=None,
+        db=dummy_session,
+        current_user=dummy_user
+    )
+    assert [item.short_code for item in result] == ["page0", "page1"]
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == (urls[1].created_at, uuid.UUID(urls[1].id))
+
+@pytest.mark.asyncio
+async def test_get_my_urls_invalid_cursor(dummy_user):
+    dummy_session = DummySession()
+    dummy_session.result = []
+    with pytest.raises(HTTPException) as excinfo:
+        await get_my_urls(
+            response=Response(),
+            url_type="active",
+            limit=10,
+            cursor="not-a-cursor",
             db=dummy_session,
             current_user=dummy_user
         )
     assert excinfo.value.status_code == status.HTTP_400_BAD_REQUEST
-    assert "Invalid URL type specified" in excinfo.value.detail
\ No newline at end of file
+
+def test_summary_unions_are_ordered():
+    from backend.app.services.url_summary import highlights_stmt, sections_stmt
+
+    now = datetime.now(timezone.utc)
+    for stmt in (sections_stmt(uuid.uuid4(), 10), highlights_stmt(uuid.uuid4(), 5, now, now + timedelta(hours=1))):
+        order_by = [str(clause) for clause in stmt._order_by_clauses]
+        assert [clause.rsplit(".", 1)[-1] for clause in order_by] == ["section", "position"]
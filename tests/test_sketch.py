@@ -0,0 +1,29 @@
+from backend.app.core.config import settings
+from backend.app.services.sketch import browser_family, referrer_host, sketch_indexes
+
+def test_referrer_host():
+    assert referrer_host("https://WWW.Example.com:8443/path?q=1") == "example.com"
+    assert referrer_host("android-app://com.example") == "com.example"
+    assert referrer_host("") == "(direct)"
+    assert referrer_host("not a url") == "(direct)"
+
+def test_browser_family():
+    assert browser_family(
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0"
+    ) == "Edge"
+    assert browser_family(
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+    ) == "Safari"
+    assert browser_family("Googlebot/2.1 (+http://www.google.com/bot.html)") == "Bot"
+    assert browser_family("curl/8.4.0") == "curl"
+    assert browser_family("") == "(unknown)"
+    assert browser_family("something else") == "Other"
+
+def test_sketch_indexes():
+    indexes = sketch_indexes("example.com")
+    assert len(indexes) == settings.SKETCH_DEPTH
+    assert all(0 <= index < settings.SKETCH_WIDTH for index in indexes)
+    assert sketch_indexes("example.com") == indexes
+    assert sketch_indexes("example.org") != indexes
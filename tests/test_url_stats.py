@@ -1,38 +1,77 @@
 import pytest
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
+from starlette.requests import Request
 
-from backend.app.models.url import URL
+from backend.app.api.schemas.url import BreakdownItem, URLStats
 from backend.app.api.routes.url import get_url_stats
+from backend.app.services.url_stats import etag_response
 
-async def dummy_session_generator(session):
-    yield session
+def make_request(headers: dict = None) -> Request:
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
 
 @pytest.mark.asyncio
 async def test_get_url_stats_not_found(mocker):
-    mocker.patch("backend.app.api.routes.url.get_url_by_shortcode", return_value=None)
+    mocker.patch("backend.app.api.routes.url.get_urls_stats", return_value={"nonexistent": None})
 
     with pytest.raises(HTTPException) as exc_info:
-        await get_url_stats("nonexistent")
+        await get_url_stats("nonexistent", make_request(), db=mocker.MagicMock(info={}))
     assert exc_info.value.status_code == 404
     assert exc_info.value.detail == "URL not found"
 
 @pytest.mark.asyncio
 async def test_get_url_stats_success(mocker):
     now = datetime.now(timezone.utc)
-    dummy_url = URL(
-        id="11111111-1111-1111-1111-111111111111",
-        short_code="test123",
+    dummy_stats = URLStats(
         original_url="https://example.com",
         created_at=now - timedelta(hours=1),
-        expires_at=now + timedelta(hours=1),
         hit_count=5,
         last_used_at=now - timedelta(minutes=30)
     )
-    mocker.patch("backend.app.api.routes.url.get_url_by_shortcode", return_value=dummy_url)
+    mocker.patch(
+        "backend.app.api.routes.url.get_urls_stats", return_value={"test123": dummy_stats}
+    )
+    mocker.patch(
+        "backend.app.api.routes.url.get_link_breakdowns",
+        return_value={"referrer": [], "browser": []},
+    )
+
+    response = await get_url_stats("test123", make_request())
+    assert response.status_code == 200
+    assert URLStats.model_validate_json(response.body) == dummy_stats
+    assert response.headers["ETag"]
+
+@pytest.mark.asyncio
+async def test_get_url_stats_with_breakdowns(mocker):
+    now = datetime.now(timezone.utc)
+    dummy_stats = URLStats(original_url="https://example.com", created_at=now, hit_count=3)
+    mocker.patch(
+        "backend.app.api.routes.url.get_urls_stats", return_value={"test123": dummy_stats}
+    )
+    referrers = [
+        BreakdownItem(value="news.com", count=2),
+        BreakdownItem(value="(direct)", count=1),
+    ]
+    mocker.patch(
+        "backend.app.api.routes.url.get_link_breakdowns",
+        return_value={"referrer": referrers, "browser": [BreakdownItem(value="Chrome", count=3)]},
+    )
+
+    response = await get_url_stats("test123", make_request())
+    stats = URLStats.model_validate_json(response.body)
+    assert stats.hit_count == 3
+    assert stats.top_referrers == referrers
+    assert stats.top_browsers == [BreakdownItem(value="Chrome", count=3)]
+
+def test_etag_response_not_modified():
+    content = {"hit_count": 1}
+    etag = etag_response(make_request(), content).headers["ETag"]
+
+    response = etag_response(make_request({"If-None-Match": f'W/{etag}, "other"'}), content)
+    assert response.status_code == 304
+    assert response.body == b""
 
-    stats = await get_url_stats("test123")
-    assert stats["original_url"] == dummy_url.original_url
-    assert stats["hit_count"] == dummy_url.hit_count
-    assert stats["created_at"].isoformat() == dummy_url.created_at.isoformat()
-    assert stats["last_used_at"].isoformat() == dummy_url.last_used_at.isoformat()
\ No newline at end of file
+    changed = etag_response(make_request({"If-None-Match": etag}), {"hit_count": 2})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag